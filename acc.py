@@ -1,9 +1,26 @@
 import base64
-import yaml
+import re
 import requests
+from collections import Counter
 from urllib.parse import urlparse, parse_qs
 import json
-from bs4 import BeautifulSoup
+import os
+import sys
+
+import adaptive
+import budget
+import cpu_pool
+import fingerprint
+import health_store
+import html_extract
+import latency
+import http_cache
+import liveness
+import metrics
+import node_index
+import parallel_fetch
+import sharding
+import yaml_writer
 
 # =============================
 #  COUNTRY CODE YANG DIAMBIL
@@ -14,15 +31,36 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+OUTPUT_FILE = "jomblo.yaml"
+
+# Lewati build jika semua subscription tidak berubah dan jomblo.yaml lama
+# dibangun utuh dengan build_salt yang sama (http_cache.source_unchanged)
+USE_HTTP_CACHE = True
+
+# Parse node di beberapa proses (cpu_pool) untuk daftar yang sangat besar;
+# tetap serial dengan satu CPU atau node kurang dari cpu_pool.MIN_BATCH
+USE_PROCESS_POOL = False
+
+# Buang node yang sama (tipe, server, port, kredensial, path, host) sebelum
+# cek hidup; nama yang dipakai diatur fingerprint.KEEP_NAME
+DEDUP_NODES = True
+
+# Ukur latency TCP/TLS host tiap node, buang yang lambat & urutkan tercepat dulu
+# (ambang, sampel & top-N per negara diatur di latency.py)
+RANK_BY_LATENCY = False
+
+# Tulis juga index node ringkas (node_index.path_for(OUTPUT_FILE)) untuk tool lain
+WRITE_NODE_INDEX = True
+
 # =============================
 #  SCRAPE KEY DARI v2nodes
 # =============================
-def get_key(country):
+def get_key(country, session=None):
     url = f"https://www.v2nodes.com/country/{country}/"
     try:
-        r = requests.get(url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        inp = soup.find("input", id="subscription")
+        r = (session or requests).get(url, headers=HEADERS, timeout=10, stream=True)
+        # Baca halaman per potongan & berhenti begitu input ketemu (fallback BeautifulSoup)
+        inp = html_extract.extract_input(r, "subscription")
         if not inp:
             return None
 
@@ -37,11 +75,15 @@ def get_key(country):
 # =============================
 #  BUILD URL SUBSCRIPTION
 # =============================
-def build_urls():
+def build_urls(session=None):
+    session = session or parallel_fetch.make_session()
+    keys = parallel_fetch.map_ordered(lambda c: get_key(c, session), COUNTRIES)
+
     urls = []
-    for c in COUNTRIES:
-        key = get_key(c)
-        if key:
+    for c, key in zip(COUNTRIES, keys):
+        if isinstance(key, Exception):
+            print(f"[!] Gagal ambil key {c}:", key)
+        elif key:
             sub = f"https://www.v2nodes.com/subscriptions/country/{c}/?key={key}"
             urls.append(sub)
             print(f"[+] {c.upper()} key: {key}")
@@ -64,28 +106,67 @@ ASIA_CODES = [
     "VN","PH","IN","BD","CN"
 ]
 
+# Setara dengan cek "-XX-" atau " XX" per kode, tapi satu kali scan
+ASIA_RE = re.compile(
+    r"-(?:{codes})-| (?:{codes})".format(codes="|".join(ASIA_CODES))
+)
+
 def is_asia(name):
-    up = name.upper()
-    return any(f"-{c}-" in up or f" {c}" in up for c in ASIA_CODES)
+    return ASIA_RE.search(name.upper()) is not None
 
 # =============================
 #  CHECK SERVER HIDUP
 # =============================
+CHECK_MODE = "head"   # "head" = HTTP HEAD penuh, "tls" = cukup TCP connect + TLS handshake
+CHECK_WORKERS = 32    # Jumlah cek paralel (batas awal jika ADAPTIVE_CHECKS aktif)
+CHECK_TIMEOUT = 3
+
+# Jumlah cek paralel diatur AIMD (adaptive.py): naik selama latency & rasio
+# timeout stabil, turun saat cek mulai timeout, di antara batas min-maks ini
+ADAPTIVE_CHECKS = True
+CHECK_WORKERS_MIN = 4
+CHECK_WORKERS_MAX = 128
+
+# Riwayat cek per host antar run (health_store.py): host yang terus mati
+# dicek ulang dengan backoff eksponensial dan sampai jadwalnya dianggap mati
+# tanpa cek, host sehat tetap dicek tiap run
+USE_HEALTH_STORE = True
+HEALTH_FILE = health_store.STORE_FILE
+
+_prober = None
+
+def get_prober():
+    global _prober
+    if _prober is None:
+        limiter = None
+        if ADAPTIVE_CHECKS:
+            limiter = adaptive.AIMDLimiter("liveness", CHECK_WORKERS, CHECK_WORKERS_MIN, CHECK_WORKERS_MAX)
+        health = health_store.HealthStore(HEALTH_FILE, "liveness") if USE_HEALTH_STORE else None
+        _prober = liveness.LivenessProber(CHECK_MODE, workers=CHECK_WORKERS, timeout=CHECK_TIMEOUT,
+                                          limiter=limiter, health=health)
+    return _prober
+
 def check_alive(host):
-    try:
-        requests.head(f"https://{host}", timeout=3)
-        return True
-    except:
-        return False
+    return get_prober().check(host)
+
+def probe_host(proxy):
+    return proxy["ws-opts"]["headers"]["Host"]
+
+def latency_target(proxy):
+    # server selalu "bug.xcp", jadi yang diukur host WS aslinya
+    host = probe_host(proxy)
+    return latency.Target(host, proxy["port"], proxy.get("tls", proxy["type"] == "trojan"), host)
 
 
 # =============================
 #  FETCH & DECODE
 # =============================
-def fetch_subscription(url):
+def fetch_subscription(url, session=None):
     print(f"[*] Fetching: {url}")
     try:
-        r = requests.get(url, timeout=10)
+        if USE_HTTP_CACHE:
+            return http_cache.fetch(url, session=session, timeout=10).text.strip()
+        r = (session or requests).get(url, timeout=10)
         r.raise_for_status()
         return r.text.strip()
     except:
@@ -103,20 +184,28 @@ def parse_nodes(text):
 def clean_name(name):
     return name.replace("[www.v2nodes.com]", "").strip()
 
+def reject(stats, reason, protocol="?"):
+    """Catat alasan node ditolak (stats & metrics), selalu kembalikan None."""
+    if stats is not None:
+        stats[reason] += 1
+    return metrics.reject("acc", protocol, reason)
+
 
 # =============================
 #  PARSER VMESS
 # =============================
-def parse_vmess(uri):
+def parse_vmess(uri, stats=None):
     try:
         js = json.loads(base64.b64decode(uri[8:]).decode())
     except:
-        return None
+        return reject(stats, "parse", "vmess")
 
+    if js.get("net") != "ws":
+        return reject(stats, "ws", "vmess")
     port = int(js.get("port", 0))
     host = js.get("host", "")
-    if js.get("net") != "ws" or port not in ALLOWED_PORTS or not check_alive(host):
-        return None
+    if port not in ALLOWED_PORTS:
+        return reject(stats, "port", "vmess")
 
     return {
         "name": clean_name(js.get("ps", "vmess")),
@@ -140,14 +229,16 @@ def parse_vmess(uri):
 # =============================
 #  PARSER VLESS
 # =============================
-def parse_vless(uri):
+def parse_vless(uri, stats=None):
     u = urlparse(uri.replace("&amp;", "&"))
     q = parse_qs(u.query)
+    if q.get("type", ["tcp"])[0] != "ws":
+        return reject(stats, "ws", "vless")
+
     host = q.get("host", [""])[0]
     port = int(u.port)
-
-    if q.get("type", ["tcp"])[0] != "ws" or port not in ALLOWED_PORTS or not check_alive(host):
-        return None
+    if port not in ALLOWED_PORTS:
+        return reject(stats, "port", "vless")
 
     return {
         "name": clean_name(u.fragment),
@@ -168,14 +259,16 @@ def parse_vless(uri):
 # =============================
 #  PARSER TROJAN
 # =============================
-def parse_trojan(uri):
+def parse_trojan(uri, stats=None):
     u = urlparse(uri.replace("&amp;", "&"))
     q = parse_qs(u.query)
+    if q.get("type", ["tcp"])[0] != "ws":
+        return reject(stats, "ws", "trojan")
+
     host = q.get("host", [""])[0]
     port = int(u.port)
-
-    if q.get("type", ["tcp"])[0] != "ws" or port not in ALLOWED_PORTS or not check_alive(host):
-        return None
+    if port not in ALLOWED_PORTS:
+        return reject(stats, "port", "trojan")
 
     return {
         "name": clean_name(u.fragment),
@@ -194,44 +287,206 @@ def parse_trojan(uri):
 # =============================
 #  BUILD PROXIES
 # =============================
+#  Urutan filter (murah -> mahal): protokol, network ws, port,
+#  negara, dedup host; baru setelah itu cek hidup lewat jaringan.
+def parse_node(n, stats):
+    """Tahap CPU satu node: parse + filter lokal, None jika ditolak."""
+    if n.startswith("vmess://"):
+        parser = parse_vmess
+    elif n.startswith("vless://"):
+        parser = parse_vless
+    elif n.startswith("trojan://"):
+        parser = parse_trojan
+    else:
+        return reject(stats, "protokol", metrics.protocol_of(n))
+
+    try:
+        p = parser(n, stats)
+    except Exception:
+        return reject(stats, "parse", metrics.protocol_of(n))
+    if not p:
+        return None
+
+    # Node ini dulu tetap di-probe walau akhirnya dibuang
+    stats["lolos port"] += 1
+    if not is_asia(p["name"]):
+        return reject(stats, "negara", p["type"])
+    return p
+
+def parse_chunk(nodes):
+    """Worker process pool: parse satu potongan node -> (proxies, stats)."""
+    stats = Counter()
+    return [p for p in (parse_node(n, stats) for n in nodes) if p], stats
+
 def build_proxies(nodes):
+    stats = Counter()
+    candidates = []
+    with metrics.stage("acc.parse"):
+        if USE_PROCESS_POOL and cpu_pool.worth_it(len(nodes)):
+            for proxies, chunk_stats in cpu_pool.map_chunks(parse_chunk, nodes):
+                candidates.extend(proxies)
+                stats.update(chunk_stats)
+        else:
+            candidates = [p for p in (parse_node(n, stats) for n in nodes) if p]
+
+    candidates = dedup_proxies(candidates, stats)
+
+    # Cek hidup tiap host unik sekali saja (paralel), urutan output tetap urutan sumber
+    alive = check_hosts(candidates)
     proxies = []
-    for n in nodes:
-        p = None
-        if n.startswith("vmess://"):
-            p = parse_vmess(n)
-        elif n.startswith("vless://"):
-            p = parse_vless(n)
-        elif n.startswith("trojan://"):
-            p = parse_trojan(n)
-
-        if p and is_asia(p["name"]):
+    for p in candidates:
+        ok = alive.get(probe_host(p))
+        if ok:
             proxies.append(p)
+        else:
+            reject(stats, "mati" if ok is not None else "budget", p["type"])
+
+    proxies = rank_proxies(proxies)
+    print_stats(stats)
+    print(f"[*] Probe: {len(alive)} host unik dari {len(candidates)} kandidat "
+          f"(hemat {stats['lolos port'] - len(alive)} probe)")
 
     return {"proxies": proxies}
 
+def dedup_proxies(candidates, stats):
+    if not DEDUP_NODES:
+        return candidates
+    return list(fingerprint.dedup(
+        candidates, fingerprint.proxy_key,
+        on_duplicate=lambda p: reject(stats, "duplikat", p["type"]),
+    ))
+
+def check_hosts(candidates):
+    """Cek hidup host unik semua kandidat, hasil dict host -> bool.
+
+    Jika budget run dibatasi, host dicek urut prioritas (budget.Priority) dan
+    host yang tidak sempat dicek sebelum deadline tidak ada di hasil.
+    """
+    deadline = budget.stage("acc")
+    if deadline.limited:
+        priority = budget.Priority(COUNTRIES, budget.healthy_hosts(OUTPUT_FILE))
+        candidates = priority.sort(candidates, lambda p: latency.country_of(p["name"]), probe_host, "acc")
+    hosts = list(dict.fromkeys(probe_host(p) for p in candidates))
+    with metrics.stage("acc.check_alive"):
+        prober = get_prober()
+        alive = prober.check_many(hosts, deadline)
+    if getattr(prober, "limiter", None) and hosts:
+        prober.limiter.summary()
+    health = getattr(prober, "health", None)
+    if health is not None:
+        health.close()
+        print("[*]", health.summary())
+    budget.skipped(deadline, len(hosts), len(alive), "host")
+    return alive
+
+def rank_proxies(proxies):
+    if not RANK_BY_LATENCY or budget.exhausted("ranking latency acc"):
+        return proxies
+    with metrics.stage("acc.latency"):
+        return latency.rank(proxies, latency_target, lambda p: p["name"])
+
+def print_stats(stats):
+    print("[*] Ditolak per tahap:", ", ".join(
+        f"{r} {stats[r]}" for r in ("protokol", "parse", "ws", "port", "negara", "duplikat", "mati")
+    ) + (f", budget {stats['budget']}" if stats["budget"] else ""))
 
-def save_yaml(data, file="jomblo.yaml"):
-    with open(file, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+# =============================
+#  SHARD
+# =============================
+def run_shard(nodes, shard):
+    """Parse & cek hidup node milik `shard` saja lalu simpan hasil parsial."""
+    stats = Counter()
+    picked = shard.select(nodes)
+    print(f"[*] Shard {shard}: {len(picked)} dari {len(nodes)} node")
+    with metrics.stage("acc.parse"):
+        parsed = [(i, parse_node(n, stats)) for i, n in picked]
+    parsed = [(i, p) for i, p in parsed if p]
+
+    alive = check_hosts([p for _, p in parsed])
+    records = []
+    for i, p in parsed:
+        ok = alive.get(probe_host(p))
+        if ok:
+            records.append((i, p))
+        else:
+            reject(stats, "mati" if ok is not None else "budget", p["type"])
+    print_stats(stats)
+    sharding.write_partial("acc", shard, sharding.source_digest(nodes), records,
+                           complete=not budget.was_cut("acc"))
+
+def merge_shards(count, file=OUTPUT_FILE):
+    # Dedup setelah cek hidup tetap sama hasilnya: host WS ikut fingerprint,
+    # jadi semua duplikat sama-sama hidup atau sama-sama mati
+    stats = Counter()
+    if not sharding.complete("acc", count):
+        budget.mark_cut("acc")
+    proxies = rank_proxies(dedup_proxies(sharding.read_partials("acc", count), stats))
+    print(f"[*] Gabungan {count} shard: {len(proxies)} node, {stats['duplikat']} duplikat dibuang")
+    save_yaml(proxies, file)
+
+
+def build_salt():
+    """Salt cap jomblo.yaml; liveness ikut karena hasil cek hidup menentukan isinya."""
+    return http_cache.salt((COUNTRIES, DEDUP_NODES, RANK_BY_LATENCY, fingerprint.KEEP_NAME),
+                           sys.modules[__name__], fingerprint, yaml_writer, latency, liveness)
+
+
+def save_yaml(data, file=OUTPUT_FILE):
+    """Simpan {"proxies": [...]} atau iterable proxy (ditulis streaming)."""
+    proxies = data["proxies"] if isinstance(data, dict) else data
+    if isinstance(proxies, list) and not proxies and budget.was_cut("acc") and os.path.exists(file):
+        print(f"[!] Budget habis sebelum ada node tervalidasi, {file} lama dipertahankan")
+        if USE_HTTP_CACHE:
+            http_cache.stamp(file, build_salt(), complete=False)
+        return
+    index = node_index.Builder("acc")
+    if WRITE_NODE_INDEX:
+        proxies = index.collect(proxies, lambda p: index.add_proxy(p, latency_target))
+    yaml_writer.save_proxies(proxies, file, stage="acc.yaml")
     print("[✓] Saved:", file)
+    if USE_HTTP_CACHE:
+        http_cache.stamp(file, build_salt(), complete=not budget.was_cut("acc", "ranking latency acc"))
+    if WRITE_NODE_INDEX:
+        index.write(node_index.path_for(file))
 
 
 # =============================
 #  MAIN
 # =============================
-def main():
-    URLS = build_urls()
+def main(shard=None):
+    budget.start()
+    session = parallel_fetch.make_session()
+    with metrics.stage("acc.fetch"):
+        URLS = build_urls(session)
+        raws = parallel_fetch.map_ordered(lambda u: fetch_subscription(u, session), URLS)
     all_nodes = []
 
-    for u in URLS:
-        raw = fetch_subscription(u)
+    for raw in raws:
+        if isinstance(raw, Exception):
+            continue
         decoded = decode_subscription(raw)
         all_nodes.extend(parse_nodes(decoded))
 
+    if shard:
+        run_shard(all_nodes, shard)
+        metrics.write()
+        return
+
+    if USE_HTTP_CACHE and http_cache.source_unchanged(URLS, OUTPUT_FILE, build_salt()):
+        print(f"[=] Subscription tidak berubah, pakai {OUTPUT_FILE} sebelumnya")
+        metrics.write()
+        return
+
     print("[*] Total node:", len(all_nodes))
+    metrics.count("acc.nodes", len(all_nodes))
     save_yaml(build_proxies(all_nodes))
+    metrics.write()
 
 
 if __name__ == "__main__":
-    main()
+    _shard, _merge = sharding.from_argv(sys.argv[1:])
+    if _merge:
+        merge_shards(_merge)
+        metrics.write()
+    else:
+        main(_shard)
@@ -0,0 +1,177 @@
+import asyncio
+import collections
+import statistics
+import threading
+import time
+
+import metrics
+
+# ================= KONFIGURASI =================
+WINDOW = 20              # Minimal sampel selesai per keputusan naik/turun (minimal batas/4)
+DECREASE = 0.5           # Pengali batas saat jendela bermasalah (multiplicative decrease)
+ERROR_MARGIN = 0.1       # Turun jika rasio timeout/error > rasio terendah yang pernah terlihat + margin ini
+LATENCY_RATIO = 2.0      # Turun jika median latency > median terendah yang pernah terlihat x rasio ini
+LOG_LIMIT = 20           # Maksimal perubahan yang dicetak di ringkasan akhir
+# ===============================================
+
+# AIMD: tiap jendela sampel yang sehat batas naik `increase` (additive),
+# tiap jendela dengan timeout/error atau latency melonjak batas dikali
+# DECREASE (multiplicative). Pembanding error & latency adalah nilai
+# terendah yang pernah terlihat, jadi domain/host yang memang selalu
+# lambat atau timeout tidak membuat batas turun terus. Setelah turun,
+# hasil request yang sudah jalan sebelumnya diabaikan (masih mencerminkan
+# batas lama) supaya batas tidak langsung jatuh ke minimum.
+
+
+class AIMDLimiter:
+    """Batas jumlah request bersamaan yang menyesuaikan diri saat runtime.
+
+    Untuk thread: acquire()/release() atau call(). Untuk asyncio (satu
+    event loop): acquire_async()/release_async(). Satu limiter hanya
+    dipakai salah satu jenis.
+    """
+
+    def __init__(self, name, initial, min_limit, max_limit, increase=None):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        # Default langkah naik ~1/64 rentang: 2 untuk pool thread, ~16 untuk ribuan query async
+        self.increase = increase or max(1, round(self.max_limit / 64))
+        self.inflight = 0
+        self.peak = self.limit
+        self.history = []       # (detik_sejak_mulai, batas_lama, batas_baru, alasan)
+        self._start = time.perf_counter()
+        self._initial = self.limit
+        self._latencies = []
+        self._failures = 0
+        self._skip = 0
+        self._best_latency = None
+        self._best_error = None
+        self._cond = threading.Condition()
+        self._waiters = collections.deque()
+
+    # ---------- keputusan AIMD ----------
+    def _set_limit(self, new, reason):
+        new = min(max(new, self.min_limit), self.max_limit)
+        if new == self.limit:
+            return False
+        self.history.append((time.perf_counter() - self._start, self.limit, new, reason))
+        metrics.count(f"adaptive.{self.name}.{'naik' if new > self.limit else 'turun'}")
+        self.limit = new
+        self.peak = max(self.peak, new)
+        return True
+
+    def _record(self, seconds, ok):
+        """Catat satu request selesai, kembalikan True jika batas berubah."""
+        if self._skip:
+            self._skip -= 1
+            return False
+        if ok:
+            self._latencies.append(seconds)
+        else:
+            self._failures += 1
+        total = len(self._latencies) + self._failures
+        # Jendela ikut membesar dengan batas: kira-kira satu keputusan per "putaran" request
+        if total < max(WINDOW, self.limit // 4):
+            return False
+
+        error_rate = self._failures / total
+        median = statistics.median(self._latencies) if self._latencies else None
+        self._latencies = []
+        self._failures = 0
+
+        if self._best_error is None or error_rate < self._best_error:
+            self._best_error = error_rate
+        if median is not None and (self._best_latency is None or median < self._best_latency):
+            self._best_latency = median
+
+        if error_rate > self._best_error + ERROR_MARGIN:
+            reason = f"error {error_rate:.0%}"
+        elif median is not None and median > self._best_latency * LATENCY_RATIO:
+            reason = f"latency {median * 1000:.0f} ms"
+        else:
+            return self._set_limit(self.limit + self.increase, "ok")
+
+        changed = self._set_limit(int(self.limit * DECREASE), reason)
+        if changed:
+            self._skip = self.inflight
+        return changed
+
+    # ---------- thread ----------
+    def acquire(self):
+        with self._cond:
+            while self.inflight >= self.limit:
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self, seconds, ok=True):
+        with self._cond:
+            self.inflight -= 1
+            if self._record(seconds, ok):
+                self._cond.notify_all()
+            else:
+                self._cond.notify()
+
+    def call(self, fn, *args, ok=None):
+        """Jalankan fn(*args) di dalam batas; ok(hasil) False = dihitung gagal.
+
+        Exception dari fn dihitung gagal lalu diteruskan.
+        """
+        self.acquire()
+        start = time.perf_counter()
+        success = False
+        try:
+            result = fn(*args)
+            success = ok is None or ok(result)
+            return result
+        finally:
+            self.release(time.perf_counter() - start, success)
+
+    # ---------- asyncio ----------
+    async def acquire_async(self):
+        if self.inflight < self.limit and not self._waiters:
+            self.inflight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut  # Slot sudah dihitung oleh _wake()
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.inflight -= 1
+                self._wake()
+            raise
+
+    def release_async(self, seconds, ok=True):
+        self.inflight -= 1
+        self._record(seconds, ok)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.inflight < self.limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.inflight += 1
+                fut.set_result(None)
+
+    # ---------- laporan ----------
+    def summary(self):
+        """Cetak perjalanan batas konkurensi selama run."""
+        up = sum(1 for _, old, new, _ in self.history if new > old)
+        down = len(self.history) - up
+        print(f"[*] Konkurensi {self.name}: awal {self._initial}, akhir {self.limit}, "
+              f"puncak {self.peak} (batas {self.min_limit}-{self.max_limit}), {up} naik, {down} turun")
+        # Kenaikan berturut-turut digabung jadi satu baris
+        lines = []
+        for t, old, new, reason in self.history:
+            if new > old and lines and lines[-1][3] > 0:
+                lines[-1][2] = new
+                lines[-1][3] += 1
+            else:
+                lines.append([t, old, new, 1 if new > old else 0, reason])
+        for t, old, new, ups, reason in lines[-LOG_LIMIT:]:
+            reason = f"naik {ups}x" if ups else reason
+            print(f"    +{t:6.2f}s  {old:5d} -> {new:5d}  ({reason})")
+        if len(lines) > LOG_LIMIT:
+            print(f"    ... {len(lines) - LOG_LIMIT} perubahan lebih awal tidak ditampilkan")
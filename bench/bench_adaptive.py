@@ -0,0 +1,104 @@
+"""Konkurensi tetap vs AIMD (adaptive.py) terhadap resolver yang kewalahan.
+
+StubDNSServer lokal dengan `capacity`: delay naik sesuai jumlah query yang
+ditunda dan query di atas kapasitas di-drop (jadi timeout di klien), mirip
+resolver CI yang mulai throttling. Dibandingkan untuk engine async
+(AsyncResolver) dan engine thread (resolve_blocking di ThreadPool):
+
+    python bench/bench_adaptive.py [jumlah_nama] [--capacity N] [--delay detik]
+"""
+import asyncio
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import adaptive
+import dns_async
+import inject_sni
+from bench_dns import make_names
+from stubs import StubDNSServer
+
+TIMEOUT = 0.5
+RETRIES = 1
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def run_async(names, server, max_inflight, limiter=None):
+    async def run():
+        async with dns_async.AsyncResolver([server], timeout=TIMEOUT, retries=RETRIES,
+                                           max_inflight=max_inflight, limiter=limiter) as r:
+            return await r.resolve_many(names)
+
+    start = time.perf_counter()
+    answers = asyncio.run(run())
+    return time.perf_counter() - start, answers
+
+
+def run_thread(names, server, workers, limiter=None):
+    def lookup(name):
+        if limiter is None:
+            return dns_async.resolve_blocking(name, server, TIMEOUT, RETRIES)
+        return limiter.call(dns_async.resolve_blocking, name, server, TIMEOUT, RETRIES,
+                            ok=lambda a: not a.failed)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+        answers = dict(zip(names, ex.map(lookup, names)))
+    return time.perf_counter() - start, answers
+
+
+def report(label, elapsed, answers, expected, limiter=None):
+    failed = sum(a.failed for a in answers.values())
+    wrong = sum(a.active != expected[n] for n, a in answers.items())
+    print(f"  {label:22s}: {elapsed:6.2f} s  {len(answers) / elapsed:7.0f} nama/s  "
+          f"timeout {failed:5d}  salah {wrong:5d}"
+          + (f"  batas akhir {limiter.limit}" if limiter else ""))
+    return failed
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 5000
+    capacity = int(option("--capacity", 150))
+    delay = float(option("--delay", 0.02))
+    names = make_names(n)
+    expected = {name: ".cdn-ok.test" in name for name in names}
+
+    stub = StubDNSServer(wildcard_suffixes=["cdn-ok.test"], delay=delay,
+                                   capacity=capacity).start_in_thread()
+    print(f"{n} nama, resolver kapasitas {capacity} query, delay dasar {delay * 1000:.0f} ms, "
+          f"timeout {TIMEOUT} s x {RETRIES + 1}")
+    try:
+        print("\nengine async")
+        fixed = report(f"tetap {inject_sni.DNS_MAX_INFLIGHT}", *run_async(names, stub.address, inject_sni.DNS_MAX_INFLIGHT), expected)
+        limiter = adaptive.AIMDLimiter("dns", inject_sni.DNS_INITIAL_INFLIGHT, inject_sni.DNS_MIN_INFLIGHT,
+                                       inject_sni.DNS_MAX_INFLIGHT)
+        elapsed, answers = run_async(names, stub.address, inject_sni.DNS_MAX_INFLIGHT, limiter)
+        adaptive_failed = report("adaptif", elapsed, answers, expected, limiter)
+        limiter.summary()
+
+        print("\nengine thread")
+        stub.capacity = max(1, capacity // 5)
+        workers = inject_sni.MAX_THREADS_LIMIT
+        report(f"tetap {workers} thread", *run_thread(names, stub.address, workers), expected)
+        limiter = adaptive.AIMDLimiter("dns", inject_sni.MAX_THREADS, inject_sni.MIN_THREADS, workers)
+        report("adaptif", *run_thread(names, stub.address, workers, limiter), expected, limiter)
+        limiter.summary()
+    finally:
+        stub.stop_thread()
+
+    if adaptive_failed > fixed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
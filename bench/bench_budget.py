@@ -0,0 +1,185 @@
+"""Budget waktu run: cek berhenti di deadline, urut prioritas, hasil parsial tetap valid.
+
+inject_sni.check_links dijalankan terhadap StubDNSServer lokal yang lambat
+(delay per query) dan acc.build_proxies dengan cek hidup palsu yang tidur
+--delay detik per host: sekali tanpa budget (hasilnya juga jadi output
+"run sebelumnya" untuk kelompok host sehat), lalu dengan budget jauh di
+bawah waktu penuh (acc hanya mendapat budget.STAGE_SHARE["acc"] dari sisa
+budget). Diperiksa: run terbatas selesai dekat budget, hasilnya
+subset berurutan dari hasil penuh, dan cakupan cek per kelompok prioritas
+(negara pilihan > sehat sebelumnya > lainnya):
+
+    python bench/bench_budget.py [jumlah_link] [--budget 0.8] [--delay 0.05]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import acc
+import budget
+import inject_sni
+import latency
+import liveness
+from corpus import generate
+from stubs import StubDNSServer
+
+WILDCARD_SUFFIXES = ["workers.dev", "pages.dev", "cloudflare.net"]
+GROUPS = ("negara pilihan", "sehat sebelumnya", "lainnya")
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def group_of(key):
+    return 0 if not key[0] else 1 if not key[2] else 2
+
+
+def order_ok():
+    """Negara pilihan urut konfigurasi walau host negara berikutnya sehat; sehat hanya pemisah seri."""
+    priority = budget.Priority(["ID", "SG"], {"sg-sehat", "lain-sehat"})
+    items = [("XX", "lain"), ("XX", "lain-sehat"), ("SG", "sg-sehat"), ("ID", "id-mati"), ("SG", "sg-mati")]
+    with contextlib.redirect_stdout(io.StringIO()):
+        got = priority.sort(items, lambda i: i[0], lambda i: i[1], "uji")
+    want = [("ID", "id-mati"), ("SG", "sg-sehat"), ("SG", "sg-mati"), ("XX", "lain-sehat"), ("XX", "lain")]
+    print(f"Urutan prioritas (negara pilihan > sehat > lainnya): {got == want}")
+    return got == want
+
+
+def recorded(module, name):
+    """Bungkus module.name supaya hasil (dict) tiap panggilan ikut disimpan."""
+    original = getattr(module, name)
+    seen = {}
+
+    def wrapper(*args, **kwargs):
+        result = original(*args, **kwargs)
+        seen.update(result)
+        return result
+    setattr(module, name, wrapper)
+    return seen
+
+
+def run(fn, seconds):
+    budget.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        budget.start(seconds)
+        result = fn()
+    return result, time.perf_counter() - start
+
+
+def report(label, full, partial, t_full, t_partial, limit, coverage):
+    subset = len(partial) == len(full) and all(p is None or p == f for p, f in zip(partial, full))
+    print(f"  {label:10s}: penuh {t_full:5.2f} s, budget {limit} s -> {t_partial:5.2f} s, "
+          f"{sum(1 for p in partial if p)}/{sum(1 for f in full if f)} hasil, subset berurutan: {subset}")
+    print("    dicek per kelompok: " + ", ".join(
+        f"{GROUPS[g]} {done}/{total}" for g, (done, total) in sorted(coverage.items())))
+    # Kelompok prioritas lebih tinggi harus tercakup minimal sama baiknya
+    ratios = [done / total for _, (done, total) in sorted(coverage.items()) if total]
+    return subset and all(a >= b for a, b in zip(ratios, ratios[1:]))
+
+
+def coverage_of(keys, checked):
+    coverage = {}
+    for domain, key in keys.items():
+        done, total = coverage.get(group_of(key), (0, 0))
+        coverage[group_of(key)] = (done + (domain in checked), total + 1)
+    return coverage
+
+
+def bench_inject(lines, tmp, limit, delay):
+    stub = StubDNSServer(wildcard_suffixes=WILDCARD_SUFFIXES, delay=delay).start_in_thread()
+    inject_sni.DNS_SERVERS = [stub.address]
+    inject_sni.DNS_MAX_INFLIGHT = 20
+    inject_sni.ADAPTIVE_CONCURRENCY = False
+    inject_sni.OUTPUT_FILE = os.path.join(tmp, "akun.txt")
+    inject_sni.PREFERRED_COUNTRIES = ["sg"]
+    checked = recorded(inject_sni, "resolve_domains")
+    try:
+        full, t_full = run(lambda: inject_sni.check_links(lines), 0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            inject_sni.save_results([r for r in full if r])
+        checked.clear()
+        partial, t_partial = run(lambda: inject_sni.check_links(lines), limit)
+    finally:
+        stub.stop_thread()
+
+    priority = budget.Priority(inject_sni.PREFERRED_COUNTRIES, budget.healthy_hosts(inject_sni.OUTPUT_FILE))
+    keys = {}
+    for line in lines:
+        plan = inject_sni.plan_single_link(line)
+        if plan:
+            domain = inject_sni.combine_domain(plan[0]).lower()
+            keys.setdefault(domain, priority.key(latency.country_of(inject_sni.link_name(line)), domain))
+    return report("inject_sni", full, partial, t_full, t_partial, limit, coverage_of(keys, checked))
+
+
+def bench_acc(lines, tmp, limit, delay):
+    prober = liveness.LivenessProber(workers=16)
+    prober._probe = lambda host: (time.sleep(delay), (zlib.crc32(host.encode()) % 4 != 0, False))[1]
+    acc._prober = prober
+    acc.OUTPUT_FILE = os.path.join(tmp, "jomblo.yaml")
+    checked = recorded(acc, "check_hosts")
+
+    full, t_full = run(lambda: acc.build_proxies(lines)["proxies"], 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        acc.save_yaml(full, acc.OUTPUT_FILE)
+    checked.clear()
+    prober._results.clear()
+    partial, t_partial = run(lambda: acc.build_proxies(lines)["proxies"], limit)
+
+    # Sejajarkan dengan hasil penuh: proxy yang tidak ada di run terbatas jadi None,
+    # sisa yang tidak ketemu (bukan subsequence) ditambahkan supaya panjangnya beda
+    rest = iter(partial)
+    pending = next(rest, None)
+    got = []
+    for p in full:
+        if pending is not None and p == pending:
+            got.append(p)
+            pending = next(rest, None)
+        else:
+            got.append(None)
+    got.extend([pending] if pending is not None else [])
+
+    priority = budget.Priority(acc.COUNTRIES, budget.healthy_hosts(acc.OUTPUT_FILE))
+    keys = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        candidates = acc.dedup_proxies([p for p in (acc.parse_node(n, acc.Counter()) for n in lines) if p],
+                                       acc.Counter())
+    for p in candidates:
+        # Host yang dipakai beberapa node ikut kelompok prioritas tertingginya (seperti urutan cek)
+        key = priority.key(latency.country_of(p["name"]), acc.probe_host(p))
+        keys[acc.probe_host(p)] = min(keys.get(acc.probe_host(p), key), key)
+    return report("acc", full, got, t_full, t_partial, limit, coverage_of(keys, checked))
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 5000
+    limit = float(option("--budget", 0.8))
+    delay = float(option("--delay", 0.05))
+
+    budget.FLUSH_RESERVE = 0
+    inject_sni._dns_cache = None
+    inject_sni._link_state = None
+    lines = list(inject_sni.dedup_links(generate(n, 4)))
+    print(f"{len(lines)} link, delay {delay * 1000:.0f} ms per cek")
+    ok = order_ok()
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = bench_inject(lines, tmp, limit, delay) and ok
+        ok = bench_acc(lines, tmp, limit, delay) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
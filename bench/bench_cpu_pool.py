@@ -0,0 +1,90 @@
+"""Skala tahap CPU di process pool (cpu_pool) terhadap jumlah proses.
+
+Menjalankan inject_sni.check_links dan acc.build_proxies pada korpus
+sintetis dengan DNS & cek hidup di-stub (lihat bench_parsers.py), sekali
+serial lalu dengan USE_PROCESS_POOL untuk tiap jumlah worker, dan
+memastikan hasilnya identik dengan jalur serial. Baris "serial (gate)"
+berarti cpu_pool.worth_it menolak pool (satu CPU/proses atau link kurang
+dari MIN_BATCH) sehingga jalur serial yang dipakai; --force melewati gate
+untuk mengukur ongkos pool itu sendiri:
+
+    python bench/bench_cpu_pool.py [jumlah_link] [--workers 1,2,4,8] [--chunk N] [--force]
+
+Default worker: 1, 2, 4, ... sampai os.cpu_count().
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import acc
+import cpu_pool
+import inject_sni
+from bench_parsers import install_stubs
+from corpus import generate
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def timed(fn, links):
+    gc.collect()   # Sisa hasil pengukuran sebelumnya tidak ikut dihitung
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(links)
+        return time.perf_counter() - start, result
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 200_000
+    cores = os.cpu_count() or 1
+    default = [1 << i for i in range(cores.bit_length()) if 1 << i <= cores] + ([cores] if cores & (cores - 1) else [])
+    workers = [int(w) for w in option("--workers", ",".join(map(str, default))).split(",")]
+    cpu_pool.CHUNK_SIZE = int(option("--chunk", cpu_pool.CHUNK_SIZE))
+    if "--force" in sys.argv:
+        cpu_pool.worth_it = lambda count: True
+
+    install_stubs()
+    links = generate(n, 0)
+    print(f"{n} link, {cores} core, chunk {cpu_pool.CHUNK_SIZE}, min batch {cpu_pool.MIN_BATCH}")
+    problems = []
+
+    for label, module, fn in (("inject_sni.check_links", inject_sni, inject_sni.check_links),
+                              ("acc.build_proxies", acc, acc.build_proxies)):
+        module.USE_PROCESS_POOL = False
+        base, expected = timed(fn, links)
+        print(f"\n{label}")
+        print(f"  serial      : {base:7.2f} s  {n / base:9.0f} link/s")
+
+        module.USE_PROCESS_POOL = True
+        for w in workers:
+            cpu_pool.shutdown()
+            cpu_pool.WORKERS = w
+            pooled = cpu_pool.worth_it(n)
+            if pooled:
+                cpu_pool.get_executor()  # start proses di luar pengukuran
+            elapsed, result = timed(fn, links)
+            same = "identik" if result == expected else "BEDA!"
+            if result != expected:
+                problems.append(f"{label} {w} proses")
+            print(f"  {w:3d} proses  : {elapsed:7.2f} s  {n / elapsed:9.0f} link/s  "
+                  f"x{base / elapsed:4.2f}  {same}  {'pool' if pooled else 'serial (gate)'}")
+        module.USE_PROCESS_POOL = False
+        cpu_pool.shutdown()
+
+    print(f"\nCek: {'semua OK' if not problems else 'BEDA: ' + ', '.join(problems)}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Mode daemon: respons prebuilt (body, gzip, ETag) vs dibangun per request.
+
+Output sintetis (akun dari corpus.py, YAML proxy lewat yaml_writer) ditulis
+ke direktori sementara lalu disajikan server daemon.py di port acak.
+Diperiksa: body polos & gzip sama dengan isi file (/sub = base64 akun),
+If-None-Match -> 304, HEAD tanpa body, gzip eksplisit menang atas "*", file berubah -> ETag baru, path
+lain 404. Lalu throughput GET gzip berurutan (keep-alive) dibandingkan
+dengan handler yang membangun ulang respons tiap request:
+
+    python bench/bench_daemon.py [jumlah_akun] [--requests 2000]
+"""
+import base64
+import gzip
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import daemon
+import yaml_writer
+from corpus import generate
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+class RebuildHandler(daemon.Handler):
+    """Pembanding: baca file, transform, gzip & hash ulang di tiap request."""
+
+    def do_GET(self):
+        daemon._artifacts = {}
+        daemon.build_artifacts()
+        super().do_GET()
+
+    do_HEAD = do_GET
+
+
+def serve(handler):
+    server = daemon.make_server("127.0.0.1", 0)
+    server.RequestHandlerClass = handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def request(conn, method, path, headers=None):
+    conn.request(method, path, headers=headers or {})
+    r = conn.getresponse()
+    return r.status, dict(r.getheaders()), r.read()
+
+
+def write_outputs(tmp, n):
+    lines = [l for l in generate(n, 9) if "://" in l]
+    files = {}
+    for path, (source, _, _) in daemon.ROUTES.items():
+        files[path] = os.path.join(tmp, os.path.basename(source))
+    with open(files["/sub"], "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    proxies = [{"name": f"node-{i}", "type": "vless", "server": f"h{i}.workers.dev", "port": 443,
+                "uuid": f"{i:032x}", "tls": True, "network": "ws",
+                "ws-opts": {"path": "/ws", "headers": {"Host": f"h{i}.workers.dev"}}} for i in range(n // 4)]
+    for path in ("/dialer-proxy.yaml", "/jomblo.yaml"):
+        yaml_writer.save_proxies(proxies, files[path])
+    daemon.ROUTES = {p: (files[p],) + daemon.ROUTES[p][1:] for p in daemon.ROUTES}
+    return files
+
+
+def check(conn, files):
+    problems = []
+
+    def expect(ok, what):
+        if not ok:
+            problems.append(what)
+
+    for path, source in files.items():
+        with open(source, "rb") as f:
+            data = f.read()
+        if path == "/sub":
+            data = base64.b64encode(b"\n".join(l.strip() for l in data.splitlines() if l.strip()))
+        status, headers, body = request(conn, "GET", path)
+        expect(status == 200 and body == data, f"{path} body polos")
+        status, gz_headers, gz_body = request(conn, "GET", path, {"Accept-Encoding": "gzip, br"})
+        expect(gz_headers.get("Content-Encoding") == "gzip" and gzip.decompress(gz_body) == data, f"{path} gzip")
+        expect(gz_headers["ETag"] != headers["ETag"], f"{path} ETag gzip beda dengan polos")
+        status, _, body = request(conn, "GET", path, {"If-None-Match": headers["ETag"]})
+        expect(status == 304 and not body, f"{path} 304")
+        status, h, body = request(conn, "HEAD", path, {"Accept-Encoding": "gzip"})
+        expect(status == 200 and not body and h["Content-Length"] == str(len(gz_body)), f"{path} HEAD")
+
+    # gzip eksplisit menang atas "*", ke dua arah
+    for header, want in (("*;q=0, gzip", "gzip"), ("gzip;q=0, *", None)):
+        _, h, _ = request(conn, "GET", "/sub", {"Accept-Encoding": header})
+        expect(h.get("Content-Encoding") == want, f"Accept-Encoding {header!r}")
+
+    etag = request(conn, "GET", "/jomblo.yaml")[1]["ETag"]
+    with open(files["/jomblo.yaml"], "a", encoding="utf-8") as f:
+        f.write("# berubah\n")
+    changed = daemon.build_artifacts()
+    status, headers, _ = request(conn, "GET", "/jomblo.yaml", {"If-None-Match": etag})
+    expect(changed == ["/jomblo.yaml"] and status == 200 and headers["ETag"] != etag, "ETag baru setelah berubah")
+    expect(daemon.build_artifacts() == [], "tanpa perubahan tidak dibangun ulang")
+    expect(request(conn, "GET", "/lain")[0] == 404, "404")
+    return problems
+
+
+def throughput(server, count):
+    conn = http.client.HTTPConnection(*server.server_address)
+    start = time.perf_counter()
+    for i in range(count):
+        request(conn, "GET", ("/sub", "/jomblo.yaml", "/dialer-proxy.yaml")[i % 3], {"Accept-Encoding": "gzip"})
+    conn.close()
+    return time.perf_counter() - start
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 20000
+    count = int(option("--requests", 2000))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_outputs(tmp, n)
+        daemon.build_artifacts()
+        sizes = ", ".join(f"{p} {len(a.body) // 1024} KiB -> gzip {len(a.gzipped) // 1024} KiB"
+                          for p, a in daemon._artifacts.items())
+        print(f"Artifact: {sizes}")
+
+        server = serve(daemon.Handler)
+        conn = http.client.HTTPConnection(*server.server_address)
+        problems = check(conn, files)
+        conn.close()
+        t_prebuilt = throughput(server, count)
+        server.shutdown()
+
+        server = serve(RebuildHandler)
+        t_rebuild = throughput(server, max(count // 20, 10))
+        server.shutdown()
+        t_rebuild *= count / max(count // 20, 10)
+
+    print(f"Cek: {'semua OK' if not problems else ', '.join(problems)}")
+    print(f"  prebuilt   : {count / t_prebuilt:8.0f} req/s")
+    print(f"  per request: {count / t_rebuild:8.0f} req/s (x{t_rebuild / t_prebuilt:.0f} lebih lambat)")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark offline: jalur ThreadPool (blocking) vs engine DNS asyncio.
+
+Kedua jalur menembak StubDNSServer lokal yang sama, dengan delay buatan
+supaya mirip resolver sungguhan. Jalankan:
+
+    python bench/bench_dns.py [jumlah_nama] [delay_detik]
+"""
+import asyncio
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dns_async
+import inject_sni
+from stubs import StubDNSServer
+
+
+def make_names(n):
+    # Setengah nama di bawah suffix wildcard (aktif), setengah NXDOMAIN
+    return [
+        f"{inject_sni.BUG_DOMAIN}.node{i}.{'cdn-ok.test' if i % 2 else 'dead.test'}"
+        for i in range(n)
+    ]
+
+
+def bench_thread(names, server):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=inject_sni.MAX_THREADS) as ex:
+        answers = list(ex.map(lambda n: dns_async.resolve_blocking(n, server), names))
+    return time.perf_counter() - start, {n for n, a in zip(names, answers) if a.active}
+
+
+def bench_async(names, server):
+    async def run():
+        async with dns_async.AsyncResolver([server], max_inflight=inject_sni.DNS_MAX_INFLIGHT) as r:
+            return await r.resolve_many(names)
+
+    start = time.perf_counter()
+    answers = asyncio.run(run())
+    return time.perf_counter() - start, {n for n, a in answers.items() if a.active}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    stub = StubDNSServer(wildcard_suffixes=["cdn-ok.test"], delay=delay).start_in_thread()
+    names = make_names(n)
+    try:
+        t_thread, ok_thread = bench_thread(names, stub.address)
+        t_async, ok_async = bench_async(names, stub.address)
+    finally:
+        stub.stop_thread()
+
+    print(f"Nama: {n}, delay stub: {delay * 1000:.0f} ms")
+    print(f"thread ({inject_sni.MAX_THREADS} worker): {t_thread:8.3f} s  {n / t_thread:10.0f} q/s  aktif={len(ok_thread)}")
+    print(f"async  ({inject_sni.DNS_MAX_INFLIGHT} inflight): {t_async:8.3f} s  {n / t_async:10.0f} q/s  aktif={len(ok_async)}")
+    # Hanya nama di bawah cdn-ok.test yang boleh aktif, semuanya
+    expected = {name for name in names if name.endswith(".cdn-ok.test")}
+    problems = [label for label, got in (("thread", ok_thread), ("async", ok_async)) if got != expected]
+    print(f"Cek: {'semua OK' if not problems else 'hasil salah: ' + ', '.join(problems)}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
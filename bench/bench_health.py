@@ -0,0 +1,171 @@
+"""Health store antar run: host yang terus mati di-backoff, host sehat tetap dicek tiap run.
+
+Simulasi beberapa run berjarak --interval jam (jam health_store dimajukan,
+tanpa menunggu sungguhan) untuk dua jenis cek: cek hidup acc
+(liveness.LivenessProber) dan DNS inject_sni (resolve_answers engine
+thread), keduanya dengan cek palsu: host mati tidur --delay detik lalu
+timeout. Sebagian host mati sejak awal, sebagian mati di tengah, sebagian
+pulih di tengah. Diperiksa: host yang sehat di suatu run selalu dicek dan
+hasilnya hidup, host yang pulih kembali terdeteksi paling lambat
+MAX_BACKOFF kemudian; dilaporkan cek, timeout yang dihindari & waktu per run:
+
+    python bench/bench_health.py [jumlah_host] [--runs 12] [--interval 6] [--delay 0.02]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dns_async
+import health_store
+import inject_sni
+import liveness
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+class World:
+    """Host mana yang hidup di run ke-`run`, plus catatan host yang benar-benar dicek."""
+
+    def __init__(self, hosts, runs, delay):
+        self.hosts = hosts
+        self.delay = delay
+        self.run = 0
+        self.probed = set()
+        n = len(hosts)
+        # 40% mati terus, 10% mati mulai tengah, 10% mati lalu pulih di tengah, sisanya sehat
+        self.dead_always = set(hosts[: n * 4 // 10])
+        self.dies = set(hosts[n * 4 // 10: n // 2])
+        self.recovers = set(hosts[n // 2: n * 6 // 10])
+        self.middle = runs // 2
+
+    def alive(self, host):
+        if host in self.dead_always:
+            return False
+        if host in self.dies:
+            return self.run < self.middle
+        if host in self.recovers:
+            return self.run >= self.middle
+        return True
+
+    def probe(self, host):
+        """(hidup, timeout) seperti LivenessProber._probe."""
+        self.probed.add(host)
+        if self.alive(host):
+            return True, False
+        time.sleep(self.delay)
+        return False, True
+
+
+def liveness_run(world, store):
+    prober = liveness.LivenessProber(workers=32, health=store)
+    prober._probe = world.probe
+    return prober.check_many(world.hosts)
+
+
+def dns_run(world, store):
+    def lookup(name):
+        alive, _ = world.probe(name)
+        if alive:
+            return dns_async.DNSAnswer(dns_async.STATUS_OK, ("104.16.0.1",))
+        return dns_async.DNSAnswer(dns_async.STATUS_TIMEOUT)
+
+    inject_sni.lookup_blocking = lookup
+    inject_sni._health = store
+    try:
+        return {d: a.active for d, a in inject_sni.resolve_answers(world.hosts).items()}
+    finally:
+        inject_sni._health = None
+
+
+def simulate(label, check, hosts, runs, interval, delay, path):
+    world = World(hosts, runs, delay)
+    clock = [time.time()]
+    health_store.time = types.SimpleNamespace(time=lambda: clock[0])
+    ok = True
+    detected = {}
+    total_plain = total_store = 0.0
+    print(f"{label}:")
+    print("  run  dicek  dilewati  timeout-dihindari  waktu(tanpa store)  waktu(store)")
+    try:
+        for run in range(runs):
+            world.run = run
+            # Pembanding tanpa store: semua host dicek
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                check(world, None)
+            t_plain = time.perf_counter() - start
+
+            world.probed = set()
+            store = health_store.HealthStore(path, label)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = check(world, store)
+            t_store = time.perf_counter() - start
+            store.close()
+            total_plain += t_plain
+            total_store += t_store
+
+            healthy = [h for h in hosts if world.alive(h)]
+            missed = [h for h in healthy if h not in world.recovers and (h not in world.probed or not result[h])]
+            for h in world.recovers:
+                if run >= world.middle and result[h] and h not in detected:
+                    detected[h] = run
+            print(f"  {run:3d}  {len(world.probed):5d}  {store.skipped:8d}  {store.avoided_timeouts:17d}"
+                  f"  {t_plain:15.2f} s  {t_store:9.2f} s")
+            if missed:
+                print(f"  [!] {len(missed)} host sehat tidak dicek / dianggap mati")
+                ok = False
+            clock[0] += interval
+    finally:
+        health_store.time = time
+
+    lag = [detected.get(h, runs) - world.middle for h in world.recovers]
+    print(f"  total: {total_plain:.2f} s tanpa store, {total_store:.2f} s dengan store "
+          f"(x{total_plain / max(total_store, 1e-9):.1f}); host pulih terdeteksi "
+          f"{len(detected)}/{len(world.recovers)}, paling lambat {max(lag)} run kemudian")
+    # Host pulih harus terdeteksi paling lambat satu jadwal backoff maksimum
+    limit = -(-health_store.MAX_BACKOFF // interval)
+    if runs - world.middle > limit and max(lag) > limit:
+        ok = False
+    return ok
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 400
+    runs = int(option("--runs", 12))
+    interval = float(option("--interval", 6)) * 3600
+    delay = float(option("--delay", 0.02))
+
+    inject_sni.DNS_ENGINE = "thread"
+    inject_sni.ADAPTIVE_CONCURRENCY = False
+    inject_sni._dns_cache = None
+    print(f"{n} host, {runs} run tiap {interval / 3600:g} jam, timeout palsu {delay * 1000:.0f} ms, "
+          f"backoff {health_store.FAIL_THRESHOLD}x gagal -> {health_store.BASE_BACKOFF / 3600:g} jam "
+          f"(maks {health_store.MAX_BACKOFF / 3600:g} jam)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "health.sqlite")
+        ok = simulate("liveness", liveness_run, [f"node{i}.workers.dev" for i in range(n)],
+                      runs, interval, delay, path)
+        ok = simulate("dns", dns_run, [f"support.zoom.us.node{i}.pages.dev" for i in range(n)],
+                      runs, interval, delay, path) and ok
+        print("Jadwal cek berikutnya host yang sedang di-backoff (5 teratas, scope dns):")
+        for row in [r for r in health_store.schedule(path, "dns") if r["failures"]][:5]:
+            print(f"  {row['host']}: gagal {row['failures']}x, cek lagi "
+                  f"+{(row['next_probe'] - row['last_check']) / 3600:g} jam")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark ekstraksi input#subscription: BeautifulSoup penuh vs parser streaming.
+
+Memakai fixture HTML di bench/fixtures (lihat make_html_fixtures.py).
+Response disimulasikan dari file, jadi tidak butuh internet:
+
+    python bench/bench_html.py [ulangan]
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_extract
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FileResponse:
+    """Tiruan minimal requests.Response (stream=True) dari bytes."""
+
+    encoding = "utf-8"
+
+    def __init__(self, data):
+        self.data = data
+        self.read = 0
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            chunk = self.data[i:i + chunk_size]
+            self.read += len(chunk)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+def measure(fn, repeat):
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return result, (time.perf_counter() - start) / repeat, peak
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "v2nodes_*.html"))):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        bs4_attrs, bs4_time, bs4_peak = measure(
+            lambda: html_extract.find_input_bs4(data.decode("utf-8")), repeat
+        )
+        responses = []
+
+        def streaming():
+            r = FileResponse(data)
+            responses.append(r)
+            return html_extract.extract_input(r)
+
+        stream_attrs, stream_time, stream_peak = measure(streaming, repeat)
+        assert bs4_attrs["value"] == stream_attrs["value"], "hasil berbeda!"
+
+        print(f"{os.path.basename(path)} ({len(data) // 1024} KiB)")
+        print(f"  bs4       : {bs4_time * 1000:8.2f} ms  peak {bs4_peak // 1024:6d} KiB  dibaca {len(data) // 1024} KiB")
+        print(f"  streaming : {stream_time * 1000:8.2f} ms  peak {stream_peak // 1024:6d} KiB  dibaca {responses[0].read // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Cache HTTP kondisional (http_cache.py): 304, hash body, fetch vs fetch_lines & cap build.
+
+Server http.server lokal menyajikan korpus sintetis (baris CRLF & karakter
+multibyte ikut diuji) dalam dua mode: dengan ETag (If-None-Match -> 304)
+dan tanpa ETag (selalu 200, perubahan dideteksi dari hash body).
+Diperiksa:
+
+  - 304 -> unchanged, body 200 identik -> unchanged, body berubah -> tidak;
+  - fetch_lines menghasilkan baris & hash cache yang sama dengan fetch,
+    dan body 200 identik tercatat unchanged setelah iterator habis; saat
+    304 body cache dibaca per potongan (puncak memori < separuh body);
+  - cap build: salt beda, output diubah di luar, atau build tidak utuh
+    -> output lama tidak dipakai;
+  - inject_sni.run() (biasa & streaming, DNS ke StubDNSServer): run kedua
+    dengan sumber 304 dilewati, ganti konfigurasi / output diubah -> build ulang;
+    sumber berubah lalu run terpotong budget (StubDNSServer lambat) menulis
+    output parsial, run berikutnya dengan sumber 304 tetap membangun ulang
+    output utuh (sama dengan run revalidate);
+  - koneksi sumber putus di tengah run streaming: run tidak crash, output
+    lama tetap, file sementara dibuang & output dicap tidak utuh.
+
+    python bench/bench_http_cache.py [jumlah_link] [--repeat 5]
+"""
+import contextlib
+import http.server
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import budget
+import http_cache
+import inject_sni
+import parallel_fetch
+from corpus import generate
+from stubs import StubDNSServer
+
+WILDCARD_SUFFIXES = ["workers.dev", "pages.dev", "cloudflare.net"]
+CUT_BUDGET = 0.3   # Detik, jauh di bawah waktu cek penuh dengan stub lambat
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+class Source(http.server.BaseHTTPRequestHandler):
+    """Body & mode (dengan/tanpa ETag) diatur lewat atribut kelas."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b""
+    use_etag = True
+    cut_at = None   # Jika diisi: koneksi ditutup setelah sekian byte body (download putus)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        etag = f'"{hash(self.body) & 0xffffffff:08x}"'
+        if self.use_etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        if self.use_etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        if self.cut_at is not None:
+            self.wfile.write(self.body[:self.cut_at])
+            self.close_connection = True
+            return
+        self.wfile.write(self.body)
+
+
+def serve():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Source)
+    server.daemon_threads = True
+    # Klien streaming yang berhenti membaca (budget habis) memutus koneksi di tengah body
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/list.txt"
+
+
+def make_body(lines, crlf=False):
+    # Karakter multibyte di tiap baris ke-7 supaya ada yang jatuh di batas potongan
+    lines = [line + "#é中" if i % 7 == 0 else line for i, line in enumerate(lines)]
+    return ("\r\n" if crlf else "\n").join(lines).encode("utf-8") + (b"" if crlf else b"\n")
+
+
+def meta(url):
+    with open(http_cache._paths(url, http_cache.CACHE_DIR)[0], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_fetch(url, session, body, expect):
+    def fetch(label, want):
+        http_cache.reset()
+        text, unchanged = http_cache.fetch(url, session=session)
+        expect(unchanged is want and http_cache.all_unchanged([url]) is want, f"fetch {label}")
+        return text
+
+    Source.body, Source.use_etag = body, True
+    fetch("pertama", False)
+    text = fetch("304", True)
+    expect(text == body.decode("utf-8"), "body 304 dari cache")
+    Source.use_etag = False
+    fetch("200 identik", True)
+    Source.body = body + b"vless://baru@x.workers.dev:443?type=ws#baru\n"
+    fetch("body berubah", False)
+    Source.body = body
+
+
+def check_lines(url, session, body, expect):
+    for crlf in (False, True):
+        data = make_body(body.decode("utf-8").splitlines(), crlf)
+        Source.body, Source.use_etag = data, False
+        http_cache.reset()
+        text, _ = http_cache.fetch(url, session=session)
+        digest = meta(url)["sha256"]
+        label = "CRLF" if crlf else "LF"
+
+        http_cache.reset()
+        unchanged, lines = http_cache.fetch_lines(url, session=session)
+        expect(not unchanged and not http_cache.all_unchanged([url]), f"fetch_lines {label} belum habis dibaca")
+        expect(list(lines) == text.splitlines(), f"fetch_lines {label} baris sama dengan fetch")
+        expect(meta(url)["sha256"] == digest, f"fetch_lines {label} hash sama dengan fetch")
+        expect(http_cache.all_unchanged([url]), f"fetch_lines {label} 200 identik -> unchanged")
+
+        Source.use_etag = True
+        http_cache.reset()
+        http_cache.fetch(url, session=session)   # Simpan ETag
+        http_cache.reset()
+        unchanged, lines = http_cache.fetch_lines(url, session=session)
+        expect(unchanged and list(lines) == text.splitlines(), f"fetch_lines {label} 304")
+
+        # 304 membaca body cache per potongan: puncak memori jauh di bawah ukuran body
+        http_cache.reset()
+        tracemalloc.start()
+        try:
+            _, lines = http_cache.fetch_lines(url, session=session)
+            count = sum(1 for _ in lines)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        expect(count == len(text.splitlines()) and peak < len(data) // 2, f"fetch_lines {label} 304 tanpa memuat body")
+
+
+def check_stamp(tmp, expect):
+    output = os.path.join(tmp, "out.txt")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("a\n")
+    http_cache.stamp(output, "salt-a")
+    expect(http_cache.stamped(output, "salt-a"), "cap utuh")
+    expect(not http_cache.stamped(output, "salt-b"), "cap salt beda")
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("b\n")
+    expect(not http_cache.stamped(output, "salt-a"), "cap output diubah di luar")
+    http_cache.stamp(output, "salt-a", complete=False)
+    expect(not http_cache.stamped(output, "salt-a"), "cap build tidak utuh")
+    expect(not http_cache.stamped(os.path.join(tmp, "tidak-ada.txt"), "salt-a"), "cap tanpa output")
+
+
+def read_output():
+    with open(inject_sni.OUTPUT_FILE, encoding="utf-8") as f:
+        return f.read()
+
+
+def check_run(url, session, body, streaming, fast, slow, expect):
+    """inject_sni.run() berturut-turut; tiap langkah (label, persiapan, build ulang diharapkan)."""
+    calls = [0]
+    partial = []
+    inflight = inject_sni.DNS_MAX_INFLIGHT
+    target = "stream_links" if streaming else "check_all"
+    original = getattr(inject_sni, target)
+
+    def counted(*args, **kwargs):
+        calls[0] += 1
+        return original(*args, **kwargs)
+
+    def append_output():
+        with open(inject_sni.OUTPUT_FILE, "a", encoding="utf-8") as f:
+            f.write("# diubah\n")
+
+    def toggle(name):
+        return lambda: setattr(inject_sni, name, not getattr(inject_sni, name))
+
+    def cut():
+        Source.body = body + b"vless://baru@baru.workers.dev:443?type=ws#baru\n"
+        inject_sni.DNS_SERVERS = [slow]
+        inject_sni.DNS_MAX_INFLIGHT = 20
+        budget.start(CUT_BUDGET)
+
+    def uncut():
+        partial.extend(read_output().splitlines())
+        inject_sni.DNS_SERVERS = [fast]
+        inject_sni.DNS_MAX_INFLIGHT = inflight
+
+    steps = [
+        ("pertama", None, True),
+        ("sumber 304", None, False),
+        ("SPLICE_REWRITE diganti", toggle("SPLICE_REWRITE"), True),
+        ("sumber 304 lagi", None, False),
+        ("output diubah di luar", append_output, True),
+        ("DEDUP_LINKS diganti", toggle("DEDUP_LINKS"), True),
+        ("sumber berubah, budget terpotong", cut, True),
+        ("sumber 304 setelah terpotong", uncut, True),
+        ("sumber 304 setelah build utuh", None, False),
+    ]
+    setattr(inject_sni, target, counted)
+    inject_sni.STREAMING_MODE = streaming
+    Source.use_etag = True
+    label = "streaming" if streaming else "biasa"
+    try:
+        for step, prepare, rebuild in steps:
+            budget.reset()
+            calls[0] = 0
+            http_cache.reset()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if prepare:
+                    prepare()
+                inject_sni.run(session)
+            expect(bool(calls[0]) is rebuild, f"run {label}: {step} -> {'build' if rebuild else 'lewati'}")
+        rebuilt = read_output()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inject_sni.run(session, revalidate=True)
+        full = read_output()
+        print(f"  run {label}: terpotong {len(partial)}/{len(full.splitlines())} akun, "
+              f"run berikutnya (sumber 304) {len(rebuilt.splitlines())}")
+        expect(len(partial) < len(full.splitlines()), f"run {label}: output terpotong lebih pendek")
+        expect(rebuilt == full, f"run {label}: run setelah terpotong = output utuh")
+    finally:
+        budget.reset()
+        Source.body = body
+        inject_sni.DNS_SERVERS = [fast]
+        inject_sni.DNS_MAX_INFLIGHT = inflight
+        setattr(inject_sni, target, original)
+        inject_sni.SPLICE_REWRITE = True
+        inject_sni.DEDUP_LINKS = True
+
+
+def check_broken(session, body, expect):
+    """Run streaming dengan download yang putus di tengah body."""
+    inject_sni.STREAMING_MODE = True
+    Source.body, Source.use_etag = body, True
+    budget.reset()
+    http_cache.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        inject_sni.run(session, revalidate=True)
+    before = read_output()
+    tmp = os.path.dirname(inject_sni.OUTPUT_FILE)
+    Source.use_etag, Source.cut_at = False, len(body) // 2
+    try:
+        http_cache.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inject_sni.run(session)
+        crashed = False
+    except Exception:
+        crashed = True
+    finally:
+        Source.use_etag, Source.cut_at = True, None
+    expect(not crashed, "download putus: run tidak crash")
+    expect(read_output() == before, "download putus: output lama tetap")
+    expect(not os.path.exists(inject_sni.OUTPUT_FILE + ".tmp"), "download putus: file .tmp dibuang")
+    expect(not [f for f in os.listdir(tmp) if f.startswith(".idx-")], "download putus: index sementara dibuang")
+    expect(not http_cache.stamped(inject_sni.OUTPUT_FILE, inject_sni.build_salt()), "download putus: cap tidak utuh")
+    inject_sni.STREAMING_MODE = False
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 20000
+    repeat = int(option("--repeat", 5))
+
+    body = make_body([l for l in generate(n, 11) if l.strip()])
+    problems = []
+
+    def expect(ok, what):
+        if not ok:
+            problems.append(what)
+
+    print(f"{n} link, body {len(body) // 1024} KiB")
+    server, url = serve()
+    stub = StubDNSServer(wildcard_suffixes=WILDCARD_SUFFIXES).start_in_thread()
+    slow = StubDNSServer(wildcard_suffixes=WILDCARD_SUFFIXES, delay=0.05).start_in_thread()
+    session = parallel_fetch.make_session()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # CACHE_DIR relatif, jadi cache & cap ikut ke direktori sementara
+        os.chdir(tmp)
+        try:
+            check_fetch(url, session, body, expect)
+            check_lines(url, session, body, expect)
+            check_stamp(tmp, expect)
+
+            inject_sni.URL_SUMBER = url
+            inject_sni.OUTPUT_FILE = os.path.join(tmp, "akun.txt")
+            inject_sni.DNS_SERVERS = [stub.address]
+            inject_sni.ADAPTIVE_CONCURRENCY = False
+            inject_sni.INCREMENTAL_MODE = False
+            inject_sni.WRITE_NODE_INDEX = False
+            inject_sni._dns_cache = inject_sni._health = inject_sni._link_state = None
+            Source.body = body
+            budget.FLUSH_RESERVE = 0
+            for streaming in (False, True):
+                check_run(url, session, body, streaming, stub.address, slow.address, expect)
+            check_broken(session, body, expect)
+
+            def cold():
+                os.remove(http_cache._paths(url, http_cache.CACHE_DIR)[0])
+                http_cache.fetch(url, session=session)
+
+            Source.use_etag = True
+            t_full = timed(cold, repeat)
+            t_304 = timed(lambda: http_cache.fetch(url, session=session), repeat)
+        finally:
+            os.chdir(cwd)
+            stub.stop_thread()
+            slow.stop_thread()
+            server.shutdown()
+
+    print(f"  fetch 200 : {t_full * 1000:7.1f} ms")
+    print(f"  fetch 304 : {t_304 * 1000:7.1f} ms  (x{t_full / t_304:.1f})")
+    print(f"Cek: {'semua OK' if not problems else ', '.join(problems)}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
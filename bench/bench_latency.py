@@ -0,0 +1,107 @@
+"""Uji & benchmark ranking latency dengan listener TLS lokal.
+
+Menjalankan beberapa DelayedTLSServer (bench/stubs.py) dengan delay handshake
+berbeda, membuat proxy (format prx.py) yang menunjuk ke listener itu,
+lalu memastikan latency.rank() mengurutkan dari yang tercepat, membuang
+yang di atas ambang dan menerapkan top-N per negara. Sertifikat
+self-signed untuk listener dibuat di direktori sementara saat bench mulai
+(openssl, atau paket cryptography jika openssl tidak ada):
+
+    python bench/bench_latency.py [jumlah_listener] [--samples N]
+"""
+import datetime
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import latency
+from stubs import DelayedTLSServer
+
+def make_cert(directory):
+    """Sertifikat & kunci self-signed CN=localhost (berlaku 1 hari) -> (path cert, path key)."""
+    cert, key = os.path.join(directory, "tls_test.crt"), os.path.join(directory, "tls_test.key")
+    if shutil.which("openssl"):
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+                       check=True, capture_output=True)
+        return cert, key
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+                   .public_key(private.public_key()).serial_number(x509.random_serial_number())
+                   .not_valid_before(now - datetime.timedelta(minutes=5))
+                   .not_valid_after(now + datetime.timedelta(days=1))
+                   .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+                   .sign(private, hashes.SHA256()))
+    with open(cert, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key, "wb") as f:
+        f.write(private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                      serialization.NoEncryption()))
+    return cert, key
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 20
+    samples = int(sys.argv[sys.argv.index("--samples") + 1]) if "--samples" in sys.argv else latency.SAMPLES
+
+    # Delay berjarak 100 ms (jauh di atas jitter handshake paralel) dengan urutan acak
+    step = 0.1
+    delays = [i * step for i in range(n)]
+    random.Random(1).shuffle(delays)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Sertifikat dimuat saat listener dibuat, direktorinya boleh langsung dihapus
+        cert, key = make_cert(tmp)
+        servers = [DelayedTLSServer(cert, key, delay=d).start_in_thread() for d in delays]
+        dead = DelayedTLSServer(cert, key).start_in_thread()
+    proxies = [
+        {"name": f"node-{'SG' if round(s.delay / step) % 2 else 'MY'}-{i}", "type": "vless",
+         "server": "127.0.0.1", "port": s.port, "tls": True, "sni": "localhost"}
+        for i, s in enumerate(servers)
+    ]
+    # Satu node mati (port tertutup) harus ikut terbuang
+    dead.stop_thread()
+    proxies.append({"name": "node-SG-dead", "type": "vless", "server": "127.0.0.1", "port": dead.port, "tls": True})
+
+    threshold = 850  # Di tengah antara delay 800 ms dan 900 ms
+    prober = latency.LatencyProber(samples=samples, timeout=5)
+    try:
+        start = time.perf_counter()
+        ranked = latency.rank(proxies, latency.proxy_target, lambda p: p["name"],
+                              max_ms=threshold, top_n=0, prober=prober)
+        elapsed = time.perf_counter() - start
+        top = latency.rank(proxies, latency.proxy_target, lambda p: p["name"],
+                           max_ms=threshold, top_n=2, prober=latency.LatencyProber(samples=1, timeout=5))
+    finally:
+        for s in servers:
+            s.stop_thread()
+
+    expected = [p for d, p in sorted(zip(delays, proxies), key=lambda x: x[0]) if d * 1000 <= threshold]
+    print(f"{n} listener, {samples} sampel/node, delay total {sum(delays) * samples:.1f} s "
+          f"-> rank selesai dalam {elapsed:.2f} s")
+    for p in ranked[:5]:
+        print(f"  {p['name']:12s} delay {delays[proxies.index(p)] * 1000:6.1f} ms")
+    print("Urutan sesuai delay:", [p["port"] for p in ranked] == [p["port"] for p in expected])
+    print("Top-2 per negara:", [(p["name"], round(delays[proxies.index(p)] * 1000)) for p in top])
+    ok = [p["port"] for p in ranked] == [p["port"] for p in expected] and len(top) == 4
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
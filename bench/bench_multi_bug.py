@@ -0,0 +1,82 @@
+"""Beberapa bug domain dalam satu pass (probe wildcard per host) vs run per domain.
+
+Korpus sintetis dicek terhadap StubDNSServer lokal yang punya wildcard
+untuk sebagian suffix CDN: sekali per bug domain dengan jalur lama
+(check_links), lalu sekali untuk semua domain lewat check_links_multi.
+Hasil tiap domain harus identik; jumlah query ke stub dibandingkan.
+Dengan --drop, sebagian query hilang sehingga sebagian probe timeout dan
+jatuh ke lookup per kombinasi:
+
+    python bench/bench_multi_bug.py [jumlah_link] [--domains 4] [--drop 0.05]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import inject_sni
+from corpus import generate
+from stubs import StubDNSServer
+
+BUG_DOMAINS = ["support.zoom.us", "m.youtube.com", "api.whatsapp.com", "cdn.line-apps.com",
+               "graph.instagram.com", "web.facebook.com"]
+WILDCARD_SUFFIXES = ["workers.dev", "pages.dev", "cloudflare.net"]
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def counted(stub, fn):
+    before = stub.queries
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        result = fn()
+    return result, stub.queries - before, time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 20000
+    domains = BUG_DOMAINS[:int(option("--domains", 4))]
+    drop = float(option("--drop", 0))
+
+    stub = StubDNSServer(wildcard_suffixes=WILDCARD_SUFFIXES, drop_rate=drop).start_in_thread()
+    inject_sni.DNS_SERVERS = [stub.address]
+    inject_sni.DNS_TIMEOUT = 0.3
+    inject_sni._dns_cache = None
+    inject_sni._link_state = None
+    lines = list(inject_sni.dedup_links(generate(n, 2)))
+    print(f"{len(lines)} link, {len(domains)} bug domain, drop {drop:.0%}")
+
+    try:
+        expected = {}
+        queries = elapsed = 0
+        for bug in domains:
+            inject_sni.BUG_DOMAIN, inject_sni.EXTRA_BUG_DOMAINS = bug, []
+            expected[bug], q, t, _ = counted(stub, lambda: inject_sni.check_links(lines))
+            queries += q
+            elapsed += t
+        print(f"  per domain : {elapsed:6.2f} s  {queries:7d} query DNS")
+
+        inject_sni.BUG_DOMAIN, inject_sni.EXTRA_BUG_DOMAINS = domains[0], domains[1:]
+        got, q, t, log = counted(stub, lambda: inject_sni.check_all(lines))
+        print(f"  satu pass  : {t:6.2f} s  {q:7d} query DNS  x{queries / max(q, 1):.1f} lebih sedikit")
+        print("   ", next(l for l in log.splitlines() if l.startswith("Probe wildcard")))
+    finally:
+        stub.stop_thread()
+
+    same = [bug for bug in domains if got[bug] == expected[bug]]
+    print(f"  identik    : {len(same)}/{len(domains)} domain")
+    if drop == 0 and len(same) != len(domains):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Filter node lewat index (node_index.NodeIndex, mmap) vs muat YAML penuh.
+
+Proxy hasil prx.iter_proxies dari korpus sintetis ditulis ke YAML
+(prx.save_yaml, sekaligus menulis index), lalu filter negara + port
+dijalankan dengan yaml.safe_load dan dengan NodeIndex.select(); hasil
+keduanya harus sama. Index link mode streaming (SpoolBuilder, baris
+langsung ke file sementara per negara) juga harus sama byte per byte
+dengan Builder biasa, dengan puncak memori (tracemalloc) dibandingkan.
+Terakhir inject_sni.main() dijalankan dua kali (biasa & streaming, DNS ke
+StubDNSServer, mode incremental aktif): index run kedua, yang link-nya
+dibawa dari state tanpa resolve ulang, harus sama byte per byte dengan
+run pertama dan tidak kehilangan IP:
+
+    python bench/bench_node_index.py [jumlah_link] [--country SG] [--port 443]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import inject_sni
+import latency
+import node_index
+import prx
+from corpus import generate
+from stubs import StubDNSServer
+
+WILDCARD_SUFFIXES = ["workers.dev", "pages.dev", "cloudflare.net"]
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def spool_matches(tmp, lines):
+    """(sama byte per byte, puncak memori Builder, puncak memori SpoolBuilder)."""
+    servers = [(node_index.link_entry(line)["server"] or "").lower() for line in lines]
+    ips = {s: f"10.0.{i // 256 % 256}.{i % 256}" for i, s in enumerate(servers) if s and i % 3}
+    plain, spooled = os.path.join(tmp, "plain.idx.jsonl"), os.path.join(tmp, "spool.idx.jsonl")
+
+    def build_plain():
+        index = node_index.Builder("inject_sni", checked_at=1)
+        for line in lines:
+            index.add_link(line)
+        index.write(plain, ips)
+
+    def build_spool():
+        index = node_index.SpoolBuilder("inject_sni", spooled, checked_at=1)
+        for line, server in zip(lines, servers):
+            index.add_link(line, ips.get(server))
+        index.write()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        peak_plain, peak_spool = peak(build_plain), peak(build_spool)
+    with open(plain, "rb") as a, open(spooled, "rb") as b:
+        same = a.read() == b.read()
+    leftovers = [f for f in os.listdir(tmp) if f.startswith(".idx-")]
+    return same and not leftovers, peak_plain, peak_spool
+
+
+class Source:
+    """Session palsu untuk inject_sni.main(): sumber link dari memori, tanpa HTTP."""
+
+    def __init__(self, lines):
+        self.text = "\n".join(lines)
+
+    def get(self, url, **kwargs):
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        return (line.encode("utf-8") for line in self.text.split("\n"))
+
+
+def null_ips(path):
+    with node_index.NodeIndex(path) as index:
+        return sum(1 for row in index.select() if row["ip"] is None)
+
+
+def stable_over_runs(tmp, lines):
+    """Per mode: (index run 1 & 2 sama byte per byte & semua node dari state, jumlah node, IP kosong run 2)."""
+    stub = StubDNSServer(wildcard_suffixes=WILDCARD_SUFFIXES).start_in_thread()
+    saved = {name: getattr(inject_sni, name) for name in (
+        "OUTPUT_FILE", "STATE_FILE", "DNS_SERVERS", "STREAMING_MODE", "INCREMENTAL_MODE",
+        "USE_HTTP_CACHE", "USE_DNS_CACHE", "USE_HEALTH_STORE", "ADAPTIVE_CONCURRENCY", "WRITE_NODE_INDEX")}
+    results = {}
+    try:
+        inject_sni.DNS_SERVERS = [stub.address]
+        inject_sni.INCREMENTAL_MODE = inject_sni.WRITE_NODE_INDEX = True
+        inject_sni.USE_HTTP_CACHE = inject_sni.USE_DNS_CACHE = inject_sni.USE_HEALTH_STORE = False
+        inject_sni.ADAPTIVE_CONCURRENCY = False
+        for streaming in (False, True):
+            label = "streaming" if streaming else "biasa"
+            inject_sni.STREAMING_MODE = streaming
+            inject_sni.OUTPUT_FILE = os.path.join(tmp, f"akun-{label}.txt")
+            inject_sni.STATE_FILE = os.path.join(tmp, f"state-{label}.json")
+            idx = node_index.path_for(inject_sni.OUTPUT_FILE)
+            runs = []
+            for _ in range(2):
+                inject_sni.reset_state()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    inject_sni.main(Source(lines))
+                with open(idx, "rb") as f:
+                    runs.append(f.read())
+            count = json.loads(runs[1].split(b"\n", 1)[0])["count"]
+            with open(inject_sni.STATE_FILE, encoding="utf-8") as f:
+                reused = len(json.load(f)["links"])
+            results[label] = (runs[0] == runs[1] and reused == count, count, null_ips(idx))
+    finally:
+        stub.stop_thread()
+        for name, value in saved.items():
+            setattr(inject_sni, name, value)
+    return results
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 100_000
+    country = option("--country", "SG")
+    port = int(option("--port", 443))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "dialer-proxy.yaml")
+        with contextlib.redirect_stdout(io.StringIO()):
+            prx.save_yaml(prx.iter_proxies(generate(n, 5)), out)
+        idx = node_index.path_for(out)
+        print(f"{n} link -> YAML {os.path.getsize(out) / 1e6:.1f} MB, index {os.path.getsize(idx) / 1e6:.1f} MB")
+
+        def from_yaml():
+            with open(out, encoding="utf-8") as f:
+                proxies = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))["proxies"]
+            return [p["name"] for p in proxies
+                    if latency.country_of(p["name"]) == country and p["port"] == port]
+
+        def from_index():
+            with node_index.NodeIndex(idx) as index:
+                rows = sorted(index.select(country=country, port=port), key=lambda r: r["pos"])
+                return [r["name"] for r in rows]
+
+        t_yaml, expected = timed(from_yaml, 1)
+        t_index, got = timed(from_index)
+        print(f"  YAML penuh : {t_yaml * 1000:9.1f} ms  {len(expected)} node {country}:{port}")
+        print(f"  index mmap : {t_index * 1000:9.1f} ms  {len(got)} node  x{t_yaml / t_index:.0f}")
+        print("  hasil sama:", got == expected)
+
+        same, peak_plain, peak_spool = spool_matches(tmp, [l.strip() for l in generate(n, 5) if "://" in l])
+        print(f"  index link streaming: sama dengan Builder: {same}, puncak memori "
+              f"{peak_plain / 1e6:.1f} MB -> {peak_spool / 1e6:.1f} MB")
+
+        stable = stable_over_runs(tmp, [l.strip() for l in generate(min(n, 2000), 7) if "://" in l])
+        for label, (identical, count, nulls) in stable.items():
+            print(f"  inject_sni {label}: 2 run incremental, index run kedua sama: {identical}, "
+                  f"{count} node, IP kosong {nulls}")
+        stable_ok = all(identical and count and not nulls for identical, count, nulls in stable.values())
+        if got != expected or not same or not stable_ok:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Microbenchmark parser & rewriter di atas korpus sintetis (bench/corpus.py).
+
+Mengukur throughput per link (dan peak memori dengan --mem) untuk
+inject_sni (process_single_link, check_links), parser prx.py/acc.py dan
+build_proxies keduanya. DNS dan cek hidup di-stub dengan hasil
+deterministik (hash domain), jadi yang terukur murni kerja CPU dan
+hasilnya bisa dibandingkan antar commit:
+
+    python bench/bench_parsers.py [jumlah ...] [--seed N] [--mem]
+
+Contoh: python bench/bench_parsers.py 1000 100000 1000000 --mem
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import acc
+import inject_sni
+import prx
+from corpus import generate
+
+
+# =============================
+#  STUB JARINGAN
+# =============================
+def fake_active(domain):
+    """~75% domain dianggap aktif, selalu sama untuk domain yang sama."""
+    return zlib.crc32(domain.lower().encode("utf-8")) % 4 != 0
+
+
+class StubProber:
+    def check(self, host):
+        return fake_active(host)
+
+    def check_many(self, hosts, deadline=None):
+        return {h: fake_active(h) for h in hosts}
+
+
+def install_stubs():
+    inject_sni.is_wildcard_active = fake_active
+    inject_sni.resolve_domains = lambda domains, deadline=None, revalidate=False: {d: fake_active(d) for d in domains}
+    inject_sni._dns_cache = None
+    inject_sni._link_state = None
+    acc._prober = StubProber()
+
+
+# =============================
+#  TARGET BENCHMARK
+# =============================
+def each(fn, with_stats=False):
+    """Panggil fn per link; exception ditelan seperti di iter_proxies/build_proxies."""
+    def run(links):
+        stats = acc.Counter()
+        for link in links:
+            try:
+                fn(link, stats) if with_stats else fn(link)
+            except Exception:
+                pass
+    return run
+
+
+def targets():
+    """(label, prefix skema atau None = semua link, fungsi(links))"""
+    return [
+        ("inject_sni.process_single_link", None, each(inject_sni.process_single_link)),
+        ("inject_sni.check_links", None, inject_sni.check_links),
+        ("prx.parse_vmess", "vmess://", each(prx.parse_vmess)),
+        ("prx.parse_vless", "vless://", each(prx.parse_vless)),
+        ("prx.parse_trojan", "trojan://", each(prx.parse_trojan)),
+        ("prx.parse_ss", "ss://", each(prx.parse_ss)),
+        ("prx.build_proxies", None, prx.build_proxies),
+        ("acc.parse_vmess", "vmess://", each(acc.parse_vmess, True)),
+        ("acc.parse_vless", "vless://", each(acc.parse_vless, True)),
+        ("acc.parse_trojan", "trojan://", each(acc.parse_trojan, True)),
+        ("acc.build_proxies", None, acc.build_proxies),
+    ]
+
+
+def measure(fn, links, mem):
+    # Output per-link (print "Parsing gagal" dsb) dibuang supaya tidak ikut terukur
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        fn(links)
+        elapsed = time.perf_counter() - start
+        peak = 0
+        if mem:
+            tracemalloc.start()
+            fn(links)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    seed = 0
+    if "--seed" in sys.argv:
+        seed = int(sys.argv[sys.argv.index("--seed") + 1])
+        args.remove(str(seed))
+    sizes = [int(a) for a in args] or [10_000]
+    mem = "--mem" in sys.argv
+
+    install_stubs()
+    for n in sizes:
+        links = generate(n, seed)
+        print(f"\n== {n} link (seed {seed}) ==")
+        print(f"{'target':32s} {'link':>8s} {'total':>9s} {'us/link':>9s} {'link/s':>10s}"
+              + (f" {'peak MiB':>9s}" if mem else ""))
+        for label, prefix, fn in targets():
+            subset = links if prefix is None else [l for l in links if l.startswith(prefix)]
+            if not subset:
+                continue
+            elapsed, peak = measure(fn, subset, mem)
+            line = (f"{label:32s} {len(subset):8d} {elapsed:8.3f}s "
+                    f"{elapsed / len(subset) * 1e6:9.1f} {len(subset) / elapsed:10.0f}")
+            if mem:
+                line += f" {peak / 1024 / 1024:9.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
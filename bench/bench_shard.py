@@ -0,0 +1,98 @@
+"""Pastikan run ber-shard + merge menghasilkan output identik dengan run biasa.
+
+Korpus sintetis (ditambah duplikat) diproses inject_sni, prx dan acc
+dengan DNS & cek hidup di-stub (lihat bench_parsers.py): sekali tanpa
+shard, lalu per shard 0..N-1 disusul merge, dan ketiga file output
+dibandingkan byte per byte:
+
+    python bench/bench_shard.py [jumlah_link] [--shards 1,2,3,8]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import acc
+import inject_sni
+import prx
+import sharding
+from bench_parsers import install_stubs
+from corpus import generate
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def with_duplicates(links, seed=0):
+    rnd = random.Random(seed)
+    out = list(links)
+    for link in links[::7]:
+        out.insert(rnd.randrange(len(out) + 1), link)
+    return out
+
+
+def single(lines, out):
+    inject_sni.OUTPUT_FILE = out["inject_sni"]
+    inject_sni.save_results([r for r in inject_sni.check_links(list(inject_sni.dedup_links(lines))) if r])
+    prx.save_yaml(prx.iter_proxies(lines), out["prx"])
+    acc.save_yaml(acc.build_proxies(lines), out["acc"])
+
+
+def sharded(lines, count, out):
+    deduped = list(inject_sni.dedup_links(lines))
+    for i in range(count):
+        shard = sharding.Shard(i, count)
+        inject_sni.run_shard(deduped, shard)
+        prx.run_shard(lines, shard)
+        acc.run_shard(lines, shard)
+    inject_sni.OUTPUT_FILE = out["inject_sni"]
+    inject_sni.merge_shards(count)
+    prx.merge_shards(count, out["prx"])
+    acc.merge_shards(count, out["acc"])
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 20000
+    counts = [int(c) for c in option("--shards", "1,2,3,8").split(",")]
+
+    install_stubs()
+    lines = with_duplicates(generate(n, 3))
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        sharding.SHARD_DIR = os.path.join(tmp, "shards")
+        expected = {name: os.path.join(tmp, f"{name}.single") for name in ("inject_sni", "prx", "acc")}
+        with contextlib.redirect_stdout(io.StringIO()):
+            single(lines, expected)
+        sizes = ", ".join(f"{name} {len(read(path))} B" for name, path in expected.items())
+        print(f"{len(lines)} link (termasuk duplikat) -> {sizes}")
+
+        for count in counts:
+            out = {name: os.path.join(tmp, f"{name}.{count}") for name in expected}
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                sharded(lines, count, out)
+            elapsed = time.perf_counter() - start
+            same = [name for name in expected if read(out[name]) == read(expected[name])]
+            ok = ok and len(same) == len(expected)
+            print(f"  {count:2d} shard: {elapsed:6.2f} s  identik: {', '.join(same) or '-'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Rewrite splice (link_splice.py) vs jalur lama urlparse/urlencode/urlunparse.
+
+Korpus sintetis (vless, trojan, ss, hy2, tuic) ditambah link kasus tepi
+diplan & di-rewrite dua kali: SPLICE_REWRITE=False lalu True, dengan
+FILTER_WS_ONLY True dan False. Diperiksa:
+
+  - keputusan plan (tolak/terima & host target) identik;
+  - hasil rewrite sama secara makna: host, port, userinfo (ss: kredensial
+    ter-decode), path, parse_qs(query) & fragment. Jalur lama meng-encode
+    ulang userinfo ss SIP002 yang sudah base64 (base64 ganda), dihitung
+    terpisah;
+  - pada hasil splice, userinfo, port, path & parameter selain sni/host/
+    plugin sama byte per byte dengan link sumber.
+
+    python bench/bench_splice.py [jumlah_link] [--repeat 3]
+"""
+import base64
+import binascii
+import contextlib
+import io
+import os
+import sys
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import inject_sni
+import link_splice
+from corpus import generate
+
+KINDS = ["vless", "trojan", "ss", "hy2", "tuic"]
+BUG = "support.zoom.us"
+REPLACED = {"sni", "host", "plugin"}
+
+EDGE_CASES = [
+    "vless://id@Node.Workers.DEV:443?type=ws&path=%2Fws#Upper",
+    "vless://id@a.workers.dev:443?type=ws&path=%2Fws",
+    "vless://id@a.workers.dev?type=ws&sni=&host=&path=/x#blank",
+    "vless://id@a.workers.dev:443?type=ws&sni=b.pages.dev&sni=c.pages.dev&host=x&host=y#dup",
+    "vless://id@a.workers.dev:443?t%79pe=ws&s%6Ei=b.pages.dev&path=%2Fa+b%2Bc#enc",
+    "vless://id@a.workers.dev:443?flag&type=ws&&path=/p;q#noeq",
+    "vless://id@a.workers.dev:443/a;b/c?type=ws#path",
+    "vless://id@a.workers.dev:443?#empty-query",
+    "vless://id@a.workers.dev:443?type=ws#a#b?c",
+    "vless://id@a.workers.dev:443?type=ws&ed=2048&path=%2F%3Fed%3D2048#ed",
+    "vless://id@a.workers.dev:443?type=tcp#tcp",
+    "vless://id@a.workers.dev:443",
+    "vless://id@a.workers.dev:0?type=ws#port0",
+    "vless://id@a.workers.dev:70000?type=ws#portbig",
+    "vless://id@a.workers.dev:?type=ws#portempty",
+    "vless://id@a.workers.dev:44a?type=ws#portbad",
+    "vless://id@[2001:db8::1]:443?type=ws#ipv6",
+    "vless://id@nodé.workers.dev:443?type=ws#idn",
+    "vless://@a.workers.dev:443?type=ws#nouser",
+    "vless://id@a.workers.dev:443?type=ws&path=/a\tb#tab",
+    "trojan://p%40ss@a.workers.dev:443?type=ws&security=tls#at",
+    "trojan://pass@:443?type=ws#nohost",
+    "tuic://u:p@a.workers.dev:443?sni=b.pages.dev#tuic",
+    "tuic://u:@a.workers.dev:443?sni=b.pages.dev#nopass",
+    "hy2://pw@A.pages.dev:8443?insecure=1#hy2",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Da.workers.dev#enc",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443/?plugin=v2ray-plugin;mode=websocket;host=a.workers.dev;path=/#raw",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443/?plugin=obfs-local%3Bobfs%3Dws%3Bobfs-host%3DB.pages.dev#obfs",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443/?plugin=v2ray-plugin%3bmode%3dwebsocket%3bhost%3db.pages.dev#lower",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443/?plugin=v2ray-plugin%3Bmode%3Dwebsocket#nohost",
+    "ss://YWVzLTEyOC1nY206cGFzcw@A.Workers.dev:443/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Db.pages.dev&x=1#a#b",
+    "ss://YWVzLTEyOC1nY206cGFzcw==@a.workers.dev:443/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Dc.dev#pad",
+    "ss://aes-128-gcm:pass@a.workers.dev:443/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Dc.dev#plain",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443#noplugin",
+    "ss://YWVzLTEyOC1nY206cGFzcw@a.workers.dev:443",
+    "ss://YWVzLTEyOC1nY206cGFzc0BhLndvcmtlcnMuZGV2OjQ0Mw/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Dc.dev#legacy",
+    "ss://YWVzLTEyOC1nY206cGFzcw/?plugin=v2ray-plugin%3Bmode%3Dwebsocket%3Bhost%3Du%40x.dev#at-in-query",
+]
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def b64decode(text):
+    """Decode base64 (urlsafe, padding opsional), None jika bukan base64."""
+    try:
+        return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def ss_credentials(userinfo):
+    """(kredensial, base64 ganda?) dari userinfo ss; userinfo rusak dikembalikan apa adanya."""
+    userinfo = unquote(userinfo)
+    decoded = None if ":" in userinfo else b64decode(userinfo)
+    if decoded is None or ":" in decoded:
+        return decoded or userinfo, False
+    twice = b64decode(decoded)
+    return (twice, True) if twice is not None else (decoded, False)
+
+
+def meaning(link):
+    """Isi link yang harus sama di kedua jalur, plus flag base64 ganda (ss)."""
+    p = urlsplit(link)
+    userinfo = p.netloc.rpartition("@")[0] or None
+    double = False
+    if p.scheme == "ss" and userinfo:
+        userinfo, double = ss_credentials(userinfo)
+    return (p.scheme, p.hostname, p.port, userinfo, p.path, parse_qs(p.query), p.fragment), double
+
+
+def kept_bytes(source, spliced):
+    """Bagian yang tidak diganti di hasil splice sama byte per byte dengan sumber."""
+    a, b = link_splice.split_url(source), link_splice.split_url(spliced)
+    if b is None:
+        return False
+
+    def untouched(spans):
+        before_query = spans.query_end if spans.query_start is None else spans.query_start - 1
+        items = [i for i in spans.items() if link_splice._decode(i.partition("=")[0]) not in REPLACED]
+        return spans.link[:spans.host_start], spans.link[spans.host_end:before_query], items
+    return untouched(a) == untouched(b)
+
+
+def run(lines, splice, ws_only):
+    inject_sni.SPLICE_REWRITE = splice
+    inject_sni.FILTER_WS_ONLY = ws_only
+    out = []
+    for line in lines:
+        plan = inject_sni.plan_single_link(line)
+        if not plan:
+            out.append(None)
+            continue
+        try:
+            out.append((plan[0], plan[1](inject_sni.combine_domain(plan[0]))))
+        except ValueError as e:
+            out.append((plan[0], type(e)))
+    return out
+
+
+def timed(lines, splice, ws_only, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(lines, splice, ws_only)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def compare(lines, old, new):
+    """(beda keputusan, beda makna, byte berubah, base64 ganda di jalur lama)."""
+    decisions = meanings = kept = doubles = 0
+    for line, o, n in zip(lines, old, new):
+        if (o and o[0]) != (n and n[0]):
+            decisions += 1
+            print("  keputusan beda:", line)
+            continue
+        if not o or not isinstance(o[1], str) or o[1] == n[1]:
+            continue
+        (m_old, double), (m_new, _) = meaning(o[1]), meaning(n[1])
+        doubles += double
+        if m_old != m_new:
+            meanings += 1
+            print("  makna beda:", line, "\n    lama  :", o[1], "\n    splice:", n[1])
+        elif not kept_bytes(line.strip(), n[1]):
+            kept += 1
+            print("  byte berubah:", line, "\n    splice:", n[1])
+    return decisions, meanings, kept, doubles
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 50000
+    repeat = int(option("--repeat", 3))
+
+    inject_sni.BUG_DOMAIN = BUG
+    lines = generate(n, 5, kinds=KINDS) + EDGE_CASES
+    spliced = sum(1 for line in lines if line.startswith(tuple(f"{k}://" for k in KINDS))
+                  and link_splice.split_url(line.strip()) is not None)
+    print(f"{len(lines)} link ({len(EDGE_CASES)} kasus tepi), {spliced} bisa di-splice")
+
+    ok = True
+    for ws_only in (True, False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            old, t_old = timed(lines, False, ws_only, repeat)
+            new, t_new = timed(lines, True, ws_only, repeat)
+        rewritten = sum(1 for r in new if r)
+        decisions, meanings, kept, doubles = compare(lines, old, new)
+        print(f"FILTER_WS_ONLY={ws_only}: {rewritten} link di-rewrite")
+        print(f"  urllib : {t_old:6.3f} s  {len(lines) / t_old:9.0f} link/s")
+        print(f"  splice : {t_new:6.3f} s  {len(lines) / t_new:9.0f} link/s  x{t_old / t_new:.2f}")
+        print(f"  beda keputusan {decisions}, beda makna {meanings}, byte berubah {kept}, "
+              f"ss base64 ganda di jalur lama {doubles}")
+        ok = ok and not (decisions or meanings or kept)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
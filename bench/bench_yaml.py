@@ -0,0 +1,100 @@
+"""Benchmark penulisan YAML: yaml.dump lama vs yaml_writer (libyaml, streaming).
+
+Membuat N proxy sintetis mirip output prx.py/acc.py (nama dengan emoji
+bendera, ws-opts, dll), menulis keduanya ke file sementara lalu
+memastikan hasilnya byte-identik:
+
+    python bench/bench_yaml.py [jumlah_proxy] [--mem]
+
+--mem ikut mengukur peak memori (tracemalloc, jauh lebih lambat).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml
+
+import yaml_writer
+
+FLAGS = ["🇸🇬", "🇲🇾", "🇮🇩", "🇯🇵", "🇺🇸", ""]
+
+
+def make_proxy(rnd, i):
+    kind = rnd.choice(["vmess", "vless", "trojan", "ss"])
+    host = f"{rnd.getrandbits(40):010x}.{rnd.choice(['workers.dev', 'pages.dev', 'qvanta.top'])}"
+    p = {
+        "name": f"{rnd.choice(FLAGS)}DP {kind}-{rnd.choice(['SG', 'MY', 'ID'])}-{15470000 + i}",
+        "interface-name": rnd.choice(["wwan0", "phy0-sta0"]),
+        "type": kind,
+        "server": host,
+        "port": rnd.choice([80, 443, 8080, 2053, 56927]),
+    }
+    if kind == "ss":
+        p.update({"udp": True, "cipher": "2022-blake3-chacha20-poly1305",
+                  "password": f"{rnd.getrandbits(256):064x}="})
+        return p
+    p["uuid"] = f"{rnd.getrandbits(128):032x}"
+    p["udp"] = True
+    p["network"] = rnd.choice(["ws", "tcp", "grpc"])
+    p["tls"] = rnd.random() < 0.5
+    if p["network"] == "ws":
+        p["ws-opts"] = {"path": rnd.choice(["/", "/vless", f"/{rnd.getrandbits(64):x}?ed=2048"]),
+                        "headers": {"Host": host}}
+    if rnd.random() < 0.05:
+        # Sesekali nama aneh yang memaksa double-quote (jalur fallback)
+        p["name"] = f"{p['name']} \"quoted\"\t#{i}"
+    return p
+
+
+def run(label, fn, mem):
+    if mem:
+        tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if mem else 0
+    if mem:
+        tracemalloc.stop()
+    extra = f"  peak {peak / 1024 / 1024:7.1f} MiB" if mem else ""
+    print(f"{label:28s}: {elapsed:7.2f} s{extra}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n = int(args[0]) if args else 100_000
+    mem = "--mem" in sys.argv
+
+    rnd = random.Random(42)
+    proxies = [make_proxy(rnd, i) for i in range(n)]
+    print(f"{n} proxy sintetis, libyaml: {yaml_writer._CDumper is not None}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_file = os.path.join(tmp, "old.yaml")
+        new_file = os.path.join(tmp, "new.yaml")
+
+        def old():
+            with open(old_file, "w", encoding="utf-8") as f:
+                yaml.dump({"proxies": proxies}, f, allow_unicode=True, sort_keys=False)
+
+        def new():
+            # Generator: proxy dibuat & ditulis satu per satu seperti prx.iter_proxies
+            gen_rnd = random.Random(42)
+            yaml_writer.save_proxies((make_proxy(gen_rnd, i) for i in range(n)), new_file)
+
+        run("yaml.dump (Python, 1 dict)", old, mem)
+        run("yaml_writer (streaming)", new, mem)
+
+        with open(old_file, "rb") as a, open(new_file, "rb") as b:
+            same = a.read() == b.read()
+        print("Byte-identik:", same)
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Generator korpus link sintetis (seeded) untuk benchmark parser.
+
+Menghasilkan campuran vmess, vless, trojan, ss, ssr, hy2 dan tuic dengan
+proporsi mirip daftar EbraSha/v2nodes, termasuk link rusak (base64 tidak
+valid, port hilang, terpotong, dll). Seed dan jumlah yang sama selalu
+menghasilkan korpus yang sama:
+
+    python bench/corpus.py 100000 [seed] > corpus.txt
+"""
+import base64
+import json
+import random
+import sys
+from urllib.parse import quote, urlencode
+
+KINDS = ["vmess", "vless", "trojan", "ss", "ssr", "hy2", "tuic"]
+WEIGHTS = [30, 30, 20, 12, 2, 3, 3]
+COUNTRIES = ["SG", "MY", "ID", "JP", "HK", "US", "DE", "NL", "IR", "TR"]
+FLAGS = {"SG": "🇸🇬", "MY": "🇲🇾", "ID": "🇮🇩", "JP": "🇯🇵", "HK": "🇭🇰",
+         "US": "🇺🇸", "DE": "🇩🇪", "NL": "🇳🇱", "IR": "🇮🇷", "TR": "🇹🇷"}
+CDN_SUFFIXES = ["workers.dev", "pages.dev", "cloudflare.net", "qvanta.top", "revora.top", "speedtest.net"]
+PORTS = [443, 443, 443, 80, 8080, 8443, 2053, 2083, 2096, 8880, 22, 56927]
+
+
+def _b64(text, urlsafe=False, pad=True):
+    raw = text.encode("utf-8")
+    out = (base64.urlsafe_b64encode(raw) if urlsafe else base64.b64encode(raw)).decode()
+    return out if pad else out.rstrip("=")
+
+
+def _host(rnd, hosts):
+    # Banyak link berbagi sedikit host CDN, seperti sumber aslinya
+    if hosts and rnd.random() < 0.7:
+        return rnd.choice(hosts)
+    return f"{rnd.getrandbits(36):09x}.{rnd.choice(CDN_SUFFIXES)}"
+
+
+def _name(rnd, kind):
+    cc = rnd.choice(COUNTRIES)
+    return f"{FLAGS[cc]} {kind}-{cc}-{rnd.randint(10000000, 99999999)} [www.v2nodes.com]"
+
+
+def _uuid(rnd):
+    h = f"{rnd.getrandbits(128):032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _path(rnd):
+    return rnd.choice(["/", "/ws", "/vless", f"/{rnd.getrandbits(48):x}?ed=2048", "/@channel-@channel"])
+
+
+def make_vmess(rnd, hosts):
+    host = _host(rnd, hosts)
+    data = {
+        "v": "2", "ps": _name(rnd, "vmess"), "add": rnd.choice([host, f"104.{rnd.randint(16, 31)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"]),
+        "port": str(rnd.choice(PORTS)), "id": _uuid(rnd), "aid": "0", "scy": "auto",
+        "net": rnd.choice(["ws", "ws", "ws", "tcp", "grpc"]), "type": "none",
+        "host": host, "path": _path(rnd), "tls": rnd.choice(["tls", ""]), "sni": rnd.choice([host, ""]),
+    }
+    return "vmess://" + _b64(json.dumps(data))
+
+
+def _url_link(rnd, hosts, scheme, userinfo, extra=None):
+    host = _host(rnd, hosts)
+    q = {"encryption": "none", "security": rnd.choice(["tls", "none"]), "sni": host,
+         "type": rnd.choice(["ws", "ws", "tcp", "grpc"]), "host": host, "path": _path(rnd)}
+    if extra:
+        q.update(extra)
+    return f"{scheme}://{userinfo}@{host}:{rnd.choice(PORTS)}?{urlencode(q)}#{quote(_name(rnd, scheme))}"
+
+
+def make_vless(rnd, hosts):
+    return _url_link(rnd, hosts, "vless", _uuid(rnd))
+
+
+def make_trojan(rnd, hosts):
+    return _url_link(rnd, hosts, "trojan", quote(f"{rnd.getrandbits(64):x}"))
+
+
+def make_ss(rnd, hosts):
+    host = _host(rnd, hosts)
+    method = rnd.choice(["aes-128-gcm", "chacha20-ietf-poly1305", "2022-blake3-aes-256-gcm"])
+    password = f"{rnd.getrandbits(96):x}"
+    name = quote(_name(rnd, "ss"))
+    port = rnd.choice(PORTS)
+    if rnd.random() < 0.3:
+        # Format lama: semuanya di-base64
+        return f"ss://{_b64(f'{method}:{password}@{host}:{port}')}#{name}"
+    link = f"ss://{_b64(f'{method}:{password}', urlsafe=True, pad=False)}@{host}:{port}"
+    if rnd.random() < 0.6:
+        plugin = f"v2ray-plugin;mode=websocket;host={host};path=/;tls"
+        link += "/?" + urlencode({"plugin": plugin})
+    return f"{link}#{name}"
+
+
+def make_ssr(rnd, hosts):
+    host = _host(rnd, hosts)
+    params = urlencode({"obfsparam": _b64(host, True, False), "remarks": _b64(_name(rnd, "ssr"), True, False)})
+    body = f"{host}:{rnd.choice(PORTS)}:origin:aes-256-cfb:http_simple:{_b64('pass', True, False)}/?{params}"
+    return "ssr://" + _b64(body, urlsafe=True, pad=False)
+
+
+def make_hy2(rnd, hosts):
+    host = _host(rnd, hosts)
+    return f"hy2://{rnd.getrandbits(64):x}@{host}:{rnd.choice(PORTS)}?sni={host}&insecure=1#{quote(_name(rnd, 'hy2'))}"
+
+
+def make_tuic(rnd, hosts):
+    host = _host(rnd, hosts)
+    return (f"tuic://{_uuid(rnd)}:{rnd.getrandbits(32):x}@{host}:{rnd.choice(PORTS)}"
+            f"?congestion_control=bbr&alpn=h3&sni={host}#{quote(_name(rnd, 'tuic'))}")
+
+
+MAKERS = {"vmess": make_vmess, "vless": make_vless, "trojan": make_trojan, "ss": make_ss,
+          "ssr": make_ssr, "hy2": make_hy2, "tuic": make_tuic}
+
+
+def malform(rnd, link):
+    """Rusak link dengan salah satu pola yang sering muncul di daftar publik."""
+    choice = rnd.randrange(6)
+    if choice == 0:
+        return link[: rnd.randint(5, max(6, len(link) // 2))]          # terpotong
+    if choice == 1:
+        scheme, _, rest = link.partition("://")
+        return f"{scheme}://!!{rest[2:]}"                               # base64/host rusak
+    if choice == 2:
+        return link.replace(":443", ":").replace(":80", ":")            # port kosong
+    if choice == 3:
+        return link.replace(":443", ":abc")                            # port bukan angka
+    if choice == 4:
+        return "   "                                                    # baris kosong
+    return rnd.choice(["# komentar", "http://example.com", "vmess://", "ss://@:"])
+
+
+def generate(n, seed=0, malformed_rate=0.05, kinds=None):
+    rnd = random.Random(seed)
+    hosts = [f"{rnd.getrandbits(36):09x}.{rnd.choice(CDN_SUFFIXES)}" for _ in range(max(8, n // 50))]
+    kinds = kinds or KINDS
+    weights = [WEIGHTS[KINDS.index(k)] for k in kinds]
+    links = []
+    for _ in range(n):
+        link = MAKERS[rnd.choices(kinds, weights)[0]](rnd, hosts)
+        if rnd.random() < malformed_rate:
+            link = malform(rnd, link)
+        links.append(link)
+    return links
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    out = sys.stdout
+    for link in generate(n, seed):
+        out.write(link + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Buat fixture HTML mirip halaman negara v2nodes untuk bench_html.py.
+
+Isi halaman sintetis (seed tetap) tapi strukturnya meniru aslinya:
+head penuh meta/CSS/script, navigasi, kotak subscription, lalu daftar
+server yang panjang. Jalankan ulang hanya jika ingin mengganti fixture:
+
+    python bench/make_html_fixtures.py
+"""
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _head(rnd, country):
+    css = "\n".join(
+        f".c{i}{{margin:{rnd.randint(0, 20)}px;padding:{rnd.randint(0, 20)}px;color:#{rnd.getrandbits(24):06x}}}"
+        for i in range(300)
+    )
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>Free {country.upper()} V2Ray Servers - v2nodes</title>\n"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n"
+        f"<style>\n{css}\n</style>\n"
+        "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments);}</script>\n"
+        "</head>\n<body>\n<nav class=\"navbar\"><a href=\"/\">v2nodes</a>"
+        + "".join(f"<a href=\"/country/{c}/\">{c.upper()}</a>" for c in ("us", "de", "sg", "my", "id", "jp"))
+        + "</nav>\n"
+    )
+
+
+def _subscription_box(rnd, country):
+    key = "".join(rnd.choice("abcdef0123456789") for _ in range(32))
+    return (
+        "<div class=\"card subscription\">\n<label for=\"subscription\">Subscription link</label>\n"
+        f"<input type=\"text\" class=\"form-control\" id=\"subscription\" readonly "
+        f"value=\"https://www.v2nodes.com/subscriptions/country/{country}/?key={key}\">\n"
+        "<button class=\"btn\" onclick=\"copy()\">Copy</button>\n</div>\n"
+    )
+
+
+def _server_rows(rnd, country, n):
+    rows = []
+    for i in range(n):
+        proto = rnd.choice(["vmess", "vless", "trojan", "ss"])
+        rows.append(
+            f"<div class=\"server-card c{rnd.randint(0, 299)}\" data-id=\"{15470000 + i}\">"
+            f"<span class=\"flag\">{country.upper()}</span><span class=\"proto\">{proto}</span>"
+            f"<span class=\"host\">{rnd.getrandbits(32):08x}.example-cdn.top</span>"
+            f"<span class=\"ping\">{rnd.randint(20, 400)} ms</span>"
+            f"<input type=\"hidden\" id=\"cfg-{i}\" value=\"{proto}://{rnd.getrandbits(64):016x}\">"
+            f"<a class=\"btn\" href=\"/servers/{15470000 + i}/\">Details</a></div>\n"
+        )
+    return "".join(rows)
+
+
+def make_page(country, seed, rows, subscription_first=True):
+    rnd = random.Random(seed)
+    head = _head(rnd, country)
+    box = _subscription_box(rnd, country)
+    servers = "<main class=\"servers\">\n" + _server_rows(rnd, country, rows) + "</main>\n"
+    footer = "<footer>&copy; v2nodes</footer>\n<script src=\"/static/app.js\"></script>\n</body>\n</html>\n"
+    body = box + servers if subscription_first else servers + box
+    return head + body + footer
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    pages = {
+        "v2nodes_country_sg.html": make_page("sg", 1, 400),
+        "v2nodes_country_my.html": make_page("my", 2, 250),
+        # Kasus terburuk: input ada di akhir halaman
+        "v2nodes_country_id_late_input.html": make_page("id", 3, 400, subscription_first=False),
+    }
+    for name, html in pages.items():
+        with open(os.path.join(FIXTURE_DIR, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"{name}: {len(html) // 1024} KiB")
+
+
+if __name__ == "__main__":
+    main()
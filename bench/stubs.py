@@ -0,0 +1,193 @@
+"""Server lokal pengganti jaringan untuk benchmark (tidak dipakai saat run).
+
+StubDNSServer menjawab query DNS (wildcard per akhiran, delay, paket
+hilang, kapasitas terbatas) untuk dns_async / inject_sni; DelayedTLSServer
+adalah listener TLS yang menunda handshake untuk latency.rank().
+"""
+import asyncio
+import random
+import socket
+import ssl
+import threading
+import time
+import zlib
+
+import dns_async
+
+
+# =============================
+#  STUB DNS SERVER (OFFLINE)
+# =============================
+class _StubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, stub):
+        self.stub = stub
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        stub = self.stub
+        stub.queries += 1
+        if stub.drop_rate and random.random() < stub.drop_rate:
+            return
+        if stub.capacity and stub.pending >= stub.capacity:
+            return
+        try:
+            name = dns_async._read_name(data, 12)
+            ips = stub.lookup(name)
+            reply = dns_async.build_response(data, ips, 0 if ips else dns_async.RCODE_NXDOMAIN, stub.ttl)
+        except Exception:
+            return
+        if stub.delay:
+            delay = stub.delay * (1 + stub.pending / stub.capacity) if stub.capacity else stub.delay
+            stub.pending += 1
+            asyncio.get_running_loop().call_later(delay, self._send, reply, addr)
+        else:
+            self.transport.sendto(reply, addr)
+
+    def _send(self, reply, addr):
+        self.stub.pending -= 1
+        self.transport.sendto(reply, addr)
+
+
+class StubDNSServer:
+    """Server DNS lokal untuk uji & benchmark tanpa internet.
+
+    `records` memetakan nama -> IP. Nama yang berakhiran salah satu
+    `wildcard_suffixes` selalu dijawab (IP deterministik dari hash nama),
+    sisanya NXDOMAIN. `delay` dan `drop_rate` mensimulasikan resolver
+    yang lambat / paket yang hilang. `capacity` > 0 mensimulasikan resolver
+    yang kewalahan: delay naik sebanding jumlah query yang sedang ditunda
+    dan query di atas kapasitas di-drop.
+    """
+
+    def __init__(self, records=None, wildcard_suffixes=(), delay=0.0, drop_rate=0.0,
+                 ttl=300, host="127.0.0.1", port=0, capacity=0):
+        self.records = {k.lower(): v for k, v in (records or {}).items()}
+        self.wildcard_suffixes = tuple(s.lower().lstrip(".") for s in wildcard_suffixes)
+        self.delay = delay
+        self.drop_rate = drop_rate
+        self.ttl = ttl
+        self.host = host
+        self.port = port
+        self.capacity = capacity
+        self.queries = 0
+        self.pending = 0
+        self._transport = None
+        self._thread = None
+        self._loop = None
+
+    def lookup(self, name):
+        if name in self.records:
+            return (self.records[name],)
+        for suffix in self.wildcard_suffixes:
+            if name == suffix or name.endswith("." + suffix):
+                h = zlib.crc32(name.encode())
+                return (f"10.{(h >> 16) & 0xFF}.{(h >> 8) & 0xFF}.{h & 0xFF or 1}",)
+        return ()
+
+    @property
+    def address(self):
+        return (self.host, self.port)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StubProtocol(self), sock=dns_async._udp_socket(self.host, self.port)
+        )
+        self.port = self._transport.get_extra_info("sockname")[1]
+        return self
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def start_in_thread(self):
+        """Jalankan stub di event loop thread terpisah (untuk kode blocking)."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self.close()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+
+# =============================
+#  LISTENER TLS LOKAL (UJI)
+# =============================
+class DelayedTLSServer:
+    """Listener TLS lokal yang menunda handshake `delay` detik.
+
+    Untuk menguji & benchmark ranking tanpa internet: beberapa listener
+    dengan delay berbeda harus keluar dari rank() urut dari yang tercepat.
+    """
+
+    def __init__(self, certfile, keyfile, delay=0.0, host="127.0.0.1", port=0):
+        self.delay = delay
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self._ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self._ctx.load_cert_chain(certfile, keyfile)
+        self._sock = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def address(self):
+        return (self.host, self.port)
+
+    def _handle(self, conn):
+        try:
+            time.sleep(self.delay)
+            with self._ctx.wrap_socket(conn, server_side=True):
+                pass
+        except (OSError, ssl.SSLError):
+            pass
+        finally:
+            conn.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start_in_thread(self):
+        self._sock = socket.create_server((self.host, self.port), backlog=128)
+        self.port = self._sock.getsockname()[1]
+        # accept() yang blocking tidak terbangun oleh close(), jadi pakai timeout
+        self._sock.settimeout(0.1)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop_thread(self):
+        if self._sock is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sock.close()
+            self._sock = None
@@ -0,0 +1,155 @@
+import os
+import time
+
+import metrics
+import node_index
+
+# ================= KONFIGURASI =================
+RUN_BUDGET = float(os.environ.get("SCRAPER_BUDGET") or 0)   # Detik untuk seluruh run, 0 = tanpa batas
+FLUSH_RESERVE = 60          # Detik terakhir budget yang disisakan untuk ranking & menulis output
+STAGE_SHARE = {"acc": 0.5}  # Bagian sisa budget untuk tahap cek jaringan (sisanya untuk tahap berikutnya)
+# ===============================================
+
+# Budget dimulai sekali per proses (start(), dipanggil main tiap script;
+# pipeline.py memanggilnya paling awal sehingga ketiga output berbagi satu
+# budget). Tiap tahap cek jaringan mengambil Deadline lewat stage(): cek
+# dijalankan urut prioritas (Priority) dan cek yang belum dimulai saat
+# deadline habis dilewati. Cek yang sedang jalan dibiarkan selesai (sudah
+# dibatasi timeout masing-masing), lalu hasil yang sudah tervalidasi
+# ditulis seperti biasa. Output run yang terpotong dicap tidak utuh
+# (http_cache.stamp) sehingga run berikutnya membangunnya ulang walau
+# sumbernya 304.
+
+
+class Deadline:
+    """Batas waktu absolut (monotonic); end None = tanpa batas."""
+
+    def __init__(self, end=None, name="run"):
+        self.end = end
+        self.name = name
+
+    @classmethod
+    def after(cls, seconds, name="run"):
+        return cls(time.monotonic() + seconds if seconds else None, name)
+
+    @property
+    def limited(self):
+        return self.end is not None
+
+    def remaining(self):
+        """Sisa detik (minimal 0), None jika tanpa batas."""
+        if self.end is None:
+            return None
+        return max(0.0, self.end - time.monotonic())
+
+    def expired(self):
+        return self.end is not None and time.monotonic() >= self.end
+
+    def clamp(self, timeout):
+        """`timeout` dipotong ke sisa budget."""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def slice(self, share, name):
+        """Deadline anak: `share` bagian dari sisa waktu, tidak melewati deadline ini."""
+        if self.end is None:
+            return Deadline(None, name)
+        return Deadline(min(self.end, time.monotonic() + self.remaining() * share), name)
+
+
+_run = None
+_cut = set()   # Nama tahap yang terpotong deadline
+
+def start(seconds=None):
+    """Mulai budget run (sekali per proses), kembalikan Deadline-nya."""
+    global _run
+    if _run is None:
+        seconds = RUN_BUDGET if seconds is None else seconds
+        # Budget yang sangat kecil tetap menyisakan separuhnya untuk cek
+        reserve = min(FLUSH_RESERVE, seconds / 2)
+        _run = Deadline.after(seconds - reserve if seconds else None)
+        if seconds:
+            print(f"[*] Budget run: {seconds:g} detik ({reserve:g} detik terakhir untuk menulis output)")
+    return _run
+
+def current():
+    """Deadline run aktif (tanpa batas jika start() belum dipanggil)."""
+    return _run or Deadline()
+
+def stage(name):
+    """Deadline untuk tahap `name` (bagian STAGE_SHARE dari sisa budget run)."""
+    return current().slice(STAGE_SHARE.get(name, 1.0), name)
+
+def exhausted(what):
+    """True (dan cetak peringatan) jika budget run sudah habis, untuk tahap opsional `what`."""
+    if not current().expired():
+        return False
+    print(f"[!] Budget run habis, {what} dilewati")
+    _cut.add(what)
+    return True
+
+def mark_cut(name):
+    """Catat bahwa tahap `name` terpotong deadline (output-nya tidak utuh)."""
+    _cut.add(name)
+
+def was_cut(*names):
+    """True jika salah satu tahap `names` terpotong (cek dilewati / tahap opsional tidak jalan)."""
+    return any(name in _cut for name in names)
+
+def reset():
+    global _run
+    _run = None
+    _cut.clear()
+
+
+# =============================
+#  URUTAN PRIORITAS
+# =============================
+def healthy_hosts(output, prefix=""):
+    """Host node di output run sebelumnya (dibaca dari index node-nya), `prefix` dibuang."""
+    try:
+        with node_index.NodeIndex(node_index.path_for(output)) as index:
+            hosts = {(row["host"] or row["server"] or "").lower() for row in index.select()}
+    except (OSError, ValueError, KeyError):
+        return set()
+    prefix = prefix.lower()
+    return {h[len(prefix):] if prefix and h.startswith(prefix) else h for h in hosts if h}
+
+
+class Priority:
+    """Urutan cek: negara pilihan dulu, lalu host yang sehat di run sebelumnya, lalu sisanya.
+
+    Negara pilihan sesuai urutan konfigurasi (COUNTRY / COUNTRIES); sehat
+    di run sebelumnya hanya memisahkan item dari negara yang sama. Item
+    dengan prioritas sama tetap urut sumber.
+    """
+
+    def __init__(self, countries, healthy=()):
+        self.rank = {c.upper(): i for i, c in enumerate(countries)}
+        self.healthy = healthy
+
+    def key(self, country, host):
+        rank = self.rank.get(country)
+        return (rank is None, len(self.rank) if rank is None else rank,
+                (host or "").lower() not in self.healthy)
+
+    def sort(self, items, country_of, host_of, label):
+        """`items` urut prioritas, sekaligus cetak jumlah per kelompok."""
+        keyed = sorted(((self.key(country_of(item), host_of(item)), i, item) for i, item in enumerate(items)),
+                       key=lambda k: k[:2])
+        preferred = sum(1 for k, _, _ in keyed if not k[0])
+        healthy = sum(1 for k, _, _ in keyed if k[0] and not k[2])
+        print(f"[*] Urutan cek {label}: {preferred} negara pilihan, {healthy} sehat di run sebelumnya, "
+              f"{len(keyed) - preferred - healthy} lainnya")
+        return [item for _, _, item in keyed]
+
+
+def skipped(deadline, total, done, label):
+    """Cetak & kembalikan jumlah cek yang dilewati karena deadline habis."""
+    missed = total - done
+    if missed:
+        mark_cut(deadline.name)
+        metrics.count(f"budget.{deadline.name}.dilewati", missed)
+        print(f"[!] Budget {deadline.name} habis: {missed} dari {total} {label} tidak sempat dicek, "
+              f"hasil yang sudah tervalidasi tetap ditulis")
+    return missed
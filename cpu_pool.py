@@ -0,0 +1,68 @@
+import concurrent.futures
+import os
+
+import metrics
+
+# ================= KONFIGURASI =================
+WORKERS = None       # Jumlah proses, None = os.cpu_count()
+CHUNK_SIZE = 2000    # Link per potongan yang dikirim ke satu proses
+MIN_BATCH = 20000    # Di bawah ini ongkos pickle & kirim ke proses lebih besar dari hematnya
+# ===============================================
+
+_executor = None
+
+
+def worth_it(count):
+    """True jika `count` item layak dikirim ke pool: lebih dari satu CPU & proses, batch cukup besar.
+
+    Dengan satu CPU (atau WORKERS = 1) pool hanya menambah ongkos pickle,
+    jadi pemanggil tetap memakai jalur serial.
+    """
+    cpus = os.cpu_count() or 1
+    return cpus > 1 and (WORKERS or cpus) > 1 and count >= MIN_BATCH
+
+
+def get_executor():
+    """ProcessPoolExecutor bersama, dibuat saat pertama dipakai."""
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ProcessPoolExecutor(max_workers=WORKERS or os.cpu_count())
+    return _executor
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def chunked(items, size=CHUNK_SIZE):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _run_chunk(fn, chunk, args):
+    # Di proses worker: metrik hasil fork/potongan sebelumnya dibuang dulu,
+    # lalu metrik potongan ini dikirim balik bersama hasilnya
+    metrics.reset()
+    return fn(chunk, *args), metrics.export()
+
+
+def map_chunks(fn, items, *args, chunk_size=CHUNK_SIZE):
+    """Jalankan fn(potongan, *args) di process pool, yield hasil per potongan berurutan.
+
+    fn harus fungsi level modul (bisa di-pickle). Penolakan yang dicatat
+    worker ke metrics digabung ke proses utama.
+    """
+    executor = get_executor()
+    futures = [executor.submit(_run_chunk, fn, chunk, args) for chunk in chunked(items, chunk_size)]
+    for fut in futures:
+        result, exported = fut.result()
+        metrics.merge(exported)
+        yield result
+
+
+def flat_map(fn, items, *args, chunk_size=CHUNK_SIZE):
+    """Seperti map_chunks, tapi fn mengembalikan list per potongan dan hasilnya digabung datar."""
+    return [r for part in map_chunks(fn, items, *args, chunk_size=chunk_size) for r in part]
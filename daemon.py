@@ -0,0 +1,247 @@
+import base64
+import email.utils
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+import acc
+import budget
+import http_cache
+import inject_sni
+import latency
+import metrics
+import pipeline
+import prx
+
+# ================= KONFIGURASI =================
+HOST = os.environ.get("SCRAPER_HOST", "127.0.0.1")
+PORT = int(os.environ.get("SCRAPER_PORT") or 8080)
+REFRESH_INTERVAL = 300      # Detik antar run: sumber dicek ulang (murah, HTTP cache 304)
+REVALIDATE_INTERVAL = 1800  # Detik antar cek ulang acc & DNS walau sumber tidak berubah (tanpa cache DNS/state)
+GZIP_LEVEL = 9
+# ===============================================
+
+# ============================================
+# MODE DAEMON
+# Satu proses yang terus hidup: pipeline.main() dijalankan tiap
+# REFRESH_INTERVAL di thread latar (import bs4/yaml/requests, session HTTP,
+# cache DNS, health store & pool cek hidup cukup sekali), sementara ketiga
+# output disajikan lewat HTTP lokal:
+#
+#   /dialer-proxy.yaml   prx.OUTPUT_FILE
+#   /jomblo.yaml         acc.OUTPUT_FILE
+#   /sub                 inject_sni.OUTPUT_FILE sebagai subscription base64
+#   /status              JSON ringkas run terakhir
+#
+# Body, versi gzip & ETag dibangun sekali setiap isi file berubah, jadi
+# tiap request hanya memilih byte yang sudah jadi (If-None-Match -> 304).
+#
+#   python daemon.py [--host 127.0.0.1] [--port 8080]
+# ============================================
+
+
+def subscription(data):
+    """Isi akun_wildcard_aktif.txt sebagai subscription base64 (satu baris)."""
+    lines = [line.strip() for line in data.decode("utf-8", errors="ignore").splitlines() if line.strip()]
+    return base64.b64encode("\n".join(lines).encode("utf-8"))
+
+
+# path -> (file sumber, content type, transformasi isi file)
+ROUTES = {
+    "/dialer-proxy.yaml": (prx.OUTPUT_FILE, "text/yaml; charset=utf-8", None),
+    "/jomblo.yaml": (acc.OUTPUT_FILE, "text/yaml; charset=utf-8", None),
+    "/sub": (inject_sni.OUTPUT_FILE, "text/plain; charset=utf-8", subscription),
+}
+
+
+class Artifact:
+    """Satu respons siap kirim: body asli & gzip beserta ETag masing-masing."""
+
+    __slots__ = ("digest", "content_type", "body", "gzipped", "etag", "gzip_etag", "last_modified")
+
+    def __init__(self, digest, content_type, body, built):
+        self.digest = digest
+        self.content_type = content_type
+        self.body = body
+        self.gzipped = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        tag = hashlib.sha256(body).hexdigest()[:24]
+        self.etag = f'"{tag}"'
+        self.gzip_etag = f'"{tag}-gz"'
+        self.last_modified = email.utils.formatdate(built, usegmt=True)
+
+
+_artifacts = {}   # path -> Artifact, diganti utuh tiap ada perubahan (dibaca tanpa lock)
+_status = {"started": time.time(), "runs": 0, "last_run": None, "last_duration": None,
+           "last_error": None, "last_revalidate": None}
+
+
+def build_artifacts(routes=None):
+    """Bangun ulang artifact yang file sumbernya berubah, kembalikan daftar path yang berubah."""
+    global _artifacts
+    routes = ROUTES if routes is None else routes
+    current = dict(_artifacts)
+    changed = []
+    for path, (source, content_type, transform) in routes.items():
+        try:
+            with open(source, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue   # Belum pernah ditulis: tetap 503 (atau artifact lama)
+        digest = hashlib.sha256(data).digest()
+        old = current.get(path)
+        if old is not None and old.digest == digest:
+            continue
+        current[path] = Artifact(digest, content_type, transform(data) if transform else data, time.time())
+        changed.append(path)
+    if changed:
+        _artifacts = current
+    return changed
+
+
+def accepts_gzip(header):
+    """True jika header Accept-Encoding menerima gzip (q=0 berarti menolak).
+
+    Entri gzip eksplisit menang atas "*"; "*" hanya berlaku jika gzip tidak disebut.
+    """
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        accepted.setdefault(coding.strip().lower(),
+                            params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000"))
+    return accepted.get("gzip", accepted.get("*", False))
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "scraper-daemon"
+    protocol_version = "HTTP/1.1"
+    # Header & body ditulis terpisah: tanpa ini request keep-alive tertahan Nagle + delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass   # Akses log tidak dicetak supaya output run tetap terbaca
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/status":
+            body = json.dumps(dict(_status, artifacts={
+                p: {"etag": a.etag, "bytes": len(a.body), "gzip_bytes": len(a.gzipped),
+                    "last_modified": a.last_modified} for p, a in _artifacts.items()})).encode("utf-8")
+            return self._send(200, body, [("Content-Type", "application/json"), ("Cache-Control", "no-store")])
+
+        if path not in ROUTES:
+            return self._send(404, b"not found\n", [("Content-Type", "text/plain")])
+        artifact = _artifacts.get(path)
+        if artifact is None:
+            return self._send(503, b"output belum tersedia\n", [("Content-Type", "text/plain"), ("Retry-After", "60")])
+
+        use_gzip = accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = artifact.gzip_etag if use_gzip else artifact.etag
+        headers = [("ETag", etag), ("Last-Modified", artifact.last_modified),
+                   ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        match = self.headers.get("If-None-Match")
+        if match and (match.strip() == "*" or etag in (t.strip() for t in match.split(","))):
+            return self._send(304, b"", headers)
+        headers.append(("Content-Type", artifact.content_type))
+        if use_gzip:
+            headers.append(("Content-Encoding", "gzip"))
+        return self._send(200, artifact.gzipped if use_gzip else artifact.body, headers)
+
+    do_HEAD = do_GET
+
+
+def make_server(host=HOST, port=PORT):
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+# ============================================
+# RUN BERKALA DI LATAR
+# ============================================
+def run_once(session, revalidate):
+    """Satu run pipeline dengan state proses yang dipakai ulang (session, cache, prober)."""
+    budget.reset()
+    http_cache.reset()
+    metrics.reset()
+    latency.reset()
+    # Hasil run sebelumnya tidak ikut menumpuk: IP resolve, cache DNS & health dimuat ulang dari disk
+    inject_sni.reset_state()
+    prober = acc.get_prober()
+    if getattr(prober, "health", None) is not None:
+        prober.health.reload()
+    if revalidate:
+        # Hasil cek hidup run sebelumnya disimpan per host di prober bersama
+        prober.forget()
+    pipeline.main([], session, revalidate)
+
+
+def refresh_loop(stop, session):
+    last_revalidate = 0.0
+    while not stop.is_set():
+        started = time.time()
+        revalidate = started - last_revalidate >= REVALIDATE_INTERVAL
+        try:
+            run_once(session, revalidate)
+            if revalidate:
+                last_revalidate = started
+                _status["last_revalidate"] = started
+            _status["last_error"] = None
+        except Exception as e:
+            # Run gagal tidak menghentikan daemon, artifact lama tetap disajikan
+            _status["last_error"] = f"{type(e).__name__}: {e}"
+            print(f"[!] Run daemon gagal: {_status['last_error']}")
+        changed = build_artifacts()
+        _status.update(runs=_status["runs"] + 1, last_run=started, last_duration=time.time() - started)
+        print(f"[*] Run daemon selesai ({_status['last_duration']:.1f} detik), "
+              f"artifact berubah: {', '.join(changed) or '-'}; run berikutnya {REFRESH_INTERVAL} detik lagi")
+        stop.wait(REFRESH_INTERVAL)
+
+
+def main():
+    """python daemon.py [--host 127.0.0.1] [--port 8080]"""
+    args = sys.argv[1:]
+
+    def option(name, cast=str):
+        return cast(args[args.index(name) + 1]) if name in args else None
+
+    # Output yang sudah ada langsung disajikan sebelum run pertama selesai
+    build_artifacts()
+    server = make_server(option("--host") or HOST, option("--port", int) or PORT)
+    print(f"[*] Daemon melayani http://{server.server_address[0]}:{server.server_address[1]}"
+          f" ({', '.join(ROUTES)})")
+
+    session = pipeline.make_session()
+    inject_sni.open_caches()
+    stop = threading.Event()
+    refresher = threading.Thread(target=refresh_loop, args=(stop, session), daemon=True)
+    refresher.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        refresher.join(timeout=5)
+        # Simpan isi cache ke disk walau run terakhir terpotong
+        for store in (inject_sni._dns_cache, inject_sni._health, getattr(acc._prober, "health", None)):
+            if store is not None:
+                store.close()
+
+
+if __name__ == "__main__":
+    main()
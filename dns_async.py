@@ -0,0 +1,284 @@
+import asyncio
+import random
+import socket
+import struct
+import time
+from typing import NamedTuple
+
+# ================= KONFIGURASI =================
+DEFAULT_SERVERS = ["1.1.1.1", "8.8.8.8"]
+DEFAULT_TIMEOUT = 2.0      # Detik per percobaan query
+DEFAULT_RETRIES = 2        # Jumlah ulang setelah percobaan pertama
+DEFAULT_INFLIGHT = 1000    # Maksimal query yang berjalan bersamaan
+DNS_PORT = 53
+SOCKET_BUFFER = 4 * 1024 * 1024  # Buffer UDP besar agar burst balasan tidak di-drop kernel
+# ===============================================
+
+STATUS_OK = "ok"
+STATUS_NXDOMAIN = "nxdomain"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+QTYPE_A = 1
+QCLASS_IN = 1
+RCODE_NXDOMAIN = 3
+
+
+class DNSAnswer(NamedTuple):
+    status: str
+    ips: tuple = ()
+    ttl: int = 0
+
+    @property
+    def active(self):
+        return self.status == STATUS_OK and bool(self.ips)
+
+    @property
+    def failed(self):
+        """True jika tidak ada jawaban dari server (timeout/error), bukan NXDOMAIN."""
+        return self.status in (STATUS_TIMEOUT, STATUS_ERROR)
+
+
+# =============================
+#  ENCODE / DECODE PAKET DNS
+# =============================
+def build_query(name, qid, qtype=QTYPE_A):
+    """Susun paket query DNS standar (RD=1) untuk satu nama."""
+    header = struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(
+        bytes([len(label)]) + label
+        for label in (p.encode("idna") for p in name.rstrip(".").split(".") if p)
+    ) + b"\x00"
+    return header + qname + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def _read_name(data, offset):
+    labels = []
+    for _ in range(128):
+        length = data[offset]
+        if length == 0:
+            break
+        if length & 0xC0 == 0xC0:
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        labels.append(data[offset + 1:offset + 1 + length].decode("ascii", errors="ignore"))
+        offset += length + 1
+    return ".".join(labels).lower()
+
+
+def parse_response(data):
+    """Kembalikan (qid, qname, rcode, ips, ttl) dari paket respons DNS."""
+    qid, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    rcode = flags & 0x000F
+    offset = 12
+    qname = ""
+    for i in range(qdcount):
+        if i == 0:
+            qname = _read_name(data, offset)
+        offset = _skip_name(data, offset) + 4
+
+    ips = []
+    ttl = None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        if rtype == QTYPE_A and rdlength == 4:
+            ips.append(socket.inet_ntoa(data[offset:offset + 4]))
+        ttl = rttl if ttl is None else min(ttl, rttl)
+        offset += rdlength
+    return qid, qname, rcode, tuple(ips), ttl or 0
+
+
+def build_response(query, ips=(), rcode=0, ttl=300):
+    """Susun respons dari paket query (dipakai bench/stubs.py)."""
+    qid, flags = struct.unpack("!HH", query[:4])
+    qend = _skip_name(query, 12) + 4
+    question = query[12:qend]
+    flags = 0x8000 | (flags & 0x0100) | 0x0080 | rcode
+    header = struct.pack("!HHHHHH", qid, flags, 1, len(ips), 0, 0)
+    answers = b"".join(
+        struct.pack("!HHHIH", 0xC00C, QTYPE_A, QCLASS_IN, ttl, 4) + socket.inet_aton(ip)
+        for ip in ips
+    )
+    return header + question + answers
+
+
+def _udp_socket(host="0.0.0.0", port=0):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for opt in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opt, SOCKET_BUFFER)
+        except OSError:
+            pass
+    sock.bind((host, port))
+    sock.setblocking(False)
+    return sock
+
+
+# =============================
+#  RESOLVER ASYNCIO
+# =============================
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        try:
+            qid, qname, rcode, ips, ttl = parse_response(data)
+        except Exception:
+            return
+        entry = self.pending.get(qid)
+        if entry is None:
+            return
+        name, fut = entry
+        # Tolak balasan nyasar yang ID-nya kebetulan sama
+        if qname and qname != name:
+            return
+        if not fut.done():
+            fut.set_result((rcode, ips, ttl))
+
+    def error_received(self, exc):
+        pass
+
+
+class AsyncResolver:
+    """Resolver A-record via UDP mentah, ribuan query bisa berjalan bersamaan.
+
+    Tiap query punya timeout sendiri dan diulang ke server berikutnya
+    (round-robin) sampai `retries` kali sebelum dianggap timeout. Jika
+    `limiter` (adaptive.AIMDLimiter) diberikan, jumlah query bersamaan
+    diatur limiter itu dengan max_inflight sebagai batas keras.
+    """
+
+    def __init__(self, servers=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 max_inflight=DEFAULT_INFLIGHT, port=DNS_PORT, limiter=None):
+        self.servers = [(s, port) if isinstance(s, str) else tuple(s)
+                        for s in (servers or DEFAULT_SERVERS)]
+        self.timeout = timeout
+        self.retries = retries
+        self.max_inflight = min(max_inflight, 60000)
+        self.limiter = limiter
+        self._pending = {}
+        self._transport = None
+        self._sem = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._sem = asyncio.Semaphore(self.max_inflight)
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ResolverProtocol(self._pending), sock=_udp_socket()
+        )
+        return self
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _new_qid(self):
+        while True:
+            qid = random.getrandbits(16)
+            if qid not in self._pending:
+                return qid
+
+    async def resolve(self, name):
+        name = name.rstrip(".").lower()
+        try:
+            packet_name = name.encode("idna")
+        except UnicodeError:
+            return DNSAnswer(STATUS_ERROR)
+        if not packet_name or len(packet_name) > 253:
+            return DNSAnswer(STATUS_ERROR)
+
+        async with self._sem:
+            if self.limiter is None:
+                return await self._query(name)
+            await self.limiter.acquire_async()
+            start = time.perf_counter()
+            answer = DNSAnswer(STATUS_ERROR)
+            try:
+                answer = await self._query(name)
+                return answer
+            finally:
+                self.limiter.release_async(time.perf_counter() - start, not answer.failed)
+
+    async def _query(self, name):
+        loop = asyncio.get_running_loop()
+        status = STATUS_TIMEOUT
+        for attempt in range(self.retries + 1):
+            server = self.servers[attempt % len(self.servers)]
+            qid = self._new_qid()
+            fut = loop.create_future()
+            self._pending[qid] = (name, fut)
+            try:
+                self._transport.sendto(build_query(name, qid), server)
+                rcode, ips, ttl = await asyncio.wait_for(fut, self.timeout)
+            except asyncio.TimeoutError:
+                status = STATUS_TIMEOUT
+                continue
+            except (OSError, ValueError):
+                status = STATUS_ERROR
+                continue
+            finally:
+                self._pending.pop(qid, None)
+
+            if rcode == RCODE_NXDOMAIN:
+                return DNSAnswer(STATUS_NXDOMAIN, (), ttl)
+            if rcode == 0:
+                if ips:
+                    return DNSAnswer(STATUS_OK, ips, ttl)
+                return DNSAnswer(STATUS_NXDOMAIN, (), ttl)
+            # SERVFAIL/REFUSED: coba server lain
+            status = STATUS_ERROR
+        return DNSAnswer(status)
+
+    async def resolve_many(self, names):
+        """Resolve banyak nama sekaligus, hasil berupa dict nama -> DNSAnswer."""
+        names = list(names)
+        answers = await asyncio.gather(*(self.resolve(n) for n in names))
+        return dict(zip(names, answers))
+
+
+def resolve_blocking(name, server, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """Versi blocking (1 socket per query) untuk pembanding jalur thread."""
+    name = name.rstrip(".").lower()
+    status = STATUS_TIMEOUT
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        for _ in range(retries + 1):
+            qid = random.getrandbits(16)
+            try:
+                sock.sendto(build_query(name, qid), server)
+                while True:
+                    data, _ = sock.recvfrom(4096)
+                    rid, _, rcode, ips, ttl = parse_response(data)
+                    if rid == qid:
+                        break
+            except socket.timeout:
+                status = STATUS_TIMEOUT
+                continue
+            except (OSError, UnicodeError):
+                return DNSAnswer(STATUS_ERROR)
+            if rcode == 0 and ips:
+                return DNSAnswer(STATUS_OK, ips, ttl)
+            if rcode in (0, RCODE_NXDOMAIN):
+                return DNSAnswer(STATUS_NXDOMAIN, (), ttl)
+            status = STATUS_ERROR
+    return DNSAnswer(status)
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+
+from dns_async import DNSAnswer, STATUS_OK, STATUS_NXDOMAIN
+
+# ================= KONFIGURASI =================
+CACHE_FILE = ".cache/dns_cache.sqlite"
+RUN_INTERVAL = 6 * 3600        # Jadwal workflow (.github/workflows/update.yml)
+# Lantai TTL positif: sedikit di atas jarak antar run (jitter cron + lama run), supaya
+# wildcard aktif masih tersimpan di run berikutnya; TTL asli dipakai jika lebih besar
+POSITIVE_MIN_TTL = RUN_INTERVAL + 3600
+POSITIVE_MAX_TTL = 3 * 86400   # Batas atas saja
+# Negatif cache selalu lebih pendek dari lantai positif
+NXDOMAIN_TTL = 3600            # Domain tidak ada
+FAILURE_TTL = 600              # Timeout / SERVFAIL, cepat dicoba ulang
+# ===============================================
+
+
+def ttl_for(answer):
+    """Lama (detik) sebuah jawaban boleh disimpan di cache."""
+    if answer.status == STATUS_OK:
+        return min(max(answer.ttl, POSITIVE_MIN_TTL), POSITIVE_MAX_TTL)
+    if answer.status == STATUS_NXDOMAIN:
+        return NXDOMAIN_TTL
+    return FAILURE_TTL
+
+
+class DNSCache:
+    """Cache hasil DNS per domain kombinasi, disimpan di SQLite.
+
+    Semua entri yang belum kedaluwarsa dimuat ke memori saat dibuka,
+    sehingga get()/put() aman dipanggil dari banyak thread tanpa query
+    SQLite. Entri baru ditulis sekaligus saat close().
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+        self.saved_time = 0.0
+        self._entries = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS dns_cache ("
+            " domain TEXT PRIMARY KEY, status TEXT NOT NULL, ips TEXT NOT NULL,"
+            " ttl INTEGER NOT NULL, expires REAL NOT NULL, cost REAL NOT NULL DEFAULT 0)"
+        )
+        return db
+
+    def _load(self):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM dns_cache WHERE expires <= ?", (now,))
+            rows = db.execute("SELECT domain, status, ips, ttl, expires, cost FROM dns_cache").fetchall()
+        for domain, status, ips, ttl, expires, cost in rows:
+            answer = DNSAnswer(status, tuple(ips.split(",")) if ips else (), ttl)
+            self._entries[domain] = (answer, expires, cost)
+
+    def get(self, domain):
+        """Jawaban yang masih berlaku, atau None (dihitung miss)."""
+        entry = self._entries.get(domain)
+        with self._lock:
+            if entry is not None and entry[1] > time.time():
+                self.hits += 1
+                self.saved_time += entry[2]
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def put(self, domain, answer, elapsed=0.0):
+        """Simpan jawaban; `elapsed` = lama lookup aslinya (untuk estimasi hemat)."""
+        entry = (answer, time.time() + ttl_for(answer), elapsed)
+        with self._lock:
+            self._entries[domain] = entry
+            self._dirty[domain] = entry
+            self.lookup_time += elapsed
+
+    def close(self):
+        with self._lock:
+            rows = [
+                (domain, a.status, ",".join(a.ips), a.ttl, expires, cost)
+                for domain, (a, expires, cost) in self._dirty.items()
+            ]
+            self._dirty.clear()
+        if rows:
+            with self._connect() as db:
+                db.executemany("INSERT OR REPLACE INTO dns_cache VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def reload(self):
+        """Simpan entri baru lalu muat ulang dari SQLite (yang kedaluwarsa terbuang, statistik mulai nol).
+
+        Untuk proses yang hidup lama (daemon.py) supaya isi memori tidak terus bertambah.
+        """
+        self.close()
+        self._entries = {}
+        self.hits = self.misses = 0
+        self.lookup_time = self.saved_time = 0.0
+        self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return (
+            f"Cache DNS: {self.hits} hit, {self.misses} miss ({rate:.1f}% hit), "
+            f"lookup {self.lookup_time:.1f} detik, hemat ~{self.saved_time:.1f} detik"
+        )
@@ -0,0 +1,201 @@
+import base64
+import collections
+import hashlib
+import json
+from urllib.parse import urlparse, parse_qs, unquote
+
+# ================= KONFIGURASI =================
+KEEP_NAME = "first"   # Duplikat: "first" = nama pertama, "last" = nama terakhir, "shortest" = nama terpendek
+# ===============================================
+
+KEEP_RULES = ("first", "last", "shortest")
+
+# Fingerprint = hash field yang menentukan server sebenarnya: tipe, server,
+# port, kredensial, network, path & host WS. Nama/fragment tidak ikut,
+# jadi node yang sama dari subscription berbeda dianggap satu.
+
+
+def digest(*fields):
+    raw = "\0".join("" if f is None else str(f) for f in fields)
+    return hashlib.blake2b(raw.encode("utf-8", errors="replace"), digest_size=16).digest()
+
+
+def _lower(value):
+    return str(value or "").strip().lower()
+
+
+def proxy_key(proxy):
+    """(fingerprint, nama) untuk proxy hasil parse (dict format Clash)."""
+    ws = proxy.get("ws-opts") or {}
+    host = (ws.get("headers") or {}).get("Host") or proxy.get("servername") or proxy.get("sni")
+    credential = proxy.get("uuid") or proxy.get("password")
+    if proxy.get("type") == "ss":
+        credential = f"{proxy.get('cipher')}:{credential}"
+    fp = digest(
+        proxy.get("type"), _lower(proxy.get("server")), proxy.get("port"), credential,
+        proxy.get("network"), ws.get("path"), _lower(host),
+    )
+    return fp, proxy.get("name", "")
+
+
+def decode_base64(data):
+    data = data.replace("-", "+").replace("_", "/")
+    return base64.b64decode(data + "=" * (-len(data) % 4)).decode("utf-8", errors="ignore")
+
+
+def _vmess_key(line):
+    js = json.loads(decode_base64(line[8:]))
+    if not js.get("add"):
+        return None
+    fp = digest(
+        "vmess", _lower(js.get("add")), js.get("port"), js.get("id"),
+        js.get("net") or js.get("network"), js.get("path"), _lower(js.get("host") or js.get("sni")),
+    )
+    return fp, js.get("ps", "")
+
+
+def _url_key(line, scheme):
+    u = urlparse(line)
+    if not u.hostname:
+        return None
+    q = parse_qs(u.query)
+    credential = unquote(u.username or "")
+    if u.password:
+        credential += ":" + unquote(u.password)
+    fp = digest(
+        scheme, _lower(u.hostname), u.port, credential, q.get("type", ["tcp"])[0],
+        q.get("path", [""])[0], _lower(q.get("host", q.get("sni", [""]))[0]),
+    )
+    return fp, unquote(u.fragment)
+
+
+def _ss_key(line):
+    main, _, name = line[5:].partition("#")
+    main, _, query = main.partition("?")
+    main = main.rstrip("/")
+    if "@" not in main:
+        main = decode_base64(main)
+    userinfo, _, host_port = main.rpartition("@")
+    if ":" not in userinfo:
+        userinfo = decode_base64(userinfo)
+    host, _, port = host_port.rpartition(":")
+    if not host:
+        return None
+    plugin = parse_qs(query).get("plugin", [""])[0]
+    return digest("ss", _lower(host), port, userinfo, plugin), unquote(name)
+
+
+def _ssr_key(line):
+    decoded = decode_base64(line[6:])
+    main, _, query = decoded.partition("/?")
+    if not main:
+        return None
+    remarks = parse_qs(query).get("remarks", [""])[0]
+    return digest("ssr", main.lower(), parse_qs(query).get("obfsparam", [""])[0]), decode_base64(remarks) if remarks else ""
+
+
+def link_key(line):
+    """(fingerprint, nama) untuk link mentah, None jika tidak bisa di-parse.
+
+    Link tanpa fingerprint tidak pernah dianggap duplikat.
+    """
+    line = line.strip()
+    scheme, sep, _ = line.partition("://")
+    scheme = scheme.lower() if sep else ""
+    try:
+        if scheme == "vmess":
+            return _vmess_key(line)
+        if scheme in ("vless", "trojan", "hy2", "hysteria2", "tuic"):
+            return _url_key(line, scheme)
+        if scheme == "ss":
+            return _ss_key(line)
+        if scheme == "ssr":
+            return _ssr_key(line)
+    except Exception:
+        pass
+    return None
+
+
+class FingerprintIndex:
+    """Index fingerprint -> item terpilih, urutan sesuai kemunculan pertama.
+
+    Item tanpa fingerprint (None) selalu disimpan. Untuk duplikat, aturan
+    `keep` menentukan apakah item baru menggantikan item lama (posisinya
+    tetap di kemunculan pertama).
+    """
+
+    def __init__(self, keep=None):
+        keep = keep or KEEP_NAME
+        if keep not in KEEP_RULES:
+            raise ValueError(f"aturan nama tidak dikenal: {keep}")
+        self.keep = keep
+        self.duplicates = 0
+        self._pos = {}
+        self._items = []
+        self._names = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, fp):
+        return fp in self._pos
+
+    def _prefer(self, new, old):
+        if self.keep == "last":
+            return True
+        if self.keep == "shortest":
+            return len(new or "") < len(old or "")
+        return False
+
+    def add(self, fp, item, name=""):
+        """Tambahkan item, kembalikan False jika fingerprint sudah ada."""
+        if fp is not None:
+            pos = self._pos.get(fp)
+            if pos is not None:
+                self.duplicates += 1
+                if self._prefer(name, self._names[pos]):
+                    self._items[pos] = item
+                    self._names[pos] = name
+                return False
+            self._pos[fp] = len(self._items)
+        self._items.append(item)
+        self._names.append(name)
+        return True
+
+    def items(self):
+        return list(self._items)
+
+
+def dedup(items, key, keep=None, on_duplicate=None, limit=None):
+    """Yield item unik menurut key(item) -> (fingerprint, nama) atau None.
+
+    keep="first" berjalan streaming (hanya menyimpan fingerprint); aturan
+    lain perlu melihat semua item dulu sebelum yield. on_duplicate(item)
+    dipanggil untuk tiap duplikat.
+
+    `limit` (hanya keep="first") = maksimal fingerprint yang diingat (LRU):
+    memori tetap kecil, tapi duplikat yang berjarak lebih jauh dari itu
+    bisa lolos (best-effort).
+    """
+    if (keep or KEEP_NAME) == "first":
+        seen = collections.OrderedDict()
+        for item in items:
+            k = key(item)
+            if k is not None:
+                if k[0] in seen:
+                    seen.move_to_end(k[0])
+                    if on_duplicate:
+                        on_duplicate(item)
+                    continue
+                seen[k[0]] = None
+                if limit and len(seen) > limit:
+                    seen.popitem(last=False)
+            yield item
+        return
+
+    index = FingerprintIndex(keep)
+    for item in items:
+        fp, name = key(item) or (None, "")
+        if not index.add(fp, item, name) and on_duplicate:
+            on_duplicate(item)
+    yield from index.items()
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import metrics
+
+# ================= KONFIGURASI =================
+STORE_FILE = ".cache/health.sqlite"
+FAIL_THRESHOLD = 2          # Gagal berturut-turut sebelum host mulai di-backoff
+BASE_BACKOFF = 6 * 3600     # Jeda cek ulang pertama, dikali 2 tiap gagal berikutnya
+MAX_BACKOFF = 7 * 86400
+FORGET_AFTER = 30 * 86400   # Host yang tidak dicek selama ini dibuang (sudah hilang dari sumber)
+# ===============================================
+
+# Riwayat hasil cek per host antar run. Host yang sehat (atau baru gagal
+# kurang dari FAIL_THRESHOLD kali) selalu dicek tiap run; host yang terus
+# gagal baru dicek lagi setelah BASE_BACKOFF, 2x, 4x, ... (maks MAX_BACKOFF)
+# dan sampai jadwal itu dianggap mati tanpa cek. Satu kali cek sukses
+# mengembalikan host ke jadwal normal.
+#
+# Jadwal bisa dilihat dengan:
+#   python health_store.py [--scope dns|liveness] [--due] [--limit 50]
+
+
+def backoff(failures):
+    """Jeda (detik) sebelum host dengan `failures` gagal berturut-turut dicek lagi."""
+    if failures < FAIL_THRESHOLD:
+        return 0
+    return min(BASE_BACKOFF * 2 ** min(failures - FAIL_THRESHOLD, 32), MAX_BACKOFF)
+
+
+def _connect(path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS health ("
+        " scope TEXT NOT NULL, host TEXT NOT NULL, failures INTEGER NOT NULL,"
+        " last_check REAL NOT NULL, next_probe REAL NOT NULL, timeout INTEGER NOT NULL,"
+        " cost REAL NOT NULL, PRIMARY KEY (scope, host))"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS health_schedule ON health (scope, next_probe)")
+    return db
+
+
+class HealthStore:
+    """Riwayat sehat/gagal host untuk satu jenis cek (`scope`), disimpan di SQLite.
+
+    Seperti dns_cache.DNSCache: semua entri scope dimuat ke memori saat
+    dibuka sehingga due()/record() aman dari banyak thread, entri yang
+    berubah ditulis saat close() (boleh dipanggil lebih dari sekali).
+    """
+
+    def __init__(self, path=STORE_FILE, scope="dns"):
+        self.path = path
+        self.scope = scope
+        self.skipped = 0
+        self.avoided_timeouts = 0
+        self.saved_time = 0.0
+        self.backed_off = 0   # Host yang mulai di-backoff run ini
+        self.recovered = 0    # Host yang sebelumnya gagal lalu sukses lagi
+        self._entries = {}    # host -> (failures, last_check, next_probe, timeout, cost)
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        with _connect(self.path) as db:
+            db.execute("DELETE FROM health WHERE last_check <= ?", (time.time() - FORGET_AFTER,))
+            rows = db.execute(
+                "SELECT host, failures, last_check, next_probe, timeout, cost FROM health WHERE scope = ?",
+                (self.scope,),
+            ).fetchall()
+        for host, *entry in rows:
+            self._entries[host] = tuple(entry)
+
+    def due(self, host):
+        """True jika host perlu dicek run ini; False (dihitung dilewati) jika masih di-backoff."""
+        entry = self._entries.get(host)
+        if entry is None or entry[2] <= time.time():
+            return True
+        with self._lock:
+            self.skipped += 1
+            self.avoided_timeouts += entry[3]
+            self.saved_time += entry[4]
+        metrics.count(f"health.{self.scope}.dilewati")
+        if entry[3]:
+            metrics.count(f"health.{self.scope}.timeout_dihindari")
+        return False
+
+    def record(self, host, ok, timeout=False, elapsed=0.0):
+        """Catat hasil satu cek; `elapsed` = lama cek (estimasi waktu yang dihemat saat dilewati)."""
+        now = time.time()
+        with self._lock:
+            failures = self._entries.get(host, (0,))[0]
+            if ok:
+                self.recovered += failures > 0
+                failures = 0
+            else:
+                failures += 1
+                self.backed_off += failures == FAIL_THRESHOLD
+            entry = (failures, now, now + backoff(failures), int(timeout and not ok), elapsed)
+            self._entries[host] = entry
+            self._dirty[host] = entry
+
+    def close(self):
+        with self._lock:
+            rows = [(self.scope, host, *entry) for host, entry in self._dirty.items()]
+            self._dirty.clear()
+        if rows:
+            with _connect(self.path) as db:
+                db.executemany("INSERT OR REPLACE INTO health VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def reload(self):
+        """Simpan entri yang berubah lalu muat ulang dari SQLite (host lama terbuang, statistik mulai nol)."""
+        self.close()
+        self._entries = {}
+        self.skipped = self.avoided_timeouts = self.backed_off = self.recovered = 0
+        self.saved_time = 0.0
+        self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self):
+        waiting = sum(1 for e in self._entries.values() if e[2] > time.time())
+        return (
+            f"Health {self.scope}: {self.skipped} host mati dilewati (backoff), "
+            f"{self.avoided_timeouts} timeout dihindari, hemat ~{self.saved_time:.1f} detik; "
+            f"{self.backed_off} host mulai di-backoff, {self.recovered} pulih, {waiting} menunggu jadwal"
+        )
+
+
+def schedule(path=STORE_FILE, scope=None, due_only=False, limit=None):
+    """Jadwal cek berikutnya (urut paling cepat), list dict per host."""
+    sql = "SELECT scope, host, failures, last_check, next_probe, timeout, cost FROM health"
+    where, args = [], []
+    if scope:
+        where.append("scope = ?")
+        args.append(scope)
+    if due_only:
+        where.append("next_probe <= ?")
+        args.append(time.time())
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY next_probe, scope, host"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    with _connect(path) as db:
+        rows = db.execute(sql, args).fetchall()
+    keys = ("scope", "host", "failures", "last_check", "next_probe", "timeout", "cost")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def main():
+    """python health_store.py [--scope dns] [--due] [--limit 50] [--file .cache/health.sqlite]"""
+    args = sys.argv[1:]
+
+    def option(name, cast=str):
+        return cast(args[args.index(name) + 1]) if name in args else None
+
+    for row in schedule(option("--file") or STORE_FILE, option("--scope"), "--due" in args, option("--limit", int)):
+        row["last_check"], row["next_probe"] = _iso(row["last_check"]), _iso(row["next_probe"])
+        row["timeout"] = bool(row["timeout"])
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
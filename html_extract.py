@@ -0,0 +1,76 @@
+import codecs
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+# ================= KONFIGURASI =================
+CHUNK_SIZE = 8192   # Byte per potongan yang dibaca dari response
+# ===============================================
+
+
+class _InputFinder(HTMLParser):
+    """Parser incremental yang berhenti mencatat begitu input#<id> ketemu."""
+
+    def __init__(self, input_id):
+        super().__init__(convert_charrefs=True)
+        self.input_id = input_id
+        self.attrs = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.attrs is None and tag == "input":
+            found = dict(attrs)
+            if found.get("id") == self.input_id:
+                self.attrs = found
+
+    handle_startendtag = handle_starttag
+
+
+def find_input(chunks, input_id="subscription"):
+    """Cari atribut <input id=input_id> dari iterator potongan teks HTML.
+
+    Berhenti membaca begitu input ditemukan. Kembalikan (attrs, teks_dibaca);
+    attrs None jika tidak ketemu.
+    """
+    finder = _InputFinder(input_id)
+    seen = []
+    for text in chunks:
+        seen.append(text)
+        try:
+            finder.feed(text)
+        except Exception:
+            # HTML rusak: serahkan ke fallback BeautifulSoup
+            break
+        if finder.attrs is not None:
+            return finder.attrs, "".join(seen)
+    return None, "".join(seen)
+
+
+def _decoded_chunks(response):
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    for chunk in response.iter_content(CHUNK_SIZE):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def find_input_bs4(text, input_id="subscription"):
+    """Jalur lama: parse seluruh halaman dengan BeautifulSoup."""
+    inp = BeautifulSoup(text, "html.parser").find("input", id=input_id)
+    return dict(inp.attrs) if inp else None
+
+
+def extract_input(response, input_id="subscription"):
+    """Ambil atribut input#<input_id> dari response yang di-request dengan stream=True.
+
+    Response dibaca per potongan dan ditutup begitu input ditemukan, jadi
+    sisa halaman tidak perlu diunduh. Jika parser incremental gagal,
+    teks yang sudah terbaca (plus sisanya) di-parse ulang dengan
+    BeautifulSoup sebagai fallback.
+    """
+    chunks = _decoded_chunks(response)
+    try:
+        attrs, seen = find_input(chunks, input_id)
+        if attrs is not None:
+            return attrs
+        return find_input_bs4(seen + "".join(chunks), input_id)
+    finally:
+        response.close()
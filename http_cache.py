@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+import requests
+
+# ================= KONFIGURASI =================
+CACHE_DIR = ".cache/http"
+# ===============================================
+
+# url -> True jika isi sama dengan run sebelumnya (304 / hash sama)
+_status = {}
+
+
+class FetchResult(NamedTuple):
+    text: str
+    unchanged: bool
+
+
+def _paths(url, cache_dir):
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, key + ".json"), os.path.join(cache_dir, key + ".body")
+
+
+def _load_meta(url, cache_dir):
+    meta_path, body_path = _paths(url, cache_dir)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url or not os.path.exists(body_path):
+        return None
+    return meta
+
+
+def _conditional_headers(meta, headers=None):
+    headers = dict(headers or {})
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _save(url, response, body, digest, cache_dir):
+    """Simpan meta + body secara atomik (body dulu, meta terakhir)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path, body_path = _paths(url, cache_dir)
+    if body is not None:
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(body_path + ".tmp", body_path)
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": digest,
+        "encoding": response.encoding or "utf-8",
+    }
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _read_body(url, cache_dir):
+    with open(_paths(url, cache_dir)[1], "rb") as f:
+        return f.read()
+
+
+def fetch(url, session=None, timeout=10, headers=None, cache_dir=CACHE_DIR):
+    """GET dengan If-None-Match/If-Modified-Since.
+
+    Jika server membalas 304 (atau isinya identik dengan cache), body lama
+    dipakai dan `unchanged` bernilai True. Error HTTP tetap di-raise.
+    """
+    meta = _load_meta(url, cache_dir)
+    r = (session or requests).get(url, headers=_conditional_headers(meta, headers), timeout=timeout)
+
+    if r.status_code == 304 and meta:
+        body = _read_body(url, cache_dir)
+        unchanged = True
+    else:
+        r.raise_for_status()
+        body = r.content
+        digest = hashlib.sha256(body).hexdigest()
+        unchanged = bool(meta) and meta.get("sha256") == digest
+        _save(url, r, None if unchanged else body, digest, cache_dir)
+
+    _status[url] = unchanged
+    # Decode sama seperti response.text pada run yang menyimpan cache
+    encoding = (meta or {}).get("encoding") if r.status_code == 304 else r.encoding
+    return FetchResult(body.decode(encoding or "utf-8", errors="replace"), unchanged)
+
+
+def _split_lines(chunks):
+    """Baris dari potongan byte, sama dengan body.decode().splitlines() untuk body utuh.
+
+    Dipotong hanya di b"\n" terakhir tiap potongan sehingga \r\n dan karakter
+    multibyte tidak pernah terbelah di batas potongan.
+    """
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind(b"\n") + 1
+        if cut:
+            yield from pending[:cut].decode("utf-8", errors="ignore").splitlines()
+            pending = pending[cut:]
+    if pending:
+        yield from pending.decode("utf-8", errors="ignore").splitlines()
+
+
+def _read_lines(url, cache_dir):
+    """Baris body cache dibaca per potongan, tanpa memuat seluruh file."""
+    with open(_paths(url, cache_dir)[1], "rb") as f:
+        yield from _split_lines(iter(lambda: f.read(65536), b""))
+
+
+def fetch_lines(url, session=None, timeout=15, headers=None, cache_dir=CACHE_DIR):
+    """Versi streaming: kembalikan (unchanged, iterator baris).
+
+    Saat 200, byte mentah dibaca langsung dari jaringan sambil disalin ke
+    cache & di-hash persis seperti fetch(); cache baru di-commit setelah
+    iterator habis dibaca; saat 304 baris dibaca per potongan dari body
+    cache. `unchanged` yang dikembalikan hanya True untuk 304; body 200 yang ternyata identik baru tercatat di all_unchanged()
+    setelah iterator habis.
+    """
+    meta = _load_meta(url, cache_dir)
+    r = (session or requests).get(
+        url, headers=_conditional_headers(meta, headers), timeout=timeout, stream=True
+    )
+
+    if r.status_code == 304 and meta:
+        r.close()
+        _status[url] = True
+        return True, _read_lines(url, cache_dir)
+
+    r.raise_for_status()
+    _status[url] = False
+
+    def chunks(f, digest):
+        for chunk in r.iter_content(chunk_size=65536):
+            f.write(chunk)
+            digest.update(chunk)
+            yield chunk
+
+    def lines():
+        os.makedirs(cache_dir, exist_ok=True)
+        body_tmp = _paths(url, cache_dir)[1] + ".tmp"
+        digest = hashlib.sha256()
+        with r, open(body_tmp, "wb") as f:
+            yield from _split_lines(chunks(f, digest))
+        os.replace(body_tmp, _paths(url, cache_dir)[1])
+        _save(url, r, None, digest.hexdigest(), cache_dir)
+        _status[url] = bool(meta) and meta.get("sha256") == digest.hexdigest()
+
+    return False, lines()
+
+
+def all_unchanged(urls):
+    """True jika semua url sudah di-fetch run ini dan tidak ada yang berubah."""
+    urls = list(urls)
+    return bool(urls) and all(_status.get(u) is True for u in urls)
+
+
+def reset():
+    _status.clear()
+
+
+# ============================================
+# CAP BUILD OUTPUT
+# Sumber tidak berubah saja belum cukup untuk memakai output lama: output
+# itu juga harus dibangun dengan konfigurasi & kode yang sama dan selesai
+# utuh, bukan run yang terpotong budget. Tiap output yang ditulis diberi
+# cap di CACHE_DIR (ikut dipulihkan bersama cache HTTP di CI):
+#   salt      hash konfigurasi + isi file modul yang membangun output
+#   sha256    hash isi output saat ditulis (diubah di luar -> tidak cocok)
+#   complete  False jika run terpotong / output lama dipertahankan
+# ============================================
+def salt(config, *modules):
+    """Hash repr(config) + isi file sumber tiap modul."""
+    h = hashlib.sha256(repr(config).encode("utf-8"))
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def source_unchanged(urls, output, build_salt, cache_dir=CACHE_DIR):
+    """True jika semua `urls` 304/identik run ini dan `output` masih hasil build utuh dengan `build_salt`."""
+    return all_unchanged(urls) and stamped(output, build_salt, cache_dir)
+
+
+def _stamp_path(output, cache_dir):
+    key = hashlib.sha1(os.path.abspath(output).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "stamp-" + key + ".json")
+
+
+def _file_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def stamp(output, build_salt, complete=True, cache_dir=CACHE_DIR):
+    """Catat bahwa `output` baru saja ditulis dengan `build_salt` (utuh atau tidak)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _stamp_path(output, cache_dir)
+    data = {"output": output, "salt": build_salt, "sha256": _file_digest(output), "complete": bool(complete)}
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def stamped(output, build_salt, cache_dir=CACHE_DIR):
+    """True jika `output` masih persis hasil build utuh terakhir dengan `build_salt`."""
+    try:
+        with open(_stamp_path(output, cache_dir), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (data.get("complete") is True and data.get("salt") == build_salt
+            and data.get("sha256") is not None and data["sha256"] == _file_digest(output))
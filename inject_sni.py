@@ -2,27 +2,219 @@ import requests
 import base64
 import json
 import socket
+import asyncio
+import collections
 import concurrent.futures
+import contextlib
+import os
 import re
+import secrets
+import sys
+import threading
+import itertools
+import time
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
+import adaptive
+import budget
+import cpu_pool
+import dns_async
+import dns_cache
+import fingerprint
+import health_store
+import http_cache
+import latency
+import link_splice
+import link_state
+import metrics
+import node_index
+import parallel_fetch
+import sharding
+
 # ================= KONFIGURASI =================
 URL_SUMBER = "https://raw.githubusercontent.com/ebrasha/free-v2ray-public-list/refs/heads/main/V2Ray-Config-By-EbraSha-All-Type.txt"
 BUG_DOMAIN = "support.zoom.us"
 OUTPUT_FILE = "akun_wildcard_aktif.txt"
-MAX_THREADS = 30 # Kecepatan cek
+
+# MULTI BUG DOMAIN: bug domain tambahan dicek dalam run yang sama (download, parse &
+# DNS sekali). Hasil BUG_DOMAIN tetap ke OUTPUT_FILE, tiap domain tambahan ke
+# file sendiri (output_file_for(), mis. akun_wildcard_aktif.m.youtube.com.txt).
+# Dukungan wildcard tiap host dicek sekali lewat "<label acak>.<host>" dan berlaku
+# untuk semua bug domain; lookup per kombinasi hanya jika probe itu timeout/error.
+EXTRA_BUG_DOMAINS = []
+MAX_THREADS = 30 # Kecepatan cek (batas awal jika ADAPTIVE_CONCURRENCY aktif)
 
 # FILTER JARINGAN
 FILTER_WS_ONLY = True  # Ubah ke False jika ingin mengambil jaringan selain Websocket (TCP/gRPC/dll)
+
+# ENGINE DNS
+DNS_ENGINE = "async"   # "async" = UDP asyncio (cepat, ada timeout), "thread" = socket.gethostbyname + ThreadPool
+DNS_SERVERS = ["1.1.1.1", "8.8.8.8", "9.9.9.9"]
+DNS_TIMEOUT = 2.0      # Detik per percobaan
+DNS_RETRIES = 2
+DNS_MAX_INFLIGHT = 1000
+
+# KONKURENSI ADAPTIF (AIMD, lihat adaptive.py): jumlah lookup DNS bersamaan naik
+# selama latency & rasio timeout stabil, turun saat resolver mulai lambat/timeout.
+# Engine "thread" mulai dari MAX_THREADS, engine "async" dari DNS_INITIAL_INFLIGHT.
+ADAPTIVE_CONCURRENCY = True
+MIN_THREADS = 4
+MAX_THREADS_LIMIT = 128
+DNS_MIN_INFLIGHT = 50
+DNS_INITIAL_INFLIGHT = 200   # Batas atas engine async tetap DNS_MAX_INFLIGHT
+
+# CACHE DNS (TTL positif/negatif diatur di dns_cache.py)
+USE_DNS_CACHE = True
+DNS_CACHE_FILE = dns_cache.CACHE_FILE
+
+# RIWAYAT HEALTH (health_store.py): domain kombinasi yang terus gagal di-resolve
+# dicek ulang dengan backoff eksponensial antar run (dianggap mati sampai
+# jadwalnya), domain yang aktif tetap dicek tiap run. Dicek setelah cache DNS.
+USE_HEALTH_STORE = True
+HEALTH_FILE = health_store.STORE_FILE
+
+# MODE STREAMING (memori tetap kecil berapapun jumlah baris sumber)
+STREAMING_MODE = False  # True = baca sumber per baris & tulis hasil langsung ke disk
+STREAM_WINDOW = 5000    # Maksimal link yang menunggu hasil DNS sekaligus
+STREAM_MEMO = 50000     # Maksimal domain (dan fingerprint dedup) yang diingat di memori (LRU)
+
+# CACHE HTTP: jika sumber membalas 304 / isinya sama, OUTPUT_FILE lama dipakai
+# (hanya jika dibangun utuh dengan konfigurasi & kode yang sama, lihat build_salt)
+USE_HTTP_CACHE = True
+
+# MODE INCREMENTAL: link yang tidak berubah & sudah dicek < REVALIDATE_AFTER
+# detik lalu langsung dipakai ulang hasilnya tanpa resolve
+INCREMENTAL_MODE = True
+STATE_FILE = link_state.STATE_FILE
+REVALIDATE_AFTER = link_state.REVALIDATE_AFTER
+
+# MODE PROCESS POOL: tahap CPU (decode base64/JSON, urlparse, rewrite) jalan
+# per potongan di beberapa proses (cpu_pool.WORKERS), terpisah dari tahap
+# I/O DNS. Hanya untuk mode non-streaming; tetap serial dengan satu CPU atau
+# link kurang dari cpu_pool.MIN_BATCH.
+USE_PROCESS_POOL = False
+
+# REWRITE SPLICE: link vless/trojan/hy2/tuic/ss (SIP002) di-rewrite dengan menyambung
+# potongan aslinya (link_splice.py): hanya host, sni, host WS & fragment yang berubah,
+# parameter lain tetap byte per byte. False = jalur lama urlparse/urlencode/urlunparse
+# (yang meng-encode ulang semua parameter). Link yang tidak biasa selalu lewat jalur lama.
+SPLICE_REWRITE = True
+
+# DEDUP: link dengan server, port, kredensial, path & host sama (beda nama saja)
+# hanya dicek sekali. Nama yang dipakai diatur fingerprint.KEEP_NAME. Mode
+# streaming selalu memakai kemunculan pertama dan hanya mengingat STREAM_MEMO
+# fingerprint terakhir (best-effort: duplikat yang berjauhan bisa lolos).
+DEDUP_LINKS = True
+
+# RANKING LATENCY: ukur TCP connect + TLS handshake tiap akun hasil, buang yang
+# lambat & urutkan tercepat dulu (pengaturan di latency.py). Tidak berlaku
+# di mode streaming karena hasil langsung ditulis.
+RANK_BY_LATENCY = False
+
+# INDEX NODE: tulis juga node_index.path_for(OUTPUT_FILE) (JSON-lines per negara,
+# berisi IP hasil resolve, port, network, TLS, latency) untuk tool lain. Mode
+# streaming menulis barisnya ke file sementara per negara (node_index.SpoolBuilder)
+WRITE_NODE_INDEX = True
+
+# BUDGET WAKTU (budget.RUN_BUDGET / env SCRAPER_BUDGET): jika dibatasi, domain dicek
+# urut prioritas (negara pilihan ini dari nama link, lalu host yang sukses di
+# OUTPUT_FILE sebelumnya, lalu sisanya); yang belum dicek saat budget habis
+# dilewati dan akun yang sudah tervalidasi tetap ditulis. pipeline.py mengisi
+# daftar ini dengan gabungan prx.COUNTRY & acc.COUNTRIES.
+PREFERRED_COUNTRIES = ["id", "sg", "my"]
 # ===============================================
 
-def is_wildcard_active(domain):
-    """Mengecek apakah domain kombinasi bisa di-resolve ke IP (Aktif)."""
+_dns_cache = None  # Diisi main() jika USE_DNS_CACHE aktif
+_health = None  # Diisi main() jika USE_HEALTH_STORE aktif
+_link_state = None  # Diisi main() jika INCREMENTAL_MODE aktif
+_resolved_ips = {}  # Domain kombinasi aktif -> IP pertama (untuk index node)
+_probe_label = None  # Label acak probe wildcard, satu per run
+
+def query_name(domain):
+    """Nama yang benar-benar di-query: "*.host" (probe wildcard) jadi "<label acak>.host".
+
+    Cache & memo tetap memakai "*.host", jadi hasil probe bisa dipakai ulang
+    antar run walau labelnya berganti.
+    """
+    global _probe_label
+    if not domain.startswith("*."):
+        return domain
+    if _probe_label is None:
+        _probe_label = "wc-" + secrets.token_hex(6)
+    return f"{_probe_label}.{domain[2:]}"
+
+_EAI_NOT_FOUND = {getattr(socket, n) for n in ("EAI_NONAME", "EAI_NODATA") if hasattr(socket, n)}
+
+def lookup_blocking(domain):
+    """Resolve via resolver sistem, hasil dalam bentuk DNSAnswer."""
     try:
-        socket.gethostbyname(domain)
-        return True
-    except socket.error:
-        return False
+        return dns_async.DNSAnswer(dns_async.STATUS_OK, (socket.gethostbyname(domain),))
+    except socket.gaierror as e:
+        if e.errno in _EAI_NOT_FOUND:
+            return dns_async.DNSAnswer(dns_async.STATUS_NXDOMAIN)
+        if e.errno == getattr(socket, "EAI_AGAIN", None):
+            return dns_async.DNSAnswer(dns_async.STATUS_TIMEOUT)
+        return dns_async.DNSAnswer(dns_async.STATUS_ERROR)
+    except (socket.error, UnicodeError):
+        return dns_async.DNSAnswer(dns_async.STATUS_ERROR)
+
+def make_dns_limiter():
+    """AIMDLimiter untuk DNS_ENGINE aktif, None jika ADAPTIVE_CONCURRENCY mati."""
+    if not ADAPTIVE_CONCURRENCY:
+        return None
+    if DNS_ENGINE == "async":
+        return adaptive.AIMDLimiter("dns", DNS_INITIAL_INFLIGHT, DNS_MIN_INFLIGHT, DNS_MAX_INFLIGHT)
+    return adaptive.AIMDLimiter("dns", MAX_THREADS, MIN_THREADS, MAX_THREADS_LIMIT)
+
+def remember_answer(domain, answer):
+    """Catat IP domain aktif untuk index node (mode non-streaming, sekali per domain unik)."""
+    if answer.active:
+        _resolved_ips[domain] = answer.ips[0]
+    return answer
+
+# Jawaban pengganti untuk domain yang masih di-backoff: tidak aktif, tapi bukan
+# kegagalan (probe "*.host" tidak diteruskan ke lookup per kombinasi)
+BACKOFF_ANSWER = dns_async.DNSAnswer(dns_async.STATUS_NXDOMAIN)
+
+def backed_off(domain):
+    """True jika domain masih dalam jadwal backoff health store (tidak perlu di-resolve)."""
+    return _health is not None and not _health.due(domain)
+
+def record_health(domain, answer, elapsed):
+    if _health is not None:
+        _health.record(domain, answer.active, answer.status == dns_async.STATUS_TIMEOUT, elapsed)
+
+def lookup_answer(domain, limiter=None, revalidate=False):
+    """DNSAnswer domain kombinasi (atau probe "*.host") lewat resolver sistem + cache.
+
+    `revalidate` = selalu resolve ulang (hasilnya tetap disimpan ke cache).
+    """
+    if _dns_cache is not None and not revalidate:
+        cached = _dns_cache.get(domain)
+        if cached is not None:
+            return cached
+    if backed_off(domain):
+        return BACKOFF_ANSWER
+
+    start = time.perf_counter()
+    if limiter is None:
+        answer = lookup_blocking(query_name(domain))
+    else:
+        answer = limiter.call(lookup_blocking, query_name(domain), ok=lambda a: not a.failed)
+    elapsed = time.perf_counter() - start
+    metrics.observe("dns", elapsed)
+    if _dns_cache is not None:
+        _dns_cache.put(domain, answer, elapsed)
+    record_health(domain, answer, elapsed)
+    return answer
+
+def is_wildcard_active(domain, limiter=None, revalidate=False):
+    """Mengecek apakah domain kombinasi bisa di-resolve ke IP (Aktif)."""
+    return remember_answer(domain, lookup_answer(domain, limiter, revalidate)).active
+
+def reject(protocol, reason):
+    """Catat alasan link ditolak ke metrics, selalu kembalikan None."""
+    return metrics.reject("inject_sni", protocol, reason)
 
 def decode_base64(data):
     """Fungsi aman untuk decode base64 standar maupun urlsafe"""
@@ -43,37 +235,53 @@ def modify_url_hostname(parsed, new_hostname):
         netloc = f"{auth}@{netloc}"
     return parsed._replace(netloc=netloc)
 
-def process_vmess(link):
+# =============================
+#  TAHAP PARSE (PLAN)
+#  Tiap plan_* mengembalikan (host_target, rewrite) atau None.
+#  rewrite(combined_domain) menghasilkan link baru, dipanggil
+#  hanya jika domain kombinasi terbukti aktif.
+# =============================
+def plan_vmess(link):
     try:
         b64_data = link[8:]
-        data = json.loads(decode_base64(b64_data))
+        raw = decode_base64(b64_data)
+    except Exception:
+        return reject("vmess", "decode")
+
+    try:
+        data = json.loads(raw)
 
         # [FILTER] Cek apakah menggunakan Websocket
         if FILTER_WS_ONLY:
             net_type = data.get('net') or data.get('network')
             if net_type != 'ws':
-                return None
+                return reject("vmess", "ws")
 
         orig_sni = data.get('sni') or data.get('host') or data.get('add')
-        if not orig_sni: return None
-
-        combined_domain = f"{BUG_DOMAIN}.{orig_sni}"
-        if not is_wildcard_active(combined_domain): return None
+        if not orig_sni: return reject("vmess", "host")
+        orig_ps = data.get('ps', 'VMess')
+    except Exception:
+        return reject("vmess", "json")
 
+    def rewrite(combined_domain):
         # Modifikasi VMESS
         data['add'] = combined_domain
         data['sni'] = combined_domain
         data['host'] = combined_domain # Wajib untuk WS
         
-        data['ps'] = f"[WS Wildcard] {data.get('ps', 'VMess')}"
+        data['ps'] = f"[WS Wildcard] {orig_ps}"
 
         new_b64 = base64.b64encode(json.dumps(data).encode('utf-8')).decode('utf-8')
         return "vmess://" + new_b64
-    except Exception:
-        return None
 
-def process_url_based(link, protocol):
+    return orig_sni, rewrite
+
+def plan_url_based(link, protocol):
     """Untuk Vless, Trojan, Hysteria2 (hy2), dan TUIC"""
+    if SPLICE_REWRITE:
+        spans = link_splice.split_url(link)
+        if spans is not None:
+            return plan_url_spliced(spans, protocol)
     try:
         parsed = urlparse(link)
         qs = parse_qs(parsed.query)
@@ -82,30 +290,82 @@ def process_url_based(link, protocol):
         if FILTER_WS_ONLY:
             net_type = qs.get('type', ['tcp'])[0]
             if net_type != 'ws':
-                return None
+                return reject(protocol, "ws")
 
         orig_sni = qs.get('sni', [parsed.hostname])[0]
-        if not orig_sni: return None
-
-        combined_domain = f"{BUG_DOMAIN}.{orig_sni}"
-        if not is_wildcard_active(combined_domain): return None
+        if not orig_sni: return reject(protocol, "host")
+    except Exception:
+        return reject(protocol, "parse")
 
+    def rewrite(combined_domain):
         # Ubah SNI & Host
         qs['sni'] = [combined_domain]
         qs['host'] = [combined_domain] # Wajib untuk WS
         
-        parsed = modify_url_hostname(parsed, combined_domain)
+        new_parsed = modify_url_hostname(parsed, combined_domain)
 
         new_query = urlencode(qs, doseq=True)
         new_fragment = f"[WS Wildcard] {parsed.fragment}" if parsed.fragment else f"[{protocol.upper()}] WS Wildcard"
         
-        new_parsed = parsed._replace(query=new_query, fragment=new_fragment)
+        new_parsed = new_parsed._replace(query=new_query, fragment=new_fragment)
         return urlunparse(new_parsed)
-    except Exception:
-        return None
 
-def process_ss(link):
+    return orig_sni, rewrite
+
+def plan_url_spliced(spans, protocol):
+    """plan_url_based tanpa urllib: keputusan filter & host sama, rewrite lewat splice."""
+    # [FILTER] Cek apakah menggunakan Websocket
+    if FILTER_WS_ONLY and (spans.param('type') or 'tcp') != 'ws':
+        return reject(protocol, "ws")
+
+    orig_sni = spans.param('sni') or spans.hostname
+    if not orig_sni: return reject(protocol, "host")
+    fragment = spans.fragment
+
+    def rewrite(combined_domain):
+        # Ubah host, SNI & Host (wajib untuk WS), parameter lain tidak disentuh
+        new_fragment = f"[WS Wildcard] {fragment}" if fragment else f"[{protocol.upper()}] WS Wildcard"
+        return spans.splice(combined_domain, {'sni': combined_domain, 'host': combined_domain}, new_fragment)
+
+    return orig_sni, rewrite
+
+def plan_ss_spliced(link, spans):
+    """plan_ss untuk format SIP002 (userinfo@host:port) tanpa urllib.
+
+    Userinfo disalin apa adanya (jalur lama meng-encode ulang ke base64,
+    termasuk userinfo yang sudah base64 sehingga jadi ganda).
+    """
+    fragment = link.split('#')[1] if '#' in link else "SS"
+    plugin_str = spans.param('plugin') or ''
+
+    # [FILTER] Cek apakah plugin SS menggunakan Websocket
+    if FILTER_WS_ONLY:
+        if 'ws' not in plugin_str and 'websocket' not in plugin_str:
+            return reject("ss", "ws")
+
+    plugin_host = None
+    if plugin_str:
+        m = re.search(r'(obfs-host|host)=([^;]+)', plugin_str)
+        if m: plugin_host = m.group(2)
+
+    target_domain = plugin_host if plugin_host else spans.hostname
+    if not target_domain: return reject("ss", "host")
+
+    def rewrite(combined_domain):
+        params = None
+        if plugin_host:
+            new_plugin = re.sub(r'((?:obfs-host|host)=)[^;]+', r'\g<1>' + combined_domain, plugin_str)
+            params = {'plugin': link_splice.plugin_host_replacer(combined_domain, new_plugin)}
+        return spans.splice(combined_domain.lower(), params, f"[WS Wildcard] {fragment}")
+
+    return target_domain, rewrite
+
+def plan_ss(link):
     """Menangani Shadowsocks (ss://)"""
+    if SPLICE_REWRITE and '@' in link.split('#')[0]:
+        spans = link_splice.split_url(link)
+        if spans is not None and spans.host_start > len("ss://"):
+            return plan_ss_spliced(link, spans)
     try:
         fragment = link.split('#')[1] if '#' in link else "SS"
         main_part = link.split('#')[0][5:]
@@ -124,7 +384,7 @@ def process_ss(link):
         # [FILTER] Cek apakah plugin SS menggunakan Websocket
         if FILTER_WS_ONLY:
             if 'ws' not in plugin_str and 'websocket' not in plugin_str:
-                return None
+                return reject("ss", "ws")
 
         plugin_host = None
         if plugin_str:
@@ -132,34 +392,35 @@ def process_ss(link):
             if m: plugin_host = m.group(2)
         
         target_domain = plugin_host if plugin_host else orig_host
-        if not target_domain: return None
-        
-        combined_domain = f"{BUG_DOMAIN}.{target_domain}"
-        if not is_wildcard_active(combined_domain): return None
-        
+        if not target_domain: return reject("ss", "host")
+    except Exception:
+        return reject("ss", "parse")
+
+    def rewrite(combined_domain):
+        new_parsed = parsed
         if plugin_str and plugin_host:
             new_plugin = re.sub(r'((?:obfs-host|host)=)[^;]+', r'\g<1>' + combined_domain, plugin_str)
             qs['plugin'] = [new_plugin]
             
-        parsed = modify_url_hostname(parsed, combined_domain)
+        new_parsed = modify_url_hostname(new_parsed, combined_domain)
         new_query = urlencode(qs, doseq=True)
         
-        if parsed.username:
-            userinfo = f"{parsed.username}:{parsed.password}" if parsed.password else parsed.username
+        if new_parsed.username:
+            userinfo = f"{new_parsed.username}:{new_parsed.password}" if new_parsed.password else new_parsed.username
             b64_userinfo = base64.urlsafe_b64encode(userinfo.encode('utf-8')).decode('utf-8').rstrip('=')
-            netloc = f"{b64_userinfo}@{parsed.hostname}"
-            if parsed.port: netloc += f":{parsed.port}"
-            parsed = parsed._replace(netloc=netloc)
+            netloc = f"{b64_userinfo}@{new_parsed.hostname}"
+            if new_parsed.port: netloc += f":{new_parsed.port}"
+            new_parsed = new_parsed._replace(netloc=netloc)
 
-        parsed = parsed._replace(query=new_query, fragment=f"[WS Wildcard] {fragment}")
-        return urlunparse(parsed)
-    except Exception:
-        return None
+        new_parsed = new_parsed._replace(query=new_query, fragment=f"[WS Wildcard] {fragment}")
+        return urlunparse(new_parsed)
 
-def process_ssr(link):
+    return target_domain, rewrite
+
+def plan_ssr(link):
     """Menangani ShadowsocksR (ssr://)"""
     if FILTER_WS_ONLY:
-        return None # SSR tidak support WS
+        return reject("ssr", "ws") # SSR tidak support WS
 
     # (Logika SSR tetap ada jika FILTER_WS_ONLY diubah jadi False)
     try:
@@ -168,82 +429,737 @@ def process_ssr(link):
         parts = decoded.split('/?')
         main_split = parts[0].split(':')
         
-        if len(main_split) < 6: return None
+        if len(main_split) < 6: return reject("ssr", "parse")
         qs = parse_qs(parts[1] if len(parts) > 1 else "")
         obfsparam_b64 = qs.get('obfsparam', [''])[0]
         obfsparam = decode_base64(obfsparam_b64) if obfsparam_b64 else ""
         
         target_domain = obfsparam if obfsparam else main_split[0]
-        if not target_domain: return None
-        
-        combined_domain = f"{BUG_DOMAIN}.{target_domain}"
-        if not is_wildcard_active(combined_domain): return None
-        
+        if not target_domain: return reject("ssr", "host")
+        remarks_b64 = qs.get('remarks', [''])[0]
+    except Exception:
+        return reject("ssr", "parse")
+
+    def rewrite(combined_domain):
         main_split[0] = combined_domain
         if obfsparam:
             qs['obfsparam'] = [base64.urlsafe_b64encode(combined_domain.encode('utf-8')).decode('utf-8').rstrip('=')]
             
-        remarks_b64 = qs.get('remarks', [''])[0]
         if remarks_b64:
             qs['remarks'] = [base64.urlsafe_b64encode(f"[Wildcard] {decode_base64(remarks_b64)}".encode('utf-8')).decode('utf-8').rstrip('=')]
 
         new_b64 = base64.urlsafe_b64encode(f"{':'.join(main_split)}/?{urlencode(qs, doseq=True)}".encode('utf-8')).decode('utf-8').rstrip('=')
         return "ssr://" + new_b64
-    except Exception:
-        return None
 
-def process_single_link(line):
-    """Distributor fungsi berdasarkan jenis protokol"""
+    return target_domain, rewrite
+
+def plan_single_link(line):
+    """Distributor tahap parse berdasarkan jenis protokol"""
     line = line.strip()
     if not line: return None
     
     if line.startswith("vmess://"):
-        return process_vmess(line)
+        return plan_vmess(line)
     elif line.startswith(("vless://", "trojan://")):
-        return process_url_based(line, line.split("://")[0])
+        return plan_url_based(line, line.split("://")[0])
     elif line.startswith(("hy2://", "hysteria2://", "tuic://")):
-        if FILTER_WS_ONLY: return None # Protocol ini tidak memakai WS
-        return process_url_based(line, line.split("://")[0])
+        if FILTER_WS_ONLY: return reject(line.split("://")[0], "ws") # Protocol ini tidak memakai WS
+        return plan_url_based(line, line.split("://")[0])
     elif line.startswith("ss://"):
-        return process_ss(line)
+        return plan_ss(line)
     elif line.startswith("ssr://"):
-        return process_ssr(line)
+        return plan_ssr(line)
     
-    return None
+    return reject(metrics.protocol_of(line), "protokol")
+
+def dedup_links(lines, keep=None, limit=None):
+    """Buang link duplikat (fingerprint sama walau nama beda) sebelum dicek."""
+    return fingerprint.dedup(
+        lines, fingerprint.link_key, keep,
+        on_duplicate=lambda line: reject(metrics.protocol_of(line), "duplikat"),
+        limit=limit,
+    )
+
+def link_name(line):
+    return (fingerprint.link_key(line) or (None, ""))[1]
+
+def combine_domain(host):
+    return f"{BUG_DOMAIN}.{host}"
+
+def apply_plan(plan, active):
+    """Tahap rewrite: jalankan rewrite jika domain kombinasi aktif."""
+    if not plan or not active: return None
+    host, rewrite = plan
+    try:
+        return rewrite(combine_domain(host))
+    except Exception:
+        return None
+
+def record_result(line, res, planned, active, ip=None):
+    """Catat hasil rewrite satu link (state incremental & metrics); active None = tidak sempat dicek."""
+    if planned and res is None:
+        reject(metrics.protocol_of(line), "budget" if active is None else "rewrite" if active else "dns")
+    if _link_state:
+        _link_state.record(line, res, ip)
+    return res
+
+def finish_link(line, plan, active, ip=None):
+    """Tahap rewrite satu link, lalu catat hasilnya (active None = tidak sempat dicek)."""
+    res = apply_plan(plan, active) if plan else None
+    return record_result(line, res, bool(plan), active, ip)
+
+def carry(entry):
+    """Hasil rewrite dari state incremental (None jika tidak ada); IP-nya dicatat lagi untuk index node."""
+    if entry is None: return None
+    res, ip = entry
+    if ip and WRITE_NODE_INDEX:
+        server = node_index.link_entry(res)["server"]
+        if server:
+            _resolved_ips[server.lower()] = ip
+    return res
+
+# =============================
+#  TAHAP CPU DI PROCESS POOL
+#  plan (closure) tidak bisa di-pickle, jadi worker langsung menjalankan
+#  rewrite-nya dalam pass yang sama dan mengirim balik (domain kombinasi,
+#  link baru); proses utama hanya memilih link baru yang domainnya aktif,
+#  tanpa parse ulang.
+# =============================
+def _set_config(bug_domain, ws_only, splice):
+    global BUG_DOMAIN, FILTER_WS_ONLY, SPLICE_REWRITE
+    BUG_DOMAIN, FILTER_WS_ONLY, SPLICE_REWRITE = bug_domain, ws_only, splice
+
+def plan_chunk(lines, bug_domain, ws_only, splice):
+    """Worker: (domain kombinasi lowercase, link baru) tiap link, (None, None) jika ditolak.
+
+    Link baru None jika rewrite gagal; dipakai hanya bila domainnya aktif.
+    """
+    _set_config(bug_domain, ws_only, splice)
+    rows = []
+    for line in lines:
+        plan = plan_single_link(line)
+        rows.append((combine_domain(plan[0]).lower(), apply_plan(plan, True)) if plan else (None, None))
+    return rows
+
+# =============================
+#  PROSES LANGSUNG (PARSE + CEK + REWRITE)
+# =============================
+def _process_plan(plan):
+    if not plan: return None
+    return apply_plan(plan, is_wildcard_active(combine_domain(plan[0])))
+
+def process_vmess(link):
+    return _process_plan(plan_vmess(link))
+
+def process_url_based(link, protocol):
+    return _process_plan(plan_url_based(link, protocol))
+
+def process_ss(link):
+    return _process_plan(plan_ss(link))
+
+def process_ssr(link):
+    return _process_plan(plan_ssr(link))
+
+def process_single_link(line):
+    """Parse, cek wildcard (blocking), lalu rewrite satu link"""
+    return _process_plan(plan_single_link(line))
+
+# =============================
+#  ENGINE ASYNC
+# =============================
+async def resolve_async(resolver, domain, revalidate=False):
+    """Padanan async lookup_answer (termasuk cek cache & health store)."""
+    if _dns_cache is not None and not revalidate:
+        cached = _dns_cache.get(domain)
+        if cached is not None:
+            return cached
+    if backed_off(domain):
+        return BACKOFF_ANSWER
+
+    start = time.perf_counter()
+    answer = await resolver.resolve(query_name(domain))
+    elapsed = time.perf_counter() - start
+    metrics.observe("dns", elapsed)
+    if _dns_cache is not None:
+        _dns_cache.put(domain, answer, elapsed)
+    record_health(domain, answer, elapsed)
+    return answer
+
+async def resolve_domains_async(domains, resolver=None, limiter=None, deadline=None, revalidate=False):
+    """Resolve banyak domain kombinasi sekaligus, hasil dict domain -> DNSAnswer.
+
+    Query yang belum selesai saat `deadline` habis dibatalkan dan domainnya
+    tidak ada di hasil (juga tidak masuk cache DNS).
+    """
+    own_resolver = resolver is None
+    if own_resolver:
+        resolver = await dns_async.AsyncResolver(
+            DNS_SERVERS, timeout=DNS_TIMEOUT, retries=DNS_RETRIES, max_inflight=DNS_MAX_INFLIGHT,
+            limiter=limiter,
+        ).open()
+
+    domains = list(domains)
+    # Task dibuat urut `domains`, jadi antrean limiter/semaphore ikut urutan prioritas
+    tasks = [asyncio.ensure_future(resolve_async(resolver, d, revalidate)) for d in domains]
+    try:
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        if own_resolver:
+            resolver.close()
+    return {d: task.result() for d, task in zip(domains, tasks) if not task.cancelled()}
+
+# =============================
+#  PIPELINE DUA TAHAP
+# =============================
+def resolve_answers(domains, deadline=None, revalidate=False):
+    """Resolve tiap domain unik (sekali saja) dengan engine yang dipilih, hasil dict domain -> DNSAnswer.
+
+    Dengan `deadline` (budget.Deadline), domain yang tidak sempat di-resolve
+    tidak ada di hasil. `revalidate` = cache DNS tidak dibaca.
+    """
+    domains = list(domains)
+    deadline = deadline if deadline is not None and deadline.limited else None
+    limiter = make_dns_limiter()
+    if DNS_ENGINE == "async":
+        answers = asyncio.run(resolve_domains_async(domains, limiter=limiter, deadline=deadline,
+                                                    revalidate=revalidate))
+    else:
+        lookup = lambda d, lim: lookup_answer(d, lim, revalidate)
+        if deadline:
+            lookup = lambda d, lim: None if deadline.expired() else lookup_answer(d, lim, revalidate)
+        # Thread disiapkan sebanyak batas atas, limiter yang menentukan berapa yang jalan
+        workers = limiter.max_limit if limiter else MAX_THREADS
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            answers = dict(zip(domains, executor.map(lookup, domains, itertools.repeat(limiter))))
+        answers = {d: a for d, a in answers.items() if a is not None}
+    if limiter and domains:
+        limiter.summary()
+    if deadline:
+        budget.skipped(deadline, len(domains), len(answers), "domain")
+    for domain, answer in answers.items():
+        remember_answer(domain, answer)
+    return answers
+
+def resolve_domains(domains, deadline=None, revalidate=False):
+    """Cek wildcard tiap domain unik (sekali saja) dengan engine yang dipilih."""
+    return {d: a.active for d, a in resolve_answers(domains, deadline, revalidate).items()}
+
+def prioritize(domains, lines, keys, healthy):
+    """Domain unik urut prioritas budget; keys[i] = domain milik lines[i] (None jika ditolak)."""
+    country = {}
+    for line, key in zip(lines, keys):
+        if key and key not in country:
+            country[key] = latency.country_of(link_name(line))
+    priority = budget.Priority(PREFERRED_COUNTRIES, healthy)
+    return priority.sort(domains, country.get, lambda d: d, "inject_sni")
+
+def check_links(lines, revalidate=False):
+    """Parse semua link, resolve tiap host target sekali, lalu rewrite.
+
+    Hasil berurutan sesuai `lines` (None untuk link yang gagal).
+    `revalidate` = hasil state incremental & cache DNS tidak dipakai.
+    """
+    # Tahap 0: pakai ulang hasil link yang belum kedaluwarsa (mode incremental)
+    use_state = _link_state is not None and not revalidate
+    carried = [carry(_link_state.lookup(line)) if use_state else None for line in lines]
+
+    # Tahap 1: parse & kumpulkan domain kombinasi unik
+    use_pool = USE_PROCESS_POOL and cpu_pool.worth_it(carried.count(None))
+    with metrics.stage("inject_sni.parse"):
+        if use_pool:
+            # Baris kosong = link yang hasilnya sudah dibawa dari run sebelumnya
+            pending = [line if c is None else "" for line, c in zip(lines, carried)]
+            rows = cpu_pool.flat_map(plan_chunk, pending, BUG_DOMAIN, FILTER_WS_ONLY, SPLICE_REWRITE)
+            keys = [k for k, _ in rows]
+        else:
+            plans = [plan_single_link(line) if c is None else None for line, c in zip(lines, carried)]
+            keys = [combine_domain(p[0]).lower() if p else None for p in plans]
+        unique = list(dict.fromkeys(k for k in keys if k))
+
+    deadline = budget.stage("inject_sni")
+    if deadline.limited:
+        unique = prioritize(unique, lines, keys, budget.healthy_hosts(OUTPUT_FILE))
+
+    planned = len(lines) - keys.count(None)
+    print(f"Lookup DNS: {len(unique)} domain unik untuk {planned} link "
+          f"(hemat {planned - len(unique)} lookup dari grouping host).")
+
+    # Tahap 2: resolve tiap domain unik satu kali
+    with metrics.stage("inject_sni.dns"):
+        active = resolve_domains(unique, deadline, revalidate)
+    metrics.count("inject_sni.dns_lookups", len(active))
+
+    # Tahap 3: rewrite memakai hasil resolve
+    results = []
+    with metrics.stage("inject_sni.rewrite"):
+        if use_pool:
+            for line, c, (k, new) in zip(lines, carried, rows):
+                ok = active.get(k) if k else False
+                results.append(c if c is not None else record_result(line, new if ok else None, bool(k), ok,
+                                                                     _resolved_ips.get(k) if ok else None))
+        else:
+            for line, c, p, k in zip(lines, carried, plans, keys):
+                ok = active.get(k) if p else False
+                results.append(c if c is not None else finish_link(line, p, ok, _resolved_ips.get(k) if ok else None))
+    return results
+
+def check_links_multi(lines, bug_domains, revalidate=False):
+    """Satu pass untuk beberapa bug domain, hasil dict bug domain -> list hasil (urut `lines`).
+
+    Tiap host target di-probe sekali ("*.host"). Host yang probe-nya aktif
+    berlaku untuk semua bug domain, NXDOMAIN berarti tidak ada wildcard;
+    hanya host yang probe-nya timeout/error dicek per kombinasi. Selalu
+    parse di proses ini dan tanpa state incremental (state hanya untuk
+    BUG_DOMAIN).
+    """
+    with metrics.stage("inject_sni.parse"):
+        plans = [plan_single_link(line) for line in lines]
+        hosts = list(dict.fromkeys(p[0].lower() for p in plans if p))
+
+    deadline = budget.stage("inject_sni")
+    if deadline.limited:
+        healthy = {"*." + h for h in budget.healthy_hosts(OUTPUT_FILE, f"{BUG_DOMAIN}.")}
+        keys = ["*." + p[0].lower() if p else None for p in plans]
+        hosts = [d[2:] for d in prioritize(["*." + h for h in hosts], lines, keys, healthy)]
+
+    with metrics.stage("inject_sni.dns"):
+        probes = resolve_answers(("*." + h for h in hosts), deadline, revalidate)
+        unsure = [h for h in hosts if "*." + h in probes and probes["*." + h].failed]
+        combos = resolve_answers((f"{bug}.{h}".lower() for h in unsure for bug in bug_domains), deadline, revalidate)
+    metrics.count("inject_sni.dns_lookups", len(probes) + len(combos))
+    print(f"Probe wildcard: {len(hosts)} host untuk {len(bug_domains)} bug domain, "
+          f"{len(unsure)} host tidak pasti -> {len(combos)} lookup kombinasi "
+          f"(tanpa probe: {len(hosts) * len(bug_domains)} lookup).")
+
+    def answer(bug, host):
+        """DNSAnswer kombinasi, None jika tidak sempat dicek sebelum budget habis."""
+        probe = probes.get("*." + host)
+        if probe is None or not probe.failed:
+            return probe
+        return combos.get(f"{bug}.{host}".lower())
+
+    results = {}
+    with metrics.stage("inject_sni.rewrite"):
+        for bug in bug_domains:
+            out = []
+            for line, plan in zip(lines, plans):
+                res = None
+                a = answer(bug, plan[0].lower()) if plan else None
+                if a is not None and a.active:
+                    combined = f"{bug}.{plan[0]}"
+                    _resolved_ips.setdefault(combined.lower(), a.ips[0])
+                    try:
+                        res = plan[1](combined)
+                    except Exception:
+                        res = None
+                if plan and res is None and bug == BUG_DOMAIN:
+                    reject(metrics.protocol_of(line), "budget" if a is None else "rewrite" if a.active else "dns")
+                out.append(res)
+            results[bug] = out
+    return results
+
+def bug_domains():
+    return list(dict.fromkeys([BUG_DOMAIN] + list(EXTRA_BUG_DOMAINS)))
+
+def output_file_for(bug):
+    """File hasil sebuah bug domain: OUTPUT_FILE untuk BUG_DOMAIN, selain itu diberi akhiran domain."""
+    if bug == BUG_DOMAIN:
+        return OUTPUT_FILE
+    root, ext = os.path.splitext(OUTPUT_FILE)
+    return f"{root}.{bug}{ext}"
+
+def check_all(lines, revalidate=False):
+    """Hasil cek semua bug domain: dict bug domain -> list hasil (urut `lines`)."""
+    domains = bug_domains()
+    if len(domains) == 1:
+        return {BUG_DOMAIN: check_links(lines, revalidate)}
+    return check_links_multi(lines, domains, revalidate)
+
+# =============================
+#  PIPELINE STREAMING
+# =============================
+@contextlib.contextmanager
+def lookup_backend(revalidate=False):
+    """Yield submit(domain) -> Future[DNSAnswer] sesuai DNS_ENGINE."""
+    limiter = make_dns_limiter()
+    if DNS_ENGINE != "async":
+        workers = limiter.max_limit if limiter else MAX_THREADS
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                yield lambda domain: executor.submit(lookup_answer, domain, limiter, revalidate)
+        finally:
+            if limiter:
+                limiter.summary()
+        return
+
+    # Event loop jalan di thread sendiri supaya pembaca sumber tetap blocking biasa
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    resolver = dns_async.AsyncResolver(
+        DNS_SERVERS, timeout=DNS_TIMEOUT, retries=DNS_RETRIES, max_inflight=DNS_MAX_INFLIGHT,
+        limiter=limiter,
+    )
+    asyncio.run_coroutine_threadsafe(resolver.open(), loop).result()
+
+    async def shutdown():
+        # Lookup yang dibatalkan saat budget habis diselesaikan dulu sebelum loop berhenti
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        resolver.close()
+
+    try:
+        yield lambda domain: asyncio.run_coroutine_threadsafe(resolve_async(resolver, domain, revalidate), loop)
+    finally:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        if limiter:
+            limiter.summary()
+
+def stream_links(lines, write, revalidate=False):
+    """Proses link satu per satu dari iterator, panggil write(link, ip) untuk tiap hasil.
+
+    Paling banyak STREAM_WINDOW link menunggu DNS; urutan hasil tetap sama
+    dengan urutan sumber. Domain yang sama dalam STREAM_MEMO terakhir
+    tidak di-resolve ulang. `ip` = IP hasil resolve (untuk hasil yang dibawa
+    dari run sebelumnya: IP yang disimpan di state incremental); tidak ada
+    yang dikumpulkan di _resolved_ips.
+    `revalidate` seperti check_links.
+    """
+    memo = collections.OrderedDict()
+    window = collections.deque()
+    stats = {"links": 0, "valid": 0, "lookups": 0, "reused": 0}
+    # Sumber streaming tidak bisa diurutkan ulang: saat budget habis sisa sumber
+    # tidak dibaca dan lookup yang belum selesai dibatalkan
+    deadline = budget.stage("inject_sni")
+
+    def wait(fut):
+        """DNSAnswer lookup, None jika belum selesai saat budget habis (lookup dibatalkan)."""
+        try:
+            return fut.result(timeout=deadline.remaining())
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            fut.cancel()
+            budget.mark_cut(deadline.name)
+            return None
+
+    def emit():
+        line, plan, fut, carried = window.popleft()
+        ip = None
+        if carried is not None:
+            res, ip = carried
+        elif fut is None:
+            res = finish_link(line, plan, False)
+        else:
+            answer = wait(fut)
+            ip = answer.ips[0] if answer is not None and answer.active else None
+            res = finish_link(line, plan, answer.active if answer is not None else None, ip)
+        if res:
+            write(res, ip)
+            stats["valid"] += 1
+
+    use_state = _link_state is not None and not revalidate
+    with lookup_backend(revalidate) as submit:
+        for line in lines:
+            if deadline.expired():
+                print(f"[!] Budget {deadline.name} habis: sisa sumber setelah {stats['links']} link tidak dibaca, "
+                      f"hasil yang sudah tervalidasi tetap ditulis")
+                metrics.count(f"budget.{deadline.name}.terpotong")
+                budget.mark_cut(deadline.name)
+                break
+            stats["links"] += 1
+            carried = _link_state.lookup(line) if use_state else None
+            plan = plan_single_link(line) if carried is None else None
+            fut = None
+            if plan:
+                key = combine_domain(plan[0]).lower()
+                fut = memo.get(key)
+                if fut is None:
+                    fut = memo[key] = submit(key)
+                    stats["lookups"] += 1
+                    if len(memo) > STREAM_MEMO:
+                        memo.popitem(last=False)
+                else:
+                    memo.move_to_end(key)
+                    stats["reused"] += 1
+            window.append((line, plan, fut, carried))
+
+            if len(window) >= STREAM_WINDOW:
+                emit()
+            while window and (window[0][2] is None or window[0][2].done()):
+                emit()
+        while window:
+            emit()
+    return stats
+
+def discard_stream(tmp_file, index):
+    """Buang output & index sementara run streaming yang gagal."""
+    index.discard()
+    with contextlib.suppress(OSError):
+        os.remove(tmp_file)
+
+def run_streaming(session=None, revalidate=False):
+    print(f"Mengunduh & mengecek akun secara streaming...")
+    try:
+        if USE_HTTP_CACHE:
+            unchanged, lines = http_cache.fetch_lines(URL_SUMBER, session=session, timeout=15)
+        else:
+            response = (session or requests).get(URL_SUMBER, timeout=15, stream=True)
+            response.raise_for_status()
+            unchanged = False
+            lines = (raw.decode("utf-8", errors="ignore") for raw in response.iter_lines())
+    except Exception as e:
+        print(f"Gagal mengunduh: {e}")
+        return
+
+    if unchanged and http_cache.stamped(OUTPUT_FILE, build_salt()) and not revalidate:
+        print(f"Sumber tidak berubah sejak run sebelumnya, '{OUTPUT_FILE}' tetap dipakai.")
+        return
+
+    if DEDUP_LINKS:
+        lines = dedup_links(lines, keep="first", limit=STREAM_MEMO)
+
+    # Baris index langsung ke file sementara per negara, jadi memori tidak ikut membesar
+    index = node_index.SpoolBuilder("inject_sni", node_index.path_for(OUTPUT_FILE))
+
+    def write(link, ip):
+        f.write(link + "\n")
+        if WRITE_NODE_INDEX:
+            index.add_link(link, ip)
+
+    tmp_file = OUTPUT_FILE + ".tmp"
+    # buffering=1: tiap baris langsung ke disk begitu terkonfirmasi
+    try:
+        with open(tmp_file, "w", encoding="utf-8", buffering=1) as f, metrics.stage("inject_sni.stream"):
+            stats = stream_links(lines, write, revalidate)
+    except (requests.RequestException, OSError) as e:
+        # Sumber dibaca sambil jalan: koneksi putus di tengah download baru muncul di sini
+        discard_stream(tmp_file, index)
+        print(f"Gagal mengunduh di tengah streaming: {e}")
+        print(f"'{OUTPUT_FILE}' lama tetap dipakai.")
+        if USE_HTTP_CACHE:
+            http_cache.stamp(OUTPUT_FILE, build_salt(), complete=False)
+        return
+    except BaseException:
+        discard_stream(tmp_file, index)
+        raise
+    metrics.count("inject_sni.links", stats["links"])
+    metrics.count("inject_sni.dns_lookups", stats["lookups"])
+    metrics.count("inject_sni.valid", stats["valid"])
+
+    print(f"\n--- SELESAI ---")
+    print(f"Total link dibaca: {stats['links']}, lookup DNS: {stats['lookups']} "
+          f"(hemat {stats['reused']} lookup dari grouping host).")
+    print(f"Total akun (Hanya WS) yang sukses Wildcard DNS: {stats['valid']} akun.")
+
+    if stats["valid"]:
+        os.replace(tmp_file, OUTPUT_FILE)
+        print(f"✅ Akun sukses disimpan ke: '{OUTPUT_FILE}'")
+        if WRITE_NODE_INDEX:
+            index.write()
+    else:
+        os.remove(tmp_file)
+        index.discard()
+        print("❌ Tidak ada akun bertipe WS yang mendukung wildcard.")
+    if USE_HTTP_CACHE:
+        # File lama yang tidak ditimpa (tanpa hasil) juga dicap tidak utuh
+        http_cache.stamp(OUTPUT_FILE, build_salt(), complete=bool(stats["valid"]) and not budget.was_cut("inject_sni"))
+
+def open_caches():
+    """Buka cache DNS & health store sekali untuk banyak main() berturut-turut (daemon.py).
+
+    main() memakai yang sudah terbuka, menyimpan isinya ke disk di akhir
+    run tapi tidak menutupnya, jadi run berikutnya tidak memuat ulang SQLite.
+    """
+    global _dns_cache, _health
+    if USE_DNS_CACHE and _dns_cache is None:
+        _dns_cache = dns_cache.DNSCache(DNS_CACHE_FILE)
+    if USE_HEALTH_STORE and _health is None:
+        _health = health_store.HealthStore(HEALTH_FILE, "dns")
+
+def reset_state():
+    """Kosongkan state per run di memori sebelum run berikutnya dalam proses yang sama (daemon.py).
+
+    Cache DNS & health store yang dibuka open_caches() disimpan lalu dimuat
+    ulang dari disk, jadi entri kedaluwarsa ikut terbuang.
+    """
+    global _probe_label
+    _resolved_ips.clear()
+    _probe_label = None
+    for store in (_dns_cache, _health):
+        if store is not None:
+            store.reload()
+
+def main(session=None, shard=None, revalidate=False):
+    """Run lengkap; dengan `shard` (sharding.Shard) hanya menulis hasil parsial shard itu.
+
+    `revalidate` = cek ulang walau sumber tidak berubah sejak run sebelumnya,
+    tanpa memakai hasil state incremental maupun cache DNS.
+    """
+    global _dns_cache, _health, _link_state
+    started = time.perf_counter()
+    budget.start()
+    # Session bersama juga mencatat latency HTTP ke metrics
+    session = session or parallel_fetch.make_session()
+    own_cache = _dns_cache is None
+    own_health = _health is None
+    open_caches()
+    if INCREMENTAL_MODE:
+        # Hasil lama tidak berlaku lagi jika bug domain / filter / jalur rewrite diganti
+        _link_state = link_state.LinkState(
+            shard.suffixed(STATE_FILE) if shard else STATE_FILE, REVALIDATE_AFTER,
+            salt=f"{BUG_DOMAIN}|ws={FILTER_WS_ONLY}|splice={SPLICE_REWRITE}",
+        )
+    try:
+        run(session, shard, revalidate)
+        if _link_state is not None:
+            _link_state.save()
+            print(_link_state.summary())
+    finally:
+        _link_state = None
+        if _dns_cache is not None:
+            _dns_cache.close()
+            print(_dns_cache.summary())
+            if own_cache:
+                _dns_cache = None
+        if _health is not None:
+            _health.close()
+            print(_health.summary())
+            if own_health:
+                _health = None
+        cpu_pool.shutdown()
+        print(f"Waktu total: {time.perf_counter() - started:.1f} detik")
+        metrics.write()
+
+def build_salt():
+    """Konfigurasi & kode yang menentukan isi file output (lihat http_cache.stamp)."""
+    config = (BUG_DOMAIN, EXTRA_BUG_DOMAINS, FILTER_WS_ONLY, SPLICE_REWRITE, DEDUP_LINKS,
+              STREAMING_MODE, RANK_BY_LATENCY, fingerprint.KEEP_NAME)
+    return http_cache.salt(config, sys.modules[__name__], link_splice, fingerprint, latency)
+
+def run(session=None, shard=None, revalidate=False):
+    # Shard butuh posisi tiap link di sumber & multi bug domain menulis beberapa
+    # file sekaligus, jadi keduanya selalu lewat jalur non-streaming
+    if STREAMING_MODE and not shard and not EXTRA_BUG_DOMAINS:
+        return run_streaming(session, revalidate)
 
-def main():
     print(f"Mengunduh akun dari Github...")
     try:
-        response = requests.get(URL_SUMBER, timeout=15)
-        response.raise_for_status()
+        with metrics.stage("inject_sni.fetch"):
+            if USE_HTTP_CACHE:
+                text, unchanged = http_cache.fetch(URL_SUMBER, session=session, timeout=15)
+            else:
+                response = (session or requests).get(URL_SUMBER, timeout=15)
+                response.raise_for_status()
+                text, unchanged = response.text, False
     except Exception as e:
         print(f"Gagal mengunduh: {e}")
         return
 
-    lines = response.text.splitlines()
+    salt = build_salt()
+    if unchanged and all(http_cache.stamped(output_file_for(b), salt) for b in bug_domains()) and not shard and not revalidate:
+        print(f"Sumber tidak berubah sejak run sebelumnya, '{OUTPUT_FILE}' tetap dipakai.")
+        return
+
+    lines = text.splitlines()
     print(f"Berhasil mengunduh {len(lines)} akun.")
+    if DEDUP_LINKS:
+        total = len(lines)
+        lines = list(dedup_links(lines))
+        print(f"Duplikat dibuang: {total - len(lines)} akun (server & kredensial sama).")
     print(f"Mengecek akun yang support Wildcard DNS dengan filter WEBSOCKET (WS)...")
-    print(f"Menggunakan {MAX_THREADS} Threads. Harap tunggu...\n")
+    if DNS_ENGINE == "async" and ADAPTIVE_CONCURRENCY:
+        print(f"Menggunakan engine DNS async ({DNS_MIN_INFLIGHT}-{DNS_MAX_INFLIGHT} query paralel, adaptif). Harap tunggu...\n")
+    elif DNS_ENGINE == "async":
+        print(f"Menggunakan engine DNS async ({DNS_MAX_INFLIGHT} query paralel). Harap tunggu...\n")
+    elif ADAPTIVE_CONCURRENCY:
+        print(f"Menggunakan {MIN_THREADS}-{MAX_THREADS_LIMIT} Threads (mulai {MAX_THREADS}, adaptif). Harap tunggu...\n")
+    else:
+        print(f"Menggunakan {MAX_THREADS} Threads. Harap tunggu...\n")
 
-    valid_links = []
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        results = executor.map(process_single_link, lines)
-        
-        for res in results:
-            if res:
-                valid_links.append(res)
+    if shard:
+        return run_shard(lines, shard)
 
-    print(f"\n--- SELESAI ---")
+    metrics.count("inject_sni.links", len(lines))
+    multi = len(bug_domains()) > 1
+    for bug, results in check_all(lines, revalidate).items():
+        save_results([res for res in results if res], bug if multi else None)
+
+def run_shard(lines, shard):
+    """Cek link milik `shard` saja lalu simpan hasil parsial (OUTPUT_FILE tidak disentuh)."""
+    picked = shard.select(lines)
+    print(f"Shard {shard}: {len(picked)} dari {len(lines)} akun.")
+    metrics.count("inject_sni.links", len(picked))
+    digest = sharding.source_digest(lines)
+    for bug, results in check_all([line for _, line in picked]).items():
+        # IP hasil resolve ikut disimpan supaya index node hasil merge tetap lengkap
+        records = [(i, [res, resolved_ip(res)]) for (i, _), res in zip(picked, results) if res]
+        metrics.count("inject_sni.valid", len(records))
+        sharding.write_partial(partial_name(bug), shard, digest, records,
+                               complete=not budget.was_cut("inject_sni"))
+
+def partial_name(bug):
+    return "inject_sni" if bug == BUG_DOMAIN else f"inject_sni.{bug}"
+
+def merge_shards(count):
+    """Gabungkan hasil parsial `count` shard menjadi file output tiap bug domain."""
+    multi = len(bug_domains()) > 1
+    for bug in bug_domains():
+        if not sharding.complete(partial_name(bug), count):
+            budget.mark_cut("inject_sni")
+        valid_links = []
+        for link, ip in sharding.read_partials(partial_name(bug), count):
+            valid_links.append(link)
+            target = latency.link_target(link)
+            if ip and target:
+                _resolved_ips[target.host.lower()] = ip
+        print(f"Gabungan {count} shard: {len(valid_links)} akun.")
+        save_results(valid_links, bug if multi else None)
+
+def resolved_ip(link):
+    """IP hasil resolve domain kombinasi sebuah link hasil rewrite, None jika tidak diketahui."""
+    target = latency.link_target(link)
+    return _resolved_ips.get(target.host.lower()) if target else None
+
+def save_results(valid_links, bug=None):
+    """Ranking (opsional) lalu tulis akun sukses ke file output bug domain `bug` (default BUG_DOMAIN)."""
+    output = output_file_for(bug or BUG_DOMAIN)
+    metrics.count("inject_sni.valid", len(valid_links))
+    if RANK_BY_LATENCY and valid_links and not budget.exhausted("ranking latency inject_sni"):
+        with metrics.stage("inject_sni.latency"):
+            valid_links = latency.rank(valid_links, latency.link_target, link_name)
+
+    print(f"\n--- SELESAI{f' ({bug})' if bug else ''} ---")
     print(f"Total akun (Hanya WS) yang sukses Wildcard DNS: {len(valid_links)} akun.")
 
     if valid_links:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        with open(output, "w", encoding="utf-8") as f, metrics.stage("inject_sni.write"):
             for link in valid_links:
                 f.write(link + "\n")
-        print(f"✅ Akun sukses disimpan ke: '{OUTPUT_FILE}'")
+        print(f"✅ Akun sukses disimpan ke: '{output}'")
+        if WRITE_NODE_INDEX:
+            index = node_index.Builder("inject_sni")
+            for link in valid_links:
+                index.add_link(link)
+            index.write(node_index.path_for(output), _resolved_ips)
     else:
         print("❌ Tidak ada akun bertipe WS yang mendukung wildcard.")
+    if USE_HTTP_CACHE:
+        # File lama yang tidak ditimpa (tanpa hasil) juga dicap tidak utuh
+        cut = budget.was_cut("inject_sni", "ranking latency inject_sni")
+        http_cache.stamp(output, build_salt(), complete=bool(valid_links) and not cut)
 
 if __name__ == "__main__":
-    main()
+    _shard, _merge = sharding.from_argv(sys.argv[1:])
+    if _merge:
+        merge_shards(_merge)
+        metrics.write()
+    else:
+        main(shard=_shard)
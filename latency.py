@@ -0,0 +1,218 @@
+import concurrent.futures
+import json
+import re
+import socket
+import ssl
+import statistics
+import threading
+import time
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse, parse_qs
+
+import fingerprint
+import metrics
+
+# ================= KONFIGURASI =================
+SAMPLES = 3               # Sampel per node (dijalankan bersamaan)
+TIMEOUT = 3               # Detik per sampel (connect + handshake)
+WORKERS = 64              # Total sampel yang jalan paralel
+MAX_LATENCY_MS = 1500     # Node dengan median di atas ambang ini dibuang
+TOP_N_PER_COUNTRY = 0     # >0 = hanya simpan N node tercepat per negara
+# ===============================================
+
+
+class Target(NamedTuple):
+    host: str
+    port: int
+    tls: bool
+    sni: Optional[str] = None
+
+
+class LatencyResult(NamedTuple):
+    connect_ms: float             # Median waktu TCP connect
+    tls_ms: Optional[float]       # Median waktu TLS handshake (None jika node tanpa TLS)
+    total_ms: float               # Median connect + handshake, dipakai untuk ranking
+    samples: int                  # Jumlah sampel yang sukses
+    ip: Optional[str] = None      # Alamat yang diukur (hasil resolve host)
+
+
+# Hasil semua rank() di proses ini (target -> LatencyResult), dibaca node_index
+_measured = {}
+
+
+class LatencyProber:
+    """Ukur latency TCP connect + TLS handshake banyak node sekaligus.
+
+    Host di-resolve sekali (waktu DNS tidak ikut terukur), lalu tiap
+    target diukur `samples` kali; semua sampel semua target berbagi satu
+    pool `workers` thread. Sertifikat tidak diverifikasi: yang diukur
+    hanya waktu, bukan keaslian server.
+    """
+
+    def __init__(self, samples=SAMPLES, timeout=TIMEOUT, workers=WORKERS):
+        self.samples = samples
+        self.timeout = timeout
+        self.workers = workers
+        self._ctx = ssl.create_default_context()
+        self._ctx.check_hostname = False
+        self._ctx.verify_mode = ssl.CERT_NONE
+        self._addrs = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, host, port):
+        key = (host, port)
+        with self._lock:
+            if key in self._addrs:
+                return self._addrs[key]
+        try:
+            info = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addr = info[0][4] if info else None
+        except (OSError, UnicodeError):
+            addr = None
+        with self._lock:
+            self._addrs[key] = addr
+        return addr
+
+    def sample(self, target):
+        """Satu sampel: (detik_connect, detik_handshake) atau None jika gagal."""
+        addr = self._resolve(target.host, target.port)
+        if addr is None:
+            return None
+        start = time.perf_counter()
+        try:
+            sock = socket.create_connection(addr[:2], timeout=self.timeout)
+        except OSError:
+            return None
+        connected = time.perf_counter()
+        try:
+            if target.tls:
+                sock.settimeout(max(0.001, self.timeout - (connected - start)))
+                with self._ctx.wrap_socket(sock, server_hostname=target.sni or target.host):
+                    pass
+            done = time.perf_counter()
+        except (OSError, ssl.SSLError):
+            return None
+        finally:
+            sock.close()
+        metrics.observe("latency", done - start)
+        return connected - start, done - connected
+
+    def _summarize(self, target, samples):
+        ok = [s for s in samples if s is not None]
+        if not ok:
+            return None
+        connect = statistics.median(c for c, _ in ok) * 1000
+        total = statistics.median(c + h for c, h in ok) * 1000
+        tls = statistics.median(h for _, h in ok) * 1000 if target.tls else None
+        addr = self._resolve(target.host, target.port)
+        return LatencyResult(round(connect, 2), None if tls is None else round(tls, 2), round(total, 2), len(ok),
+                             addr[0] if addr else None)
+
+    def measure_many(self, targets):
+        """Ukur banyak target, hasil dict target -> LatencyResult (None jika semua sampel gagal)."""
+        unique = list(dict.fromkeys(targets))
+        if not unique:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {t: [executor.submit(self.sample, t) for _ in range(self.samples)] for t in unique}
+            return {t: self._summarize(t, [f.result() for f in fs]) for t, fs in futures.items()}
+
+    def measure(self, target):
+        return self.measure_many([target])[target]
+
+
+# =============================
+#  TARGET PER FORMAT NODE
+# =============================
+def proxy_target(proxy):
+    """Target dari proxy format Clash (server/port asli)."""
+    ws_host = ((proxy.get("ws-opts") or {}).get("headers") or {}).get("Host")
+    sni = proxy.get("servername") or proxy.get("sni") or ws_host
+    try:
+        return Target(proxy["server"], int(proxy["port"]), bool(proxy.get("tls")), sni)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def link_target(line):
+    """Target dari link mentah (vmess/vless/trojan/ss), None jika tidak bisa di-parse."""
+    line = line.strip()
+    try:
+        if line.startswith("vmess://"):
+            js = json.loads(fingerprint.decode_base64(line[8:]))
+            return Target(js["add"], int(js["port"]), js.get("tls") == "tls", js.get("sni") or js.get("host"))
+        if line.startswith(("vless://", "trojan://", "ss://")):
+            u = urlparse(line)
+            q = parse_qs(u.query)
+            tls = q.get("security", [""])[0] == "tls" or "tls" in q.get("plugin", [""])[0]
+            if u.hostname and u.port:
+                return Target(u.hostname, u.port, tls, q.get("sni", [None])[0])
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        pass
+    return None
+
+
+# =============================
+#  NEGARA DARI NAMA NODE
+# =============================
+_COUNTRY_RE = re.compile(r"-([A-Z]{2})-")
+_FLAG_RE = re.compile("([\U0001F1E6-\U0001F1FF])([\U0001F1E6-\U0001F1FF])")
+
+
+def country_of(name):
+    """Kode negara dari nama node ("vless-SG-123" / bendera emoji), "??" jika tidak ada."""
+    name = name or ""
+    m = _FLAG_RE.search(name)
+    if m:
+        return "".join(chr(ord(c) - 0x1F1E6 + ord("A")) for c in m.groups())
+    m = _COUNTRY_RE.search(name)
+    return m.group(1) if m else "??"
+
+
+# =============================
+#  RANKING
+# =============================
+def rank(items, target_of, name_of=None, max_ms=None, top_n=None, prober=None):
+    """Ukur latency tiap item, buang yang gagal / di atas ambang, urutkan tercepat dulu.
+
+    Item dengan latency sama tetap berurutan sesuai input. Jika top_n > 0,
+    hanya top_n item tercepat per negara (dari name_of(item)) yang disimpan.
+    """
+    max_ms = MAX_LATENCY_MS if max_ms is None else max_ms
+    top_n = TOP_N_PER_COUNTRY if top_n is None else top_n
+    prober = prober or LatencyProber()
+
+    items = list(items)
+    targets = [target_of(item) for item in items]
+    results = prober.measure_many(t for t in targets if t)
+    _measured.update(results)
+
+    scored = []
+    for idx, (item, target) in enumerate(zip(items, targets)):
+        res = results.get(target) if target else None
+        if res is not None and (not max_ms or res.total_ms <= max_ms):
+            scored.append((res.total_ms, idx, item))
+    scored.sort(key=lambda s: (s[0], s[1]))
+
+    if top_n and name_of:
+        per_country = {}
+        kept = []
+        for s in scored:
+            c = country_of(name_of(s[2]))
+            per_country[c] = per_country.get(c, 0) + 1
+            if per_country[c] <= top_n:
+                kept.append(s)
+        scored = kept
+
+    print(f"[*] Latency: {len(scored)} dari {len(items)} node lolos "
+          f"(ambang {max_ms} ms{f', top {top_n}/negara' if top_n else ''})")
+    return [item for _, _, item in scored]
+
+
+def measured(target):
+    """LatencyResult target dari rank() sebelumnya di proses ini, None jika belum diukur."""
+    return _measured.get(target)
+
+
+def reset():
+    _measured.clear()
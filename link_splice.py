@@ -0,0 +1,161 @@
+import re
+from urllib.parse import quote_plus, unquote
+
+# Rewrite link berbentuk URL (vless, trojan, hy2, tuic, ss SIP002) tanpa
+# parse ulang: split_url() mencatat sekali posisi host, port, query &
+# fragment, lalu URLSpans.splice() menyambung potongan asli dengan nilai
+# baru. Byte di luar host, nilai parameter yang diganti & fragment tidak
+# berubah; jalur urlparse/parse_qs/urlencode/urlunparse meng-encode ulang
+# semua parameter (mis. path), membuang parameter kosong & menggabung
+# duplikat.
+#
+# Nilai yang dibaca (hostname, param()) mengikuti urlsplit/parse_qs persis.
+# Link yang tidak biasa (netloc non-ASCII atau IPv6, port kosong/0/di luar
+# rentang, username/password kosong, tab/CR/LF yang dibuang urlsplit)
+# menghasilkan None: pemanggil memakai jalur urllib supaya hasilnya sama.
+
+_NETLOC_END = re.compile(r"[/?#]")
+_PLUGIN_HOST = re.compile(r"((?:obfs-host|host)(?:=|%3[Dd]))(.+?)(?=;|%3[Bb]|$)")
+
+
+def _decode(raw):
+    """Decode satu nama/nilai query seperti parse_qs ("+" = spasi, %XX)."""
+    if "%" not in raw and "+" not in raw:
+        return raw
+    return unquote(raw.replace("+", " "))
+
+
+class URLSpans:
+    """Posisi bagian-bagian sebuah link di dalam string aslinya."""
+
+    __slots__ = ("link", "host_start", "host_end", "query_start", "query_end", "fragment_start", "_items")
+
+    def __init__(self, link, host_start, host_end, query_start, query_end, fragment_start):
+        self.link = link
+        self.host_start = host_start
+        self.host_end = host_end
+        self.query_start = query_start        # None jika tanpa "?"
+        self.query_end = query_end            # Posisi "#" atau akhir link
+        self.fragment_start = fragment_start  # None jika tanpa "#"
+        self._items = None
+
+    @property
+    def hostname(self):
+        """Sama dengan urlsplit(link).hostname (lowercase, None jika kosong)."""
+        return self.link[self.host_start:self.host_end].lower() or None
+
+    @property
+    def fragment(self):
+        return "" if self.fragment_start is None else self.link[self.fragment_start:]
+
+    def items(self):
+        """Parameter query mentah ("nama=nilai") sesuai urutan di link."""
+        if self._items is None:
+            if self.query_start is None:
+                self._items = []
+            else:
+                self._items = self.link[self.query_start:self.query_end].split("&")
+        return self._items
+
+    def param(self, name):
+        """Nilai pertama parameter `name` (ter-decode) seperti parse_qs(...).get(name, [None])[0]."""
+        for item in self.items():
+            key, eq, value = item.partition("=")
+            if eq and value and _decode(key) == name:
+                return _decode(value)
+        return None
+
+    def _query(self, params):
+        items = []
+        done = set()
+        for item in self.items():
+            key, _, value = item.partition("=")
+            name = _decode(key)
+            if name not in params:
+                items.append(item)
+            elif name not in done:
+                # Kemunculan pertama diganti di tempat, duplikat yang bernilai dibuang
+                new = params[name]
+                items.append(f"{key}={new(value) if callable(new) else quote_plus(new)}")
+                done.add(name)
+            elif not value:
+                items.append(item)
+        for name, new in params.items():
+            if name not in done and not callable(new):
+                items.append(f"{quote_plus(name)}={quote_plus(new)}")
+        return "&".join(items)
+
+    def splice(self, host, params=None, fragment=None):
+        """Link baru: host diganti, parameter `params` (nama -> nilai) diganti/ditambah.
+
+        Nilai parameter berupa string di-encode seperti urlencode; berupa
+        callable dipanggil dengan nilai mentah lama dan hasilnya dipakai apa
+        adanya (parameter yang belum ada tidak ditambahkan). `fragment`
+        None = fragment lama. Bagian lain disalin byte per byte.
+        """
+        link = self.link
+        before_query = self.query_end if self.query_start is None else self.query_start - 1
+        parts = [link[:self.host_start], host, link[self.host_end:before_query]]
+        if params:
+            query = self._query(params)
+        else:
+            query = "" if self.query_start is None else link[self.query_start:self.query_end]
+        if query or self.query_start is not None:
+            parts.append("?" + query)
+        if fragment is None and self.fragment_start is not None:
+            fragment = self.fragment
+        if fragment is not None:
+            parts.append("#" + fragment)
+        return "".join(parts)
+
+
+def split_url(link):
+    """URLSpans untuk link "skema://netloc[/path][?query][#fragment]", None jika perlu urllib."""
+    if "\t" in link or "\n" in link or "\r" in link:
+        return None
+    start = link.find("://")
+    if start < 0:
+        return None
+    start += 3
+    # Netloc berakhir di "/", "?" atau "#" pertama, sama dengan urlsplit
+    m = _NETLOC_END.search(link, start)
+    netloc_end = m.start() if m else len(link)
+    netloc = link[start:netloc_end]
+    if not netloc.isascii() or "[" in netloc or "]" in netloc:
+        return None
+
+    at = netloc.rfind("@")
+    if at >= 0:
+        username, colon, password = netloc[:at].partition(":")
+        if not username or (colon and not password):
+            return None
+    host_start = start + at + 1
+    colon = link.find(":", host_start, netloc_end)
+    if colon < 0:
+        host_end = netloc_end
+    else:
+        port = link[colon + 1:netloc_end]
+        if not (port.isdigit() and port.isascii() and 0 < int(port) <= 65535):
+            return None
+        host_end = colon
+
+    hash_pos = link.find("#", netloc_end)
+    query_end = len(link) if hash_pos < 0 else hash_pos
+    q = link.find("?", netloc_end, query_end)
+    return URLSpans(link, host_start, host_end, None if q < 0 else q + 1, query_end,
+                    None if hash_pos < 0 else hash_pos + 1)
+
+
+def plugin_host_replacer(host, expected):
+    """Pengganti nilai mentah parameter plugin SS: ganti `host=`/`obfs-host=` di tempat.
+
+    `expected` = plugin ter-decode yang seharusnya dihasilkan; jika hasil
+    splice tidak sama persis (encoding tidak biasa), seluruh nilai di-encode
+    ulang dari `expected`.
+    """
+    encoded = quote_plus(host)
+
+    def replace(raw):
+        new = _PLUGIN_HOST.sub(lambda m: m.group(1) + encoded, raw)
+        return new if _decode(new) == expected else quote_plus(expected)
+    return replace
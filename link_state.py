@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import time
+
+# ================= KONFIGURASI =================
+STATE_FILE = ".cache/inject_state.json"
+REVALIDATE_AFTER = 24 * 3600   # Link yang sudah dicek dalam jendela ini tidak di-resolve ulang
+# ===============================================
+
+FORMAT = "link-state/2"   # Entri: [hasil rewrite, IP hasil resolve, waktu cek]
+
+
+class LinkState:
+    """State incremental inject_sni: fingerprint link sumber -> (hasil rewrite, IP).
+
+    Hanya link yang sukses disimpan. IP hasil resolve ikut disimpan supaya
+    index node untuk link yang dibawa dari run sebelumnya tetap berisi IP. Saat save(), entri yang tidak muncul
+    lagi di sumber run ini ikut dibuang supaya file tidak terus membesar.
+    `salt` diisi konfigurasi yang mempengaruhi hasil (BUG_DOMAIN, filter, jalur rewrite),
+    sehingga mengganti konfigurasi otomatis membatalkan semua entri lama.
+    """
+
+    def __init__(self, path=STATE_FILE, max_age=REVALIDATE_AFTER, salt=""):
+        self.path = path
+        self.max_age = max_age
+        self.salt = salt
+        self.reused = 0
+        self.checked = 0
+        self._entries = {}
+        self._seen = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # State format lama (tanpa IP) dibuang, link-nya dicek ulang sekali
+        if data.get("salt") == self.salt and data.get("format") == FORMAT:
+            self._entries = data.get("links", {})
+
+    def fingerprint(self, line):
+        return hashlib.sha1(f"{self.salt}\0{line.strip()}".encode("utf-8")).hexdigest()[:20]
+
+    def lookup(self, line):
+        """(hasil rewrite, IP) lama jika masih dalam jendela REVALIDATE_AFTER, selain itu None."""
+        fp = self.fingerprint(line)
+        entry = self._entries.get(fp)
+        if entry and time.time() - entry[2] < self.max_age:
+            self._seen[fp] = entry
+            self.reused += 1
+            return entry[0], entry[1]
+        return None
+
+    def record(self, line, output, ip=None):
+        """Catat hasil cek baru (output None = gagal, tidak disimpan); `ip` = IP domain kombinasinya."""
+        self.checked += 1
+        if output:
+            self._seen[self.fingerprint(line)] = (output, ip, time.time())
+
+    def save(self):
+        # Run tanpa satu link pun (mis. download gagal) tidak boleh menghapus state
+        if not self._seen:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"format": FORMAT, "salt": self.salt, "links": self._seen}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        return (
+            f"Incremental: {self.reused} link dipakai ulang tanpa resolve, "
+            f"{self.checked} link dicek ulang/baru"
+        )
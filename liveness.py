@@ -0,0 +1,127 @@
+import concurrent.futures
+import socket
+import ssl
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# ================= KONFIGURASI =================
+MODE_HEAD = "head"   # HTTP HEAD penuh (perilaku lama check_alive)
+MODE_TLS = "tls"     # Cukup TCP connect + TLS handshake, tanpa request HTTP
+DEFAULT_WORKERS = 32
+DEFAULT_TIMEOUT = 3
+TLS_PORT = 443
+# ===============================================
+
+
+class LivenessProber:
+    """Cek hidup banyak host sekaligus dengan pool worker terbatas.
+
+    Mode "head" memakai satu requests.Session bersama (pool koneksi per
+    host, dipakai ulang antar cek). Mode "tls" hanya membuka TCP lalu
+    TLS handshake, jauh lebih murah untuk host yang mati. Hasil disimpan
+    per host, jadi host yang sama tidak pernah dicek dua kali. Jika
+    `limiter` (adaptive.AIMDLimiter) diberikan, jumlah cek bersamaan
+    diatur limiter itu (timeout = sinyal turun) dan `workers` diabaikan.
+    Jika `health` (health_store.HealthStore) diberikan, host yang masih
+    di-backoff dianggap mati tanpa dicek dan hasil tiap cek dicatat ke sana.
+    """
+
+    def __init__(self, mode=MODE_HEAD, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, session=None,
+                 limiter=None, health=None):
+        if mode not in (MODE_HEAD, MODE_TLS):
+            raise ValueError(f"mode tidak dikenal: {mode}")
+        self.mode = mode
+        self.limiter = limiter
+        self.health = health
+        self.workers = limiter.max_limit if limiter else workers
+        self.timeout = timeout
+        self.session = session or self._make_session(self.workers)
+        self._ssl_ctx = ssl.create_default_context()
+        self._results = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_session(workers):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _probe_head(self, host):
+        self.session.head(f"https://{host}", timeout=self.timeout)
+
+    def _probe_tls(self, host):
+        with socket.create_connection((host, TLS_PORT), timeout=self.timeout) as sock:
+            with self._ssl_ctx.wrap_socket(sock, server_hostname=host):
+                pass
+
+    def _probe(self, host):
+        """(hidup, timeout) untuk satu host; host yang menolak koneksi bukan timeout."""
+        probe = self._probe_tls if self.mode == MODE_TLS else self._probe_head
+        try:
+            probe(host)
+            return True, False
+        except (requests.Timeout, socket.timeout):
+            return False, True
+        except Exception:
+            return False, False
+
+    def check(self, host):
+        """Cek satu host (hasil di-cache per host)."""
+        if not host:
+            return False
+        with self._lock:
+            if host in self._results:
+                return self._results[host]
+        if self.health is not None and not self.health.due(host):
+            with self._lock:
+                self._results[host] = False
+            return False
+        start = time.perf_counter()
+        if self.limiter is None:
+            alive, timed_out = self._probe(host)
+        else:
+            alive, timed_out = self.limiter.call(self._probe, host, ok=lambda r: not r[1])
+        elapsed = time.perf_counter() - start
+        metrics.observe("probe", elapsed)
+        if self.health is not None:
+            self.health.record(host, alive, timed_out, elapsed)
+        with self._lock:
+            self._results[host] = alive
+        return alive
+
+    def check_many(self, hosts, deadline=None):
+        """Cek banyak host paralel, hasil dict host -> bool (urutan = urutan input).
+
+        Dengan `deadline` (budget.Deadline), host yang belum mulai dicek saat
+        deadline habis dilewati dan tidak muncul di hasil.
+        """
+        unique = list(dict.fromkeys(hosts))
+        check = self.check
+        if deadline is not None and deadline.limited:
+            check = lambda host: None if deadline.expired() else self.check(host)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = dict(zip(unique, executor.map(check, unique)))
+        return {host: alive for host, alive in results.items() if alive is not None}
+
+    def forget(self):
+        """Buang hasil cek yang tersimpan, cek berikutnya mem-probe ulang tiap host."""
+        with self._lock:
+            self._results.clear()
+
+    def close(self):
+        self.session.close()
+        if self.health is not None:
+            self.health.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,153 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# ================= KONFIGURASI =================
+ENABLED = os.environ.get("SCRAPER_METRICS") == "1"   # Atau ubah ke True
+METRICS_FILE = "metrics.json"
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+# ===============================================
+
+# Semua metrik disimpan global per proses, jadi prx.py, acc.py dan
+# inject_sni.py yang jalan dalam satu pipeline.py berbagi satu laporan.
+# Saat ENABLED False tiap fungsi langsung return, biayanya hanya satu cek
+# boolean (stage() mengembalikan context manager kosong yang sama).
+_lock = threading.Lock()
+_stages = {}           # nama -> [total_detik, jumlah_panggilan]
+_rejects = Counter()   # (script, protokol, alasan) -> jumlah
+_counters = Counter()
+_latency = {}          # jenis -> [jumlah per bucket..., total_detik, maks_detik]
+
+_NULL = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            entry = _stages.setdefault(self.name, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def stage(name):
+    """Context manager pencatat waktu tahap `name` (akumulatif antar panggilan)."""
+    return _Stage(name) if ENABLED else _NULL
+
+
+def reject(script, protocol, reason):
+    """Catat satu link ditolak, selalu kembalikan None."""
+    if ENABLED:
+        with _lock:
+            _rejects[script, protocol, reason] += 1
+    return None
+
+
+def count(name, n=1):
+    if ENABLED:
+        with _lock:
+            _counters[name] += n
+
+
+def observe(kind, seconds):
+    """Masukkan satu sampel latency (detik) ke histogram `kind` (dns, http, ...)."""
+    if not ENABLED:
+        return
+    ms = seconds * 1000
+    idx = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b), len(LATENCY_BUCKETS_MS))
+    with _lock:
+        hist = _latency.get(kind)
+        if hist is None:
+            hist = _latency[kind] = [0] * (len(LATENCY_BUCKETS_MS) + 1) + [0.0, 0.0]
+        hist[idx] += 1
+        hist[-2] += seconds
+        hist[-1] = max(hist[-1], seconds)
+
+
+def on_response(response, *args, **kwargs):
+    """Hook requests: catat waktu sampai header diterima sebagai latency HTTP."""
+    if ENABLED:
+        observe("http", response.elapsed.total_seconds())
+
+
+def protocol_of(link):
+    """Label protokol sebuah link ("vmess", "ss", ...) atau "?" jika tidak jelas."""
+    scheme, sep, _ = link.strip().partition("://")
+    return scheme.lower() if sep and scheme.isalnum() else "?"
+
+
+def _latency_report(hist):
+    counts = hist[:-2]
+    total = sum(counts)
+    labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    return {
+        "count": total,
+        "mean_ms": round(hist[-2] / total * 1000, 2) if total else 0,
+        "max_ms": round(hist[-1] * 1000, 2),
+        "buckets": {label: n for label, n in zip(labels, counts) if n},
+    }
+
+
+def snapshot():
+    """Semua metrik saat ini sebagai dict siap di-JSON-kan."""
+    with _lock:
+        rejections = {}
+        for (script, protocol, reason), n in sorted(_rejects.items()):
+            rejections.setdefault(script, {}).setdefault(protocol, {})[reason] = n
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "stages": {name: {"seconds": round(s, 4), "calls": calls} for name, (s, calls) in _stages.items()},
+            "rejections": rejections,
+            "counters": dict(_counters),
+            "latency": {kind: _latency_report(hist) for kind, hist in _latency.items()},
+        }
+
+
+def write(path=METRICS_FILE):
+    """Tulis snapshot() ke `path` (atomik). Tidak melakukan apa-apa jika nonaktif."""
+    if not ENABLED:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+    print(f"[*] Metrics disimpan ke: {path}")
+
+
+def export():
+    """Penolakan & counter mentah (untuk dikirim dari proses worker)."""
+    if not ENABLED:
+        return None
+    with _lock:
+        return {"rejects": list(_rejects.items()), "counters": dict(_counters)}
+
+
+def merge(exported):
+    """Gabungkan hasil export() dari proses lain."""
+    if not ENABLED or not exported:
+        return
+    with _lock:
+        for key, n in exported["rejects"]:
+            _rejects[tuple(key)] += n
+        _counters.update(exported["counters"])
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _rejects.clear()
+        _counters.clear()
+        _latency.clear()
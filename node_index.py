@@ -0,0 +1,332 @@
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse, parse_qs, unquote
+
+import fingerprint
+import latency
+
+# ================= KONFIGURASI =================
+INDEX_SUFFIX = ".idx.jsonl"   # dialer-proxy.yaml -> dialer-proxy.idx.jsonl
+# ===============================================
+
+# Format: baris pertama header JSON, sisanya satu node per baris (JSON
+# ringkas, kolom FIELDS). Node dikelompokkan per negara; header menyimpan
+# rentang byte tiap negara (relatif terhadap akhir header), jadi pencarian
+# per negara cukup membaca potongan itu dari file yang di-mmap. Kolom
+# `pos` = urutan node di file output aslinya.
+#
+# Waktu cek hanya ada di header (`checked_at`), dan file tidak ditulis
+# ulang jika isinya sama dengan index yang sudah ada: index ikut di-commit
+# workflow, jadi build ulang dengan hasil sama tidak menghasilkan diff.
+FORMAT = "node-index/2"
+FIELDS = ("pos", "name", "type", "server", "ip", "port", "network", "tls", "host",
+          "country", "latency_ms")
+
+
+def path_for(output):
+    """File index untuk sebuah file output."""
+    return os.path.splitext(output)[0] + INDEX_SUFFIX
+
+
+# =============================
+#  ENTRI DARI PROXY / LINK
+# =============================
+def proxy_entry(proxy):
+    """Kolom dasar dari proxy format Clash."""
+    ws_host = ((proxy.get("ws-opts") or {}).get("headers") or {}).get("Host")
+    return {
+        "name": proxy.get("name", ""),
+        "type": proxy.get("type"),
+        "server": proxy.get("server"),
+        "port": proxy.get("port"),
+        "network": proxy.get("network") or "tcp",
+        "tls": bool(proxy.get("tls")),
+        "host": ws_host or proxy.get("servername") or proxy.get("sni"),
+    }
+
+
+def link_entry(line):
+    """Kolom dasar dari link mentah (vmess/vless/trojan/ss/...), kolom yang tidak terbaca None."""
+    line = line.strip()
+    scheme = line.partition("://")[0].lower()
+    entry = {"name": "", "type": scheme, "server": None, "port": None, "network": "tcp", "tls": False, "host": None}
+    try:
+        if scheme == "vmess":
+            js = json.loads(fingerprint.decode_base64(line[8:]))
+            entry.update(name=js.get("ps", ""), server=js.get("add"), port=int(js["port"]),
+                         network=js.get("net") or js.get("network") or "tcp",
+                         tls=js.get("tls") == "tls", host=js.get("host") or js.get("sni"))
+        else:
+            u = urlparse(line)
+            q = parse_qs(u.query)
+            entry.update(name=unquote(u.fragment), server=u.hostname, port=u.port,
+                         network=q.get("type", ["tcp"])[0],
+                         tls=q.get("security", [""])[0] == "tls" or "tls" in q.get("plugin", [""])[0],
+                         host=q.get("host", q.get("sni", [None]))[0])
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        pass
+    return entry
+
+
+# =============================
+#  TULIS
+# =============================
+class Builder:
+    """Kumpulkan node yang ditulis ke sebuah output, lalu tulis index-nya.
+
+    Latency diambil dari latency.rank() yang sudah berjalan di proses ini
+    (None jika ranking mati); IP dari `ips` (host -> IP) yang diberikan ke
+    write(), atau alamat yang diukur saat ranking latency.
+    """
+
+    def __init__(self, source, checked_at=None):
+        self.source = source
+        self.checked_at = int(checked_at or time.time())
+        self._entries = []
+        self._targets = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry, target):
+        self._entries.append(entry)
+        self._targets.append(target)
+
+    def add_proxy(self, proxy, target_of=latency.proxy_target):
+        self.add(proxy_entry(proxy), target_of(proxy))
+
+    def add_link(self, line):
+        self.add(link_entry(line), latency.link_target(line))
+
+    def collect(self, items, add):
+        """Yield ulang `items` sambil memanggil add(item) (untuk output streaming)."""
+        for item in items:
+            add(item)
+            yield item
+
+    def _row(self, pos, entry, target, ip=None):
+        """(negara, baris JSON siap tulis) satu node."""
+        measured = latency.measured(target) if target else None
+        row = dict(entry, pos=pos, country=latency.country_of(entry["name"]),
+                   latency_ms=measured.total_ms if measured else None)
+        row["ip"] = ip or (measured.ip if measured else None)
+        line = json.dumps([row[f] for f in FIELDS], ensure_ascii=False, separators=(",", ":"))
+        return row["country"], line.encode("utf-8") + b"\n"
+
+    def _commit(self, path, count, sizes, write_body):
+        """Tulis header (rentang byte dari `sizes` negara -> byte) lalu body lewat write_body(f), atomik.
+
+        Jika isi (selain checked_at) sama dengan `path` yang sudah ada, file lama dibiarkan.
+        """
+        countries = {}
+        offset = 0
+        for country in sorted(sizes):
+            countries[country] = [offset, offset + sizes[country]]
+            offset += sizes[country]
+        header = {"format": FORMAT, "source": self.source, "count": count,
+                  "checked_at": self.checked_at, "fields": FIELDS, "countries": countries}
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+            write_body(f)
+        if _same_content(path, tmp):
+            os.remove(tmp)
+            print(f"[=] Index {count} node tidak berubah: {path}")
+            return count
+        os.replace(tmp, path)
+        print(f"[*] Index {count} node disimpan ke: {path}")
+        return count
+
+    def write(self, path, ips=None):
+        """Tulis index ke `path` (atomik), kembalikan jumlah node."""
+        groups = {}
+        for pos, (entry, target) in enumerate(zip(self._entries, self._targets)):
+            ip = (ips or {}).get((entry["server"] or "").lower())
+            country, line = self._row(pos, entry, target, ip)
+            groups.setdefault(country, []).append(line)
+
+        def write_body(f):
+            for country in sorted(groups):
+                f.writelines(groups[country])
+        sizes = {c: sum(len(line) for line in lines) for c, lines in groups.items()}
+        return self._commit(path, len(self._entries), sizes, write_body)
+
+
+class SpoolBuilder(Builder):
+    """Builder untuk output streaming: memori tetap kecil berapapun jumlah node.
+
+    Tiap node langsung ditulis ke file sementara per negara (di direktori
+    `path`, bukan /tmp yang bisa jadi tmpfs); write() menyambung file-file
+    itu urut negara ke index lalu rename. IP diberikan per node saat add().
+    """
+
+    def __init__(self, source, path, checked_at=None):
+        super().__init__(source, checked_at)
+        self.path = path
+        self._count = 0
+        self._dir = None
+        self._spools = {}   # negara -> file sementara
+
+    def __len__(self):
+        return self._count
+
+    def add(self, entry, target, ip=None):
+        country, line = self._row(self._count, entry, target, ip)
+        self._count += 1
+        spool = self._spools.get(country)
+        if spool is None:
+            if self._dir is None:
+                self._dir = tempfile.mkdtemp(prefix=".idx-", dir=os.path.dirname(os.path.abspath(self.path)))
+            spool = self._spools[country] = open(os.path.join(self._dir, f"{len(self._spools)}.jsonl"), "w+b")
+        spool.write(line)
+
+    def add_link(self, line, ip=None):
+        self.add(link_entry(line), latency.link_target(line), ip)
+
+    def write(self, path=None, ips=None):
+        """Tulis index ke `path` (default path konstruktor) lalu hapus file sementara."""
+        def write_body(f):
+            for country in sorted(self._spools):
+                spool = self._spools[country]
+                spool.seek(0)
+                shutil.copyfileobj(spool, f)
+        try:
+            sizes = {c: spool.tell() for c, spool in self._spools.items()}
+            return self._commit(path or self.path, self._count, sizes, write_body)
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Buang file sementara tanpa menulis index."""
+        for spool in self._spools.values():
+            spool.close()
+        self._spools = {}
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+def _same_content(old, new):
+    """True jika dua file index sama persis selain checked_at di header."""
+    def content(path):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            header.pop("checked_at", None)
+            return header, f.read()
+    try:
+        return content(old) == content(new)
+    except (OSError, ValueError):
+        return False
+
+
+# =============================
+#  BACA (MMAP)
+# =============================
+class NodeIndex:
+    """Baca file index lewat mmap tanpa memuat seluruh isinya.
+
+    select() hanya men-decode baris negara yang diminta (atau semua baris
+    jika country None), filter lain diterapkan per baris.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = json.loads(self._mm.readline())
+        if self.header.get("format") != FORMAT:
+            self.close()
+            raise ValueError(f"{path} bukan index node ({FORMAT})")
+        self.fields = tuple(self.header["fields"])
+        self._body = self._mm.tell()
+
+    def __len__(self):
+        return self.header["count"]
+
+    def countries(self):
+        return list(self.header["countries"])
+
+    def _lines(self, country):
+        if country is None:
+            start, end = self._body, len(self._mm)
+        else:
+            span = self.header["countries"].get(country.upper())
+            if not span:
+                return
+            start, end = self._body + span[0], self._body + span[1]
+        pos = start
+        while pos < end:
+            nl = self._mm.find(b"\n", pos, end)
+            nl = end if nl < 0 else nl
+            yield self._mm[pos:nl]
+            pos = nl + 1
+
+    def select(self, country=None, type=None, port=None, max_latency_ms=None, tls=None):
+        """Yield node (dict) yang cocok dengan semua filter yang diberikan."""
+        for raw in self._lines(country):
+            row = dict(zip(self.fields, json.loads(raw)))
+            if type is not None and row["type"] != type:
+                continue
+            if port is not None and row["port"] != port:
+                continue
+            if tls is not None and row["tls"] != tls:
+                continue
+            if max_latency_ms is not None and (row["latency_ms"] is None or row["latency_ms"] > max_latency_ms):
+                continue
+            yield row
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+USAGE = "pemakaian: python node_index.py FILE [--country SG] [--type vless] [--port 443] [--max-latency 300]"
+
+
+def usage(error):
+    """Keluar (status 1) dengan pesan error dan cara pakai, seperti sharding.usage."""
+    sys.exit(f"[!] {error}\n{USAGE}")
+
+
+def main():
+    """python node_index.py FILE [--country SG] [--type vless] [--port 443] [--max-latency 300]"""
+    args = sys.argv[1:]
+
+    def option(name, cast=str):
+        if name not in args:
+            return None
+        i = args.index(name) + 1
+        if i >= len(args) or args[i].startswith("--"):
+            usage(f"{name} butuh nilai")
+        try:
+            return cast(args[i])
+        except ValueError:
+            usage(f"nilai {name} tidak valid: {args[i]!r}")
+
+    filters = (option("--country"), option("--type"), option("--port", int), option("--max-latency", float))
+    files = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or not args[i - 1].startswith("--"))]
+    if len(files) != 1:
+        usage("butuh tepat satu FILE index")
+    try:
+        index = NodeIndex(files[0])
+    except (OSError, ValueError) as e:
+        usage(e)
+    with index:
+        for row in index.select(*filters):
+            print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
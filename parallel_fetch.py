@@ -0,0 +1,80 @@
+import concurrent.futures
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import budget
+import metrics
+
+# ================= KONFIGURASI =================
+MAX_PER_HOST = 4       # Maksimal request bersamaan ke satu host
+GLOBAL_TIMEOUT = 90    # Batas waktu (detik) untuk seluruh batch fetch
+# ===============================================
+
+
+class HostLimitedSession(requests.Session):
+    """requests.Session dengan batas request bersamaan per host.
+
+    Aman dipakai banyak thread; koneksi ke host yang sama dipakai ulang
+    lewat pool adapter yang ukurannya sama dengan batas per host.
+    """
+
+    def __init__(self, max_per_host=MAX_PER_HOST):
+        super().__init__()
+        self.max_per_host = max_per_host
+        self._limits = {}
+        self._limits_lock = threading.Lock()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_per_host)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.hooks["response"].append(metrics.on_response)
+
+    def _limit(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._limits_lock:
+            if host not in self._limits:
+                self._limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._limits[host]
+
+    def request(self, method, url, *args, **kwargs):
+        with self._limit(url):
+            return super().request(method, url, *args, **kwargs)
+
+
+def make_session(headers=None, max_per_host=MAX_PER_HOST):
+    session = HostLimitedSession(max_per_host)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def map_ordered(fn, items, timeout=GLOBAL_TIMEOUT, workers=None):
+    """Jalankan fn(item) paralel, hasil berurutan sesuai `items`.
+
+    Item yang gagal berisi exception-nya; yang belum selesai saat
+    `timeout` (dipotong ke sisa budget run) habis berisi TimeoutError.
+    Urutan hasil selalu sama dengan urutan konfigurasi, berapapun urutan
+    selesainya.
+    """
+    items = list(items)
+    if not items:
+        return []
+    timeout = budget.current().clamp(timeout)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(items))
+    futures = [executor.submit(fn, item) for item in items]
+    concurrent.futures.wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for fut in futures:
+        if not fut.done():
+            results.append(TimeoutError(f"melebihi batas {timeout} detik"))
+        elif fut.cancelled():
+            results.append(TimeoutError("dibatalkan"))
+        elif fut.exception() is not None:
+            results.append(fut.exception())
+        else:
+            results.append(fut.result())
+    return results
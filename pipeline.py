@@ -0,0 +1,114 @@
+import sys
+
+import acc
+import budget
+import http_cache
+import prx
+import inject_sni
+import metrics
+import parallel_fetch
+import sharding
+
+# ============================================
+# PIPELINE GABUNGAN
+# Satu proses untuk prx.py (dialer-proxy.yaml), acc.py (jomblo.yaml)
+# dan inject_sni.py. Tiap negara v2nodes cukup diambil & di-decode
+# sekali lalu dibagi ke kedua output.
+#
+# Mode shard (matrix job / beberapa proses lokal):
+#   python pipeline.py --shard 0/4   ... --shard 3/4   -> hasil parsial di sharding.SHARD_DIR
+#   python pipeline.py --merge 4                       -> ketiga output, identik dengan run biasa
+#
+# Budget waktu (env SCRAPER_BUDGET, detik) berlaku untuk seluruh run: cek
+# hidup acc & DNS inject_sni jalan urut prioritas dan berhenti saat budget
+# habis, lalu yang sudah tervalidasi tetap ditulis (lihat budget.py).
+#
+# Mode daemon (daemon.py) memanggil main() berulang dalam satu proses dan
+# menyajikan ketiga output lewat HTTP lokal.
+# ============================================
+
+def make_session():
+    return parallel_fetch.make_session(prx.HEADERS)
+
+
+# ============================================
+# FETCH SEKALI PER NEGARA
+# ============================================
+def fetch_countries(countries, session):
+    """Kembalikan (negara -> list node, negara -> url subscription).
+
+    Negara yang gagal diambil tidak muncul di kedua dict.
+    """
+    nodes = {}
+    urls = {}
+    for c, sub_url, country_nodes in prx.fetch_countries(countries, session):
+        nodes[c] = country_nodes
+        urls[c] = sub_url
+    return nodes, urls
+
+
+def collect(nodes, countries):
+    return [n for c in countries for n in nodes.get(c, [])]
+
+
+def sources_of(urls, countries):
+    return [urls[c] for c in countries if c in urls]
+
+
+# ============================================
+# MAIN
+# ============================================
+def merge_shards(count):
+    prx.merge_shards(count)
+    acc.merge_shards(count)
+    inject_sni.merge_shards(count)
+    metrics.write()
+
+
+def main(argv=None, session=None, revalidate=False):
+    """Satu run penuh; `revalidate` = cek ulang acc & inject_sni walau sumbernya tidak berubah."""
+    shard, merge = sharding.from_argv(sys.argv[1:] if argv is None else argv)
+    if merge:
+        return merge_shards(merge)
+
+    budget.start()
+    session = session or make_session()
+
+    # Gabungan negara kedua script, urutan sesuai konfigurasi masing-masing
+    countries = list(dict.fromkeys(prx.COUNTRY + acc.COUNTRIES))
+    inject_sni.PREFERRED_COUNTRIES = countries
+    with metrics.stage("pipeline.fetch"):
+        nodes, urls = fetch_countries(countries, session)
+
+    if shard:
+        # Cache HTTP tidak dipakai untuk melewati build: tiap shard harus menulis hasil parsial
+        prx.run_shard(collect(nodes, prx.COUNTRY), shard)
+        acc.run_shard(collect(nodes, acc.COUNTRIES), shard)
+        inject_sni.main(session, shard)
+        return
+
+    # Output yang semua sumbernya tidak berubah (304) tidak perlu dibangun ulang
+    # (prx tidak mengecek jaringan, jadi juga tidak perlu saat revalidate)
+    if prx.USE_HTTP_CACHE and http_cache.source_unchanged(
+            sources_of(urls, prx.COUNTRY), prx.OUTPUT_FILE, prx.build_salt()):
+        print(f"[=] Subscription tidak berubah, pakai {prx.OUTPUT_FILE} sebelumnya")
+    else:
+        prx_nodes = collect(nodes, prx.COUNTRY)
+        metrics.count("prx.nodes", len(prx_nodes))
+        prx.save_yaml(prx.iter_proxies(prx_nodes))
+
+    if not revalidate and acc.USE_HTTP_CACHE and http_cache.source_unchanged(
+            sources_of(urls, acc.COUNTRIES), acc.OUTPUT_FILE, acc.build_salt()):
+        print(f"[=] Subscription tidak berubah, pakai {acc.OUTPUT_FILE} sebelumnya")
+    else:
+        acc_nodes = collect(nodes, acc.COUNTRIES)
+        print("[*] Total node:", len(acc_nodes))
+        metrics.count("acc.nodes", len(acc_nodes))
+        acc.save_yaml(acc.build_proxies(acc_nodes))
+
+    # inject_sni.main() menulis METRICS_FILE berisi metrik ketiga output
+    inject_sni.main(session, revalidate=revalidate)
+
+
+if __name__ == "__main__":
+    main()
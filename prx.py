@@ -1,26 +1,52 @@
 import base64
-import yaml
 import requests
 from urllib.parse import urlparse, parse_qs
 import json
-from bs4 import BeautifulSoup
+import sys
+
+import budget
+import html_extract
+import fingerprint
+import http_cache
+import latency
+import metrics
+import node_index
+import parallel_fetch
+import sharding
+import yaml_writer
 
 # ============================================
 # COUNTRY LIST
 # ============================================
 COUNTRY = ["id", "sg", "my"]
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
+OUTPUT_FILE = "dialer-proxy.yaml"
+
+# Subscription 304/identik & output lama masih build utuh -> build dilewati
+# (http_cache.source_unchanged, cap output dari build_salt)
+USE_HTTP_CACHE = True
+
+# Buang node duplikat (server/port/kredensial/path/host sama) lintas negara;
+# nama yang dipakai diatur fingerprint.KEEP_NAME
+DEDUP_NODES = True
+
+# Ukur latency TCP/TLS tiap node, buang yang lambat & urutkan tercepat dulu
+# (ambang, sampel & top-N per negara diatur di latency.py)
+RANK_BY_LATENCY = False
+
+# Tulis juga index node ringkas (node_index.path_for(OUTPUT_FILE)) untuk tool lain
+WRITE_NODE_INDEX = True
 
 # ============================================
 # AUTO AMBIL SUBSCRIPTION URL
 # ============================================
-def get_subscription_url(country):
+def get_subscription_url(country, session=None):
     url = f"https://www.v2nodes.com/country/{country}/"
-    r = requests.get(url, headers=HEADERS, timeout=30)
+    r = (session or requests).get(url, headers=HEADERS, timeout=30, stream=True)
     r.raise_for_status()
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    inp = soup.find("input", id="subscription")
+    # Baca halaman per potongan & berhenti begitu input ketemu (fallback BeautifulSoup)
+    inp = html_extract.extract_input(r, "subscription")
     if not inp:
         raise RuntimeError("subscription input tidak ditemukan")
 
@@ -30,9 +56,11 @@ def get_subscription_url(country):
 # ============================================
 # FETCH & DECODE
 # ============================================
-def fetch_subscription(url):
+def fetch_subscription(url, session=None):
     print("[*] Fetching subscription…")
-    r = requests.get(url, timeout=10)
+    if USE_HTTP_CACHE:
+        return http_cache.fetch(url, session=session, timeout=10).text.strip()
+    r = (session or requests).get(url, timeout=10)
     r.raise_for_status()
     return r.text.strip()
 
@@ -199,61 +227,156 @@ def parse_ss(uri):
 # ============================================
 # BUILD PROXIES
 # ============================================
+def parse_node(n):
+    """Parse satu node sesuai protokolnya, None jika ditolak."""
+    if n.startswith("vmess://"):
+        p = parse_vmess(n)
+    elif n.startswith("vless://"):
+        p = parse_vless(n)
+    elif n.startswith("trojan://"):
+        p = parse_trojan(n)
+    elif n.startswith("ss://"):
+        p = parse_ss(n)
+    else:
+        return metrics.reject("prx", metrics.protocol_of(n), "protokol")
+
+    return p or metrics.reject("prx", metrics.protocol_of(n), "parse")
+
+
+def _parse_all(nodes):
+    for n in nodes:
+        with metrics.stage("prx.parse"):
+            try:
+                p = parse_node(n)
+            except Exception as e:
+                print("Parsing gagal:", e)
+                p = metrics.reject("prx", metrics.protocol_of(n), "parse")
+
+        if p:
+            yield p
+
+
+def iter_proxies(nodes):
+    """Iterator proxy hasil parse, satu per satu (untuk penulisan streaming)."""
+    return finish_proxies(_parse_all(nodes))
+
+
+def finish_proxies(proxies):
+    """Dedup & ranking latency (opsional); dipakai juga saat merge shard."""
+    if DEDUP_NODES:
+        proxies = fingerprint.dedup(
+            proxies, fingerprint.proxy_key,
+            on_duplicate=lambda p: metrics.reject("prx", p["type"], "duplikat"),
+        )
+    if RANK_BY_LATENCY and not budget.exhausted("ranking latency prx"):
+        with metrics.stage("prx.latency"):
+            proxies = latency.rank(proxies, latency.proxy_target, lambda p: p["name"])
+    return proxies
+
+
 def build_proxies(nodes):
-    proxies = []
+    return {"proxies": list(iter_proxies(nodes))}
 
-    for n in nodes:
-        try:
-            p = None
-            if n.startswith("vmess://"):
-                p = parse_vmess(n)
-            elif n.startswith("vless://"):
-                p = parse_vless(n)
-            elif n.startswith("trojan://"):
-                p = parse_trojan(n)
-            elif n.startswith("ss://"):
-                p = parse_ss(n)
 
-            if p:
-                proxies.append(p)
+# ============================================
+# SHARD
+# ============================================
+def run_shard(nodes, shard):
+    """Parse node milik `shard` saja lalu simpan hasil parsial."""
+    picked = shard.select(nodes)
+    print(f"[*] Shard {shard}: {len(picked)} dari {len(nodes)} node")
+    records = [(i, p) for i, n in picked for p in _parse_all([n])]
+    sharding.write_partial("prx", shard, sharding.source_digest(nodes), records)
 
-        except Exception as e:
-            print("Parsing gagal:", e)
 
-    return {"proxies": proxies}
+def merge_shards(count, filename=OUTPUT_FILE):
+    # Dedup baru dijalankan di sini karena duplikat bisa jatuh ke shard berbeda
+    save_yaml(finish_proxies(sharding.read_partials("prx", count)), filename)
 
 
 # ============================================
 # SAVE YAML
 # ============================================
-def save_yaml(data, filename="dialer-proxy.yaml"):
-    with open(filename, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+def build_salt():
+    """Salt cap dialer-proxy.yaml: negara, dedup, ranking & modul yang menulisnya."""
+    return http_cache.salt((COUNTRY, DEDUP_NODES, RANK_BY_LATENCY, fingerprint.KEEP_NAME),
+                           sys.modules[__name__], fingerprint, yaml_writer, latency)
+
+
+def save_yaml(data, filename=OUTPUT_FILE):
+    """Simpan {"proxies": [...]} atau iterable proxy (ditulis streaming)."""
+    proxies = data["proxies"] if isinstance(data, dict) else data
+    index = node_index.Builder("prx")
+    if WRITE_NODE_INDEX:
+        proxies = index.collect(proxies, index.add_proxy)
+    yaml_writer.save_proxies(proxies, filename, stage="prx.yaml")
     print("[*] File saved:", filename)
+    if USE_HTTP_CACHE:
+        http_cache.stamp(filename, build_salt(), complete=not budget.was_cut("ranking latency prx"))
+    if WRITE_NODE_INDEX:
+        index.write(node_index.path_for(filename))
+
+
+# ============================================
+# FETCH PER NEGARA
+# ============================================
+def fetch_country(country, session=None):
+    """Ambil, decode & pecah subscription satu negara -> (sub_url, nodes)."""
+    sub_url = get_subscription_url(country, session)
+    print(f"[+] {country.upper()} Subscription:", sub_url)
+
+    raw = fetch_subscription(sub_url, session)
+    decoded = decode_subscription(raw)
+    return sub_url, parse_nodes(decoded)
+
+
+def fetch_countries(countries, session=None):
+    """Fetch semua negara paralel; hasil list (negara, sub_url, nodes) urut konfigurasi."""
+    session = session or parallel_fetch.make_session()
+    results = parallel_fetch.map_ordered(lambda c: fetch_country(c, session), countries)
+
+    fetched = []
+    for c, res in zip(countries, results):
+        if isinstance(res, Exception):
+            print(f"[!] Gagal {c.upper()}:", res)
+            continue
+        fetched.append((c,) + res)
+    return fetched
 
 
 # ============================================
 # MAIN
 # ============================================
-def main():
+def main(shard=None):
+    budget.start()
     all_nodes = []
+    urls = []
 
-    for c in COUNTRY:
-        try:
-            sub_url = get_subscription_url(c)
-            print(f"[+] {c.upper()} Subscription:", sub_url)
-
-            raw = fetch_subscription(sub_url)
-            decoded = decode_subscription(raw)
-            nodes = parse_nodes(decoded)
+    with metrics.stage("prx.fetch"):
+        fetched = fetch_countries(COUNTRY)
+    for c, sub_url, nodes in fetched:
+        urls.append(sub_url)
+        all_nodes.extend(nodes)
 
-            all_nodes.extend(nodes)
+    if shard:
+        run_shard(all_nodes, shard)
+        metrics.write()
+        return
 
-        except Exception as e:
-            print(f"[!] Gagal {c.upper()}:", e)
+    if USE_HTTP_CACHE and http_cache.source_unchanged(urls, OUTPUT_FILE, build_salt()):
+        print(f"[=] Subscription tidak berubah, pakai {OUTPUT_FILE} sebelumnya")
+        metrics.write()
+        return
 
-    save_yaml(build_proxies(all_nodes))
+    metrics.count("prx.nodes", len(all_nodes))
+    save_yaml(iter_proxies(all_nodes))
+    metrics.write()
 
 
 if __name__ == "__main__":
-    main()
+    _shard, _merge = sharding.from_argv(sys.argv[1:])
+    if _merge:
+        merge_shards(_merge)
+        metrics.write()
+    else:
+        main(_shard)
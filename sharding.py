@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sys
+from typing import NamedTuple
+
+# ================= KONFIGURASI =================
+SHARD_DIR = ".cache/shards"   # Tempat hasil parsial tiap shard (salin ke sini dari job lain sebelum merge)
+# ===============================================
+
+# Mode shard: tiap shard mengambil sumber lengkap yang sama, memilih item
+# miliknya dengan hash stabil isi item (shard yang sama di tiap run), lalu
+# menulis hasil parsial berisi (posisi di sumber, hasil). Merge mengurutkan
+# ulang menurut posisi, jadi output sama persis dengan run satu proses.
+# Langkah yang butuh melihat semua item (dedup nama, ranking latency)
+# dijalankan saat merge.
+
+
+class Shard(NamedTuple):
+    index: int   # 0 .. count-1
+    count: int
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    def owns(self, item):
+        digest = hashlib.blake2b(item.strip().encode("utf-8", errors="replace"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.count == self.index
+
+    def select(self, items):
+        """List (posisi, item) milik shard ini, urut sesuai sumber."""
+        return [(i, item) for i, item in enumerate(items) if self.owns(item)]
+
+    def suffixed(self, path):
+        """Nama file per shard (mis. state incremental) agar shard lokal tidak saling timpa."""
+        root, ext = os.path.splitext(path)
+        return f"{root}.shard-{self.index}-of-{self.count}{ext}"
+
+
+def parse(spec):
+    """Shard dari teks "i/N" (i mulai dari 0)."""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"format shard harus i/N, bukan {spec!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard {spec} di luar rentang 0..N-1")
+    return Shard(index, count)
+
+
+def usage(error):
+    """Keluar (status 1) dengan pesan error dan cara pakai opsi shard."""
+    prog = os.path.basename(sys.argv[0]) or "pipeline.py"
+    sys.exit(f"[!] {error}\npemakaian: python {prog} [--shard i/N | --merge N]")
+
+
+def _value(argv, name):
+    i = argv.index(name) + 1
+    if i >= len(argv) or argv[i].startswith("--"):
+        usage(f"{name} butuh nilai")
+    return argv[i]
+
+
+def from_argv(argv):
+    """(Shard atau None, jumlah shard untuk merge atau None) dari --shard i/N / --merge N.
+
+    Nilai yang hilang atau salah format -> keluar dengan pesan cara pakai.
+    """
+    shard = merge = None
+    if "--shard" in argv:
+        try:
+            shard = parse(_value(argv, "--shard"))
+        except ValueError as e:
+            usage(e)
+    if "--merge" in argv:
+        value = _value(argv, "--merge")
+        try:
+            merge = int(value)
+        except ValueError:
+            usage(f"--merge harus jumlah shard (angka), bukan {value!r}")
+        if merge < 1:
+            usage(f"--merge harus >= 1, bukan {merge}")
+    if shard and merge:
+        usage("--shard dan --merge tidak bisa dipakai bersamaan")
+    return shard, merge
+
+
+def source_digest(items):
+    """Hash seluruh sumber; semua shard dan merge harus melihat sumber yang sama."""
+    h = hashlib.blake2b(digest_size=16)
+    for item in items:
+        h.update(item.encode("utf-8", errors="replace") + b"\n")
+    return h.hexdigest()
+
+
+def partial_path(name, shard, shard_dir=None):
+    return os.path.join(shard_dir or SHARD_DIR, f"{name}.{shard.index}-of-{shard.count}.jsonl")
+
+
+def write_partial(name, shard, digest, records, shard_dir=None, complete=True):
+    """Tulis hasil parsial: header lalu satu baris JSON [posisi, hasil] per record (atomik).
+
+    `complete` False = shard terpotong budget (dicatat di header, lihat complete()).
+    """
+    path = partial_path(name, shard, shard_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    n = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"name": name, "shard": list(shard), "source": digest, "complete": complete}) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            n += 1
+    os.replace(tmp, path)
+    print(f"[*] Shard {shard}: {n} hasil {name} disimpan ke {path}")
+    return path
+
+
+def read_partials(name, count, shard_dir=None):
+    """Gabungkan hasil parsial N shard, urut sesuai posisi di sumber.
+
+    Raise RuntimeError jika ada shard yang belum selesai atau shard
+    melihat sumber yang berbeda (mis. sumber berubah di tengah matrix).
+    """
+    records = []
+    digests = set()
+    for index in range(count):
+        path = partial_path(name, Shard(index, count), shard_dir)
+        try:
+            with open(path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                records.extend(tuple(json.loads(line)) for line in f)
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"hasil shard {index}/{count} untuk {name} tidak bisa dibaca: {e}") from None
+        digests.add(header["source"])
+    if len(digests) > 1:
+        raise RuntimeError(f"shard {name} memproses sumber yang berbeda, jalankan ulang semua shard")
+    records.sort(key=lambda r: r[0])
+    return [value for _, value in records]
+
+
+def complete(name, count, shard_dir=None):
+    """True jika tidak ada shard `name` yang terpotong budget (header lama dianggap utuh)."""
+    for index in range(count):
+        try:
+            with open(partial_path(name, Shard(index, count), shard_dir), encoding="utf-8") as f:
+                if json.loads(f.readline()).get("complete") is False:
+                    return False
+        except (OSError, ValueError):
+            return False
+    return True
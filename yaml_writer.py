@@ -0,0 +1,130 @@
+import os
+import re
+
+import yaml
+
+import metrics
+
+try:
+    from yaml import CDumper as _CDumper
+except ImportError:  # PyYAML tanpa libyaml
+    _CDumper = None
+
+# ================= KONFIGURASI =================
+USE_LIBYAML = True   # False = selalu pakai emitter Python murni
+# ===============================================
+
+_DUMP_OPTS = {"allow_unicode": True, "sort_keys": False}
+
+# libyaml menganggap karakter di luar BMP (emoji bendera dsb) tidak
+# printable dan meng-escape-nya, sedangkan emitter Python menulisnya apa
+# adanya. Karakter itu ditukar sementara dengan karakter Private Use
+# (printable di keduanya, lebar 1 kolom) lalu dikembalikan setelah dump.
+_NON_BMP = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _strings(obj):
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from _strings(k)
+            yield from _strings(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            yield from _strings(v)
+
+
+def _substitute(obj, mapping):
+    if isinstance(obj, str):
+        return _NON_BMP.sub(lambda m: mapping[m.group()], obj)
+    if isinstance(obj, dict):
+        return {_substitute(k, mapping): _substitute(v, mapping) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_substitute(v, mapping) for v in obj]
+    return obj
+
+
+def _dump_libyaml(proxy):
+    """Dump via libyaml, atau None jika hasilnya belum tentu identik."""
+    strings = list(_strings(proxy))
+    found = {c for s in strings for c in _NON_BMP.findall(s)}
+    mapping = {}
+    if found:
+        used = {c for s in strings for c in s if "\ue000" <= c <= "\uf8ff"}
+        free = (chr(c) for c in range(0xE000, 0xF900) if chr(c) not in used)
+        mapping = {c: next(free, None) for c in found}
+        if None in mapping.values():
+            return None
+        proxy = _substitute(proxy, mapping)
+
+    out = yaml.dump([proxy], Dumper=_CDumper, **_DUMP_OPTS)
+    # Gaya double-quoted (escape, pemotongan baris) berbeda antar emitter
+    if '"' in out:
+        return None
+    for c, placeholder in mapping.items():
+        out = out.replace(placeholder, c)
+    return out
+
+
+def dump_item(proxy):
+    """Teks YAML satu proxy sebagai item list ("- name: ...")."""
+    if USE_LIBYAML and _CDumper is not None:
+        out = _dump_libyaml(proxy)
+        if out is not None:
+            return out
+    return yaml.dump([proxy], Dumper=yaml.Dumper, **_DUMP_OPTS)
+
+
+class ProxyWriter:
+    """Tulis {"proxies": [...]} satu proxy per panggilan write().
+
+    Hasil byte-identik dengan yaml.dump(data, allow_unicode=True,
+    sort_keys=False). File ditulis ke .tmp lalu di-rename saat close().
+    """
+
+    def __init__(self, filename, key="proxies", stage="yaml"):
+        self.filename = filename
+        self.key = key
+        self.stage = stage
+        self.count = 0
+        self._tmp = filename + ".tmp"
+        self._f = open(self._tmp, "w", encoding="utf-8")
+
+    def write(self, proxy):
+        if self.count == 0:
+            self._f.write(f"{self.key}:\n")
+        with metrics.stage(self.stage):
+            self._f.write(dump_item(proxy))
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self._f.write(f"{self.key}: []\n")
+        self._f.close()
+        os.replace(self._tmp, self.filename)
+
+    def abort(self):
+        self._f.close()
+        os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def save_proxies(proxies, filename, stage="yaml"):
+    """Tulis iterable proxy ke file YAML secara streaming, kembalikan jumlahnya.
+
+    Waktu dump dicatat ke metrics sebagai tahap `stage` (waktu membuat
+    proxy dari generator tidak ikut terhitung).
+    """
+    with ProxyWriter(filename, stage=stage) as writer:
+        for proxy in proxies:
+            writer.write(proxy)
+    return writer.count